@@ -7,6 +7,8 @@ are displayed and managed in the admin interface.
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.forms import UserChangeForm, UserCreationForm
+from bookstore_project.exports import EXPORT_ACTIONS, ExportActionsMixin
+from books.pagination import EstimatedCountPaginator
 from .models import CustomUser
 
 
@@ -31,7 +33,7 @@ class CustomUserCreationForm(UserCreationForm):
 
 
 @admin.register(CustomUser)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(ExportActionsMixin, UserAdmin):
     """
     Admin configuration for the CustomUser model.
     
@@ -89,12 +91,19 @@ class CustomUserAdmin(UserAdmin):
     # Order users by
     ordering = ('-date_joined',)
     
+    # Estimate or cache the total instead of counting every user per view
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
     # Read-only fields
     readonly_fields = ('created_at', 'updated_at')
     
     # Custom admin actions
     actions = ['activate_users', 'deactivate_users', 'enable_newsletters', 
-               'disable_newsletters']
+               'disable_newsletters'] + EXPORT_ACTIONS
+    
+    # Export used by the export actions
+    export_name = 'users'
     
     def activate_users(self, request, queryset):
         """
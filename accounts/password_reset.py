@@ -2,29 +2,31 @@
 Email utility functions for account management.
 
 This module provides functions for sending account-related emails
-such as password reset notifications to users.
+such as password reset notifications to users. Emails are queued in the
+outbox and delivered by the ``send_queued_emails`` worker.
 """
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
-from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 
+from outbox.services import enqueue_email
+
 
 def send_password_reset_email(user):
     """
     Send password reset email with security token to a user.
     
     Generates a unique security token and URL for password reset,
-    then sends an email to the user with both plain text and HTML
+    then queues an email to the user with both plain text and HTML
     versions of the reset instructions.
     
     Args:
         user: The user object requesting a password reset
         
     Returns:
-        bool: True if the email was sent successfully, False otherwise
+        bool: True if the email was queued successfully, False otherwise
         
     Raises:
         No exceptions are raised; errors are caught and logged
@@ -66,21 +68,17 @@ This password reset link will expire in 24 hours.
     except:
         html_content = None
     
-    # Send email
+    # Queue email
     try:
-        msg = EmailMultiAlternatives(
+        enqueue_email(
             subject=subject,
             body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
             to=[user.email],
+            html_body=html_content,
+            category='password_reset',
         )
-        
-        if html_content:
-            msg.attach_alternative(html_content, "text/html")
-        
-        msg.send()
         return True
     except Exception as e:
-        print(f"Error sending password reset email: {str(e)}")
+        print(f"Error queueing password reset email: {str(e)}")
         return False
         
\ No newline at end of file
@@ -0,0 +1,18 @@
+"""
+Django app configuration for the benchmarks application.
+
+This module defines the application configuration for the benchmarks
+app, specifying the auto field type and application name.
+"""
+from django.apps import AppConfig
+
+
+class BenchmarksConfig(AppConfig):
+    """
+    Application configuration class for the benchmarks app.
+
+    The benchmarks app has no models; it provides commands that generate
+    a synthetic catalogue and time the storefront's hot paths against it.
+    """
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "benchmarks"
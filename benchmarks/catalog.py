@@ -0,0 +1,298 @@
+"""
+Synthetic catalogue generator for benchmarks.
+
+Builds a large, reproducible dataset (authors, categories, books, users,
+reviews and orders) with ``bulk_create``, so that the benchmark
+scenarios run against realistic table sizes. The same seed always
+produces the same rows, primary keys included, so results from
+different commits are measured against identical data.
+
+Every generated row is marked, so the dataset can be removed without
+touching real data:
+
+* authors and books have a ``google_books_id`` starting with ``bench-``
+* categories have a slug starting with ``bench-``
+* users have a username starting with ``bench-``; their reviews, carts
+  and orders go with them
+
+Bulk inserts bypass model signals, so the rating aggregates, the search
+index and the ``books`` cache namespace are refreshed once at the end.
+"""
+import random
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from bookstore_project.cache import bump_namespace
+from books.models import Author, Book, Category, Review
+from books.ratings import recompute_ratings
+from books.search import get_search_backend
+from orders.models import Order, OrderItem, OrderStatusHistory
+
+PREFIX = 'bench-'
+
+FIRST_NAMES = (
+    'Alex', 'Sam', 'Jo', 'Morgan', 'Riley', 'Casey', 'Jamie', 'Taylor',
+    'Jordan', 'Avery', 'Charlie', 'Robin', 'Quinn', 'Skye', 'Rowan', 'Ellis',
+)
+LAST_NAMES = (
+    'Barker', 'Hound', 'Collie', 'Whistle', 'Fetch', 'Shepherd', 'Paws',
+    'Woodley', 'Kennel', 'Marsh', 'Pointer', 'Setter', 'Beagle', 'Harrier',
+)
+TITLE_WORDS = (
+    'puppy', 'training', 'recall', 'leash', 'agility', 'terrier', 'spaniel',
+    'retriever', 'collie', 'shepherd', 'behaviour', 'nutrition', 'grooming',
+    'rescue', 'working', 'gundog', 'clicker', 'obedience', 'senior', 'health',
+    'walks', 'tricks', 'anxiety', 'companion', 'breed', 'howl', 'tails',
+)
+TOPICS = (
+    'Training', 'Breeds', 'Health', 'Behaviour', 'Nutrition', 'Grooming',
+    'Puppies', 'Working Dogs', 'Rescue', 'Agility', 'Memoir', 'Fiction',
+)
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    """Return a random but reproducible UUID4."""
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _batches(items, size: int):
+    """Yield successive lists of ``size`` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(model, rows, batch_size: int) -> int:
+    """Bulk insert rows from an iterable in batches; return the count."""
+    total = 0
+    for batch in _batches(rows, batch_size):
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        total += len(batch)
+    return total
+
+
+def generate_catalog(books=100000, authors=20000, categories=50, users=10000,
+                     reviews=1000000, orders=100000, seed=42, batch_size=5000,
+                     log=print):
+    """
+    Create a synthetic catalogue.
+
+    Args:
+        books: Number of books
+        authors: Number of authors
+        categories: Number of categories
+        users: Number of customers writing reviews and placing orders
+        reviews: Number of reviews, at most one per user and book
+        orders: Number of orders, each with one to three items
+        seed: Random seed; the same seed produces the same data
+        batch_size: Rows per INSERT
+        log: Callable receiving progress messages
+
+    Returns:
+        dict: Number of rows created per model
+    """
+    rng = random.Random(seed)
+    created = {}
+
+    with transaction.atomic():
+        author_ids = [_uuid(rng) for _ in range(authors)]
+        created['authors'] = _insert(Author, (
+            Author(
+                id=author_id,
+                name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {n}',
+                google_books_id=f'{PREFIX}a{n}',
+            )
+            for n, author_id in enumerate(author_ids)
+        ), batch_size)
+        log(f"Authors: {created['authors']}")
+
+        category_objects = [
+            Category(
+                name=f'{TOPICS[n % len(TOPICS)]} {n}',
+                slug=f'{PREFIX}{n}',
+                description=f'Benchmark category {n}',
+            )
+            for n in range(categories)
+        ]
+        Category.objects.bulk_create(category_objects, batch_size=batch_size)
+        category_ids = list(
+            Category.objects.filter(slug__startswith=PREFIX)
+            .order_by('slug').values_list('pk', flat=True)
+        )
+        created['categories'] = len(category_ids)
+        log(f"Categories: {created['categories']}")
+
+        book_ids = [_uuid(rng) for _ in range(books)]
+        prices = {}
+
+        def book_rows():
+            first_published = date(1950, 1, 1)
+            for n, book_id in enumerate(book_ids):
+                words = rng.sample(TITLE_WORDS, rng.randint(2, 4))
+                price = Decimal(rng.randint(499, 3999)) / 100
+                prices[book_id] = price
+                yield Book(
+                    id=book_id,
+                    google_books_id=f'{PREFIX}{n}',
+                    isbn_13=f'979{n:010d}',
+                    title=' '.join(words).title(),
+                    publisher=f'{rng.choice(LAST_NAMES)} Press',
+                    published_date=first_published + timedelta(days=rng.randint(0, 27000)),
+                    description=' '.join(rng.choices(TITLE_WORDS, k=60)).capitalize() + '.',
+                    page_count=rng.randint(80, 600),
+                    main_category=rng.choice(TOPICS),
+                    price=price,
+                    stock_quantity=0 if rng.random() < 0.1 else rng.randint(1, 200),
+                )
+
+        created['books'] = _insert(Book, book_rows(), batch_size)
+        log(f"Books: {created['books']}")
+
+        def book_author_rows():
+            for book_id in book_ids:
+                for author_id in set(rng.choices(author_ids, k=rng.randint(1, 2))):
+                    yield Book.authors.through(book_id=book_id, author_id=author_id)
+
+        def book_category_rows():
+            for book_id in book_ids:
+                for category_id in set(rng.choices(category_ids, k=rng.randint(1, 3))):
+                    yield Book.categories.through(book_id=book_id, category_id=category_id)
+
+        _insert(Book.authors.through, book_author_rows(), batch_size)
+        _insert(Book.categories.through, book_category_rows(), batch_size)
+
+        User = get_user_model()
+        user_ids = [_uuid(rng) for _ in range(users)]
+        password = make_password(None)
+        created['users'] = _insert(User, (
+            User(
+                id=user_id,
+                username=f'{PREFIX}user-{n}',
+                email=f'{PREFIX}user-{n}@example.com',
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                password=password,
+            )
+            for n, user_id in enumerate(user_ids)
+        ), batch_size)
+        log(f"Users: {created['users']}")
+
+        def review_rows():
+            if not user_ids or not book_ids:
+                return
+            per_user, extra = divmod(reviews, len(user_ids))
+            for n, user_id in enumerate(user_ids):
+                count = min(per_user + (1 if n < extra else 0), len(book_ids))
+                for book_id in rng.sample(book_ids, count):
+                    yield Review(
+                        book_id=book_id,
+                        user_id=user_id,
+                        rating=rng.choices((1, 2, 3, 4, 5), weights=(1, 2, 5, 9, 8))[0],
+                        title='Benchmark review',
+                        comment=' '.join(rng.choices(TITLE_WORDS, k=20)),
+                    )
+
+        created['reviews'] = _insert(Review, review_rows(), batch_size)
+        log(f"Reviews: {created['reviews']}")
+
+        order_items = []
+
+        def order_rows():
+            statuses = ('confirmed', 'processing', 'shipped', 'delivered')
+            for n in range(orders if user_ids and book_ids else 0):
+                order_id = _uuid(rng)
+                lines = {
+                    book_id: rng.randint(1, 3)
+                    for book_id in rng.sample(book_ids, min(rng.randint(1, 3), len(book_ids)))
+                }
+                order_items.extend(
+                    OrderItem(
+                        order_id=order_id,
+                        book_id=book_id,
+                        book_title='Benchmark book',
+                        unit_price=prices[book_id],
+                        quantity=quantity,
+                    )
+                    for book_id, quantity in lines.items()
+                )
+                yield Order(
+                    id=order_id,
+                    order_number=f'BENCH-{n:010d}',
+                    user_id=rng.choice(user_ids),
+                    status=rng.choice(statuses),
+                    payment_status='paid',
+                    total_amount=sum(
+                        prices[book_id] * quantity for book_id, quantity in lines.items()
+                    ),
+                    customer_email='customer@example.com',
+                    customer_first_name='Bench',
+                    customer_last_name='Customer',
+                )
+
+        total = 0
+        for batch in _batches(order_rows(), batch_size):
+            Order.objects.bulk_create(batch, batch_size=batch_size)
+            OrderItem.objects.bulk_create(order_items, batch_size=batch_size)
+            order_items.clear()
+            total += len(batch)
+        created['orders'] = total
+        log(f"Orders: {created['orders']}")
+
+        recompute_ratings(Book.objects.filter(
+            google_books_id__startswith=PREFIX
+        ).values_list('pk', flat=True))
+        log('Rating aggregates recomputed')
+
+    log(f'Search index: {get_search_backend().rebuild()} books indexed')
+    bump_namespace('books')
+    return created
+
+
+def clear_catalog(log=print):
+    """
+    Delete every row created by ``generate_catalog``.
+
+    Reviews and orders are deleted with plain DELETE statements rather
+    than one signal per row; their aggregates and caches belong to the
+    synthetic books and users removed with them.
+
+    Args:
+        log: Callable receiving progress messages
+
+    Returns:
+        dict: Number of rows deleted per model
+    """
+    User = get_user_model()
+    users = User.objects.filter(username__startswith=PREFIX)
+    books = Book.objects.filter(google_books_id__startswith=PREFIX)
+    orders = Order.objects.filter(user__in=users.values('pk'))
+    deleted = {}
+    with transaction.atomic():
+        for name, queryset in (
+            ('reviews', Review.objects.filter(user__in=users.values('pk'))),
+            ('order items', OrderItem.objects.filter(order__in=orders.values('pk'))),
+            ('order history', OrderStatusHistory.objects.filter(order__in=orders.values('pk'))),
+            ('orders', orders),
+        ):
+            deleted[name] = queryset._raw_delete(queryset.db)
+        deleted['users'] = users.delete()[1].get(User._meta.label, 0)
+        deleted['books'] = books.delete()[1].get(Book._meta.label, 0)
+        deleted['authors'] = Author.objects.filter(
+            google_books_id__startswith=PREFIX
+        ).delete()[1].get(Author._meta.label, 0)
+        deleted['categories'] = Category.objects.filter(
+            slug__startswith=PREFIX
+        ).delete()[1].get(Category._meta.label, 0)
+    log(f'Search index: {get_search_backend().rebuild()} books indexed')
+    bump_namespace('books')
+    return deleted
@@ -0,0 +1,55 @@
+"""
+Management command to create or remove a synthetic benchmark catalogue
+"""
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.catalog import clear_catalog, generate_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        'Create a reproducible synthetic catalogue (books, authors, reviews, '
+        'orders) for run_benchmarks, or remove it with --clear.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=100000,
+                            help='Number of books (default: 100000)')
+        parser.add_argument('--authors', type=int, default=20000,
+                            help='Number of authors (default: 20000)')
+        parser.add_argument('--categories', type=int, default=50,
+                            help='Number of categories (default: 50)')
+        parser.add_argument('--users', type=int, default=10000,
+                            help='Number of customers (default: 10000)')
+        parser.add_argument('--reviews', type=int, default=1000000,
+                            help='Number of reviews (default: 1000000)')
+        parser.add_argument('--orders', type=int, default=100000,
+                            help='Number of orders (default: 100000)')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed (default: 42)')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per INSERT (default: 5000)')
+        parser.add_argument('--clear', action='store_true',
+                            help='Remove a previously generated catalogue instead')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted = clear_catalog(log=self.stdout.write)
+            summary = ', '.join(f'{count} {name}' for name, count in deleted.items())
+            self.stdout.write(self.style.SUCCESS(f'Deleted {summary}'))
+            return
+
+        created = generate_catalog(
+            books=options['books'],
+            authors=options['authors'],
+            categories=options['categories'],
+            users=options['users'],
+            reviews=options['reviews'],
+            orders=options['orders'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        summary = ', '.join(f'{count} {name}' for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary}'))
@@ -0,0 +1,112 @@
+"""
+Management command to time the storefront hot paths
+"""
+
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.scenarios import SCENARIOS, BenchmarkRunner, compare_results
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the storefront scenarios (p50/p95/p99 and queries per request) '
+        'and save the results, tagged with the git commit, as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios', nargs='*', metavar='scenario',
+            help=f'Scenarios to run (default: all of {", ".join(SCENARIOS)})'
+        )
+        parser.add_argument('--iterations', type=int, default=200,
+                            help='Timed requests per scenario (default: 200)')
+        parser.add_argument('--warmup', type=int, default=20,
+                            help='Untimed requests per scenario (default: 20)')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Seed choosing the requests (default: 42)')
+        parser.add_argument(
+            '--output',
+            help='Results file (default: BENCHMARK_RESULTS_DIR/<commit>-<time>.json)'
+        )
+        parser.add_argument('--compare', metavar='FILE',
+                            help='Earlier results file to compare against')
+
+    def handle(self, *args, **options):
+        unknown = set(options['scenarios']) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {options["compare"]}: {e}')
+
+        runner = BenchmarkRunner(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        try:
+            results = runner.run(options['scenarios'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"\n{'scenario':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'queries':>10}{'errors':>8}"
+        )
+        for name, result in results['scenarios'].items():
+            self.stdout.write(
+                f"{name:<18}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                f"{result['p99_ms']:>10.1f}{result['queries_mean']:>10.1f}"
+                f"{result['errors']:>8}"
+            )
+
+        output = options['output']
+        if not output:
+            directory = getattr(settings, 'BENCHMARK_RESULTS_DIR',
+                                os.path.join(settings.BASE_DIR, 'benchmarks', 'results'))
+            os.makedirs(directory, exist_ok=True)
+            commit = (results['commit'] or 'unknown')[:10]
+            stamp = results['created_at'][:19].replace(':', '').replace('-', '')
+            output = os.path.join(directory, f'{commit}-{stamp}.json')
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'\nResults written to {output}'))
+        if results['dirty']:
+            self.stdout.write(self.style.WARNING(
+                'The working tree has uncommitted changes; the commit hash '
+                'does not fully describe the code measured.'
+            ))
+
+        if baseline is not None:
+            # Orders are left out: the checkout scenario adds to them
+            catalog = ('books', 'authors', 'categories', 'reviews')
+            if any(
+                baseline.get('catalog', {}).get(name) != results['catalog'][name]
+                for name in catalog
+            ):
+                self.stdout.write(self.style.WARNING(
+                    'The baseline was measured against a different catalogue.'
+                ))
+            self.stdout.write(
+                f"\nCompared with {(baseline.get('commit') or 'unknown')[:10]}:"
+            )
+            for name, metric, old, new, change in compare_results(baseline, results):
+                style = self.style.ERROR if change > 10 else (
+                    self.style.SUCCESS if change < -10 else str
+                )
+                self.stdout.write(style(
+                    f'{name:<18}{metric:<14}{old:>10.1f} -> {new:>10.1f} '
+                    f'({change:+.1f}%)'
+                ))
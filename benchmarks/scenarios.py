@@ -0,0 +1,381 @@
+"""
+Timed storefront scenarios.
+
+Each scenario drives one hot path through Django's test client, the
+whole middleware stack included, and records the wall-clock time and
+the number of SQL queries of every request. ``run_benchmarks`` reports
+p50/p95/p99 latencies and queries per request, together with the git
+commit, database and catalogue size, so that result files from
+different commits can be compared with ``compare_results``.
+
+Requests are chosen with a seeded random generator, and the cache is
+cleared before each scenario, so two runs against the same catalogue
+issue the same requests from the same starting state. Stripe is never
+called: the checkout scenario replaces ``stripe.PaymentIntent.create``
+with a stub that reports an immediately successful payment.
+"""
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from books.models import Author, Book, Category, Review
+from cart.models import Cart
+from orders.models import Order
+
+from .catalog import PREFIX, TITLE_WORDS
+
+SHOPPER = f'{PREFIX}shopper'
+
+
+class Scenario:
+    """
+    A named request pattern.
+
+    Subclasses implement ``request``, which issues one timed request, and
+    may override ``prepare``, which runs untimed before each request.
+    """
+
+    name = ''
+    description = ''
+    login = False
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.rng = random.Random(f'{runner.seed}:{self.name}')
+
+    def prepare(self, client):
+        """Set up state needed by the next request (not timed)."""
+
+    def request(self, client):
+        """Issue one request and return the response."""
+        raise NotImplementedError
+
+
+class Home(Scenario):
+    name = 'home'
+    description = 'Homepage'
+
+    def request(self, client):
+        return client.get('/')
+
+
+class BookList(Scenario):
+    name = 'book_list'
+    description = 'Book listing, first 20 pages'
+
+    def request(self, client):
+        page = self.rng.randint(1, 20)
+        return client.get('/books/', {'page': page} if page > 1 else {})
+
+
+class BookListSearch(Scenario):
+    name = 'book_list_search'
+    description = 'Book listing filtered by a search query'
+
+    def request(self, client):
+        query = ' '.join(self.rng.sample(TITLE_WORDS, self.rng.randint(1, 2)))
+        return client.get('/books/', {'q': query})
+
+
+class SearchAjax(Scenario):
+    name = 'search_ajax'
+    description = 'Live search suggestions'
+
+    def request(self, client):
+        word = self.rng.choice(TITLE_WORDS)
+        return client.get('/books/search/ajax/', {'q': word[:self.rng.randint(3, len(word))]})
+
+
+class BookDetail(Scenario):
+    name = 'book_detail'
+    description = 'Book detail page of a random book'
+
+    def request(self, client):
+        return client.get(f'/books/book/{self.rng.choice(self.runner.book_ids)}/')
+
+
+class AddToCart(Scenario):
+    name = 'add_to_cart'
+    description = 'Add an in-stock book to the cart'
+    login = True
+
+    def prepare(self, client):
+        if self.rng.random() < 0.2:
+            Cart.objects.filter(user=self.runner.shopper).delete()
+
+    def request(self, client):
+        book_id = self.rng.choice(self.runner.stocked_ids)
+        return client.post(f'/cart/add/{book_id}/')
+
+
+class Checkout(Scenario):
+    name = 'checkout'
+    description = 'Checkout page and payment of a two-book cart (Stripe stubbed)'
+    login = True
+
+    def prepare(self, client):
+        Cart.objects.filter(user=self.runner.shopper).delete()
+        for book_id in self.rng.sample(self.runner.stocked_ids, 2):
+            client.post(f'/cart/add/{book_id}/')
+
+    def request(self, client):
+        client.get('/cart/checkout/')
+        return client.post(
+            '/cart/process-payment/',
+            data=json.dumps({'payment_method_id': 'pm_card_visa'}),
+            content_type='application/json',
+        )
+
+
+class Sitemap(Scenario):
+    name = 'sitemap'
+    description = 'Sitemap index'
+
+    def request(self, client):
+        return client.get('/sitemap.xml')
+
+
+class ApiBooks(Scenario):
+    name = 'api_books'
+    description = 'JSON API book list page'
+
+    def request(self, client):
+        return client.get('/books/api/books/', {'limit': 50})
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Home, BookList, BookListSearch, SearchAjax, BookDetail,
+        AddToCart, Checkout, Sitemap, ApiBooks,
+    )
+}
+
+
+def percentile(samples, percent: int) -> float:
+    """
+    Return a percentile of a list of samples.
+
+    Args:
+        samples: Measured values
+        percent: Percentile, 1-99
+
+    Returns:
+        float: The interpolated percentile
+    """
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[percent - 1]
+
+
+def git_commit():
+    """
+    Describe the checked-out commit.
+
+    Returns:
+        dict: commit hash and whether the tree has uncommitted changes,
+        or None values outside a git checkout
+    """
+    def git(*args):
+        return subprocess.run(
+            ('git',) + args, cwd=settings.BASE_DIR, capture_output=True,
+            text=True, check=True,
+        ).stdout.strip()
+
+    try:
+        return {
+            'commit': git('rev-parse', 'HEAD'),
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        }
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def _host() -> str:
+    """Return a host name the site accepts."""
+    for host in settings.ALLOWED_HOSTS:
+        if '*' not in host and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+@contextmanager
+def stub_stripe():
+    """Make every Stripe payment succeed without a network call."""
+    counter = iter(range(1, 10 ** 9))
+
+    def create(**kwargs):
+        return SimpleNamespace(
+            id=f'pi_benchmark_{next(counter)}', status='succeeded',
+            client_secret=None,
+        )
+
+    with mock.patch('stripe.PaymentIntent.create', side_effect=create):
+        yield
+
+
+class BenchmarkRunner:
+    """
+    Runs scenarios and collects their measurements.
+    """
+
+    def __init__(self, iterations=200, warmup=20, seed=42, log=print):
+        """
+        Configure a run.
+
+        Args:
+            iterations: Timed requests per scenario
+            warmup: Untimed requests per scenario, run first
+            seed: Seed choosing the requests
+            log: Callable receiving progress messages
+        """
+        self.iterations = iterations
+        self.warmup = warmup
+        self.seed = seed
+        self.log = log
+
+    def _load_fixtures(self):
+        """Pick the books used by the scenarios and the shopper account."""
+        books = Book.objects.filter(is_available=True).order_by('pk')
+        self.book_ids = [str(pk) for pk in books.values_list('pk', flat=True)[:5000]]
+        self.stocked_ids = [
+            str(pk) for pk in
+            books.filter(stock_quantity__gte=20).values_list('pk', flat=True)[:500]
+        ]
+        if len(self.stocked_ids) < 2:
+            raise ValueError(
+                'The catalogue needs at least two books with 20 or more in '
+                'stock; run generate_catalog first.'
+            )
+        User = get_user_model()
+        self.shopper, _ = User.objects.get_or_create(
+            username=SHOPPER,
+            defaults={'email': f'{SHOPPER}@example.com', 'first_name': 'Bench',
+                      'last_name': 'Shopper'},
+        )
+
+    def run_scenario(self, scenario_class) -> dict:
+        """
+        Time one scenario.
+
+        Returns:
+            dict: Latency percentiles (ms), queries per request and errors
+        """
+        scenario = scenario_class(self)
+        client = Client(HTTP_HOST=_host())
+        if scenario.login:
+            client.force_login(self.shopper)
+        cache.clear()
+
+        timings, queries, errors = [], [], 0
+        for iteration in range(self.warmup + self.iterations):
+            # Flash messages from unfollowed redirects would pile up
+            client.cookies.pop('messages', None)
+            scenario.prepare(client)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = scenario.request(client)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+            if iteration < self.warmup:
+                continue
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+            if response.status_code >= 400 or (
+                response.get('Content-Type', '').startswith('application/json')
+                and not response.streaming
+                and json.loads(response.content).get('success') is False
+            ):
+                errors += 1
+
+        return {
+            'description': scenario.description,
+            'iterations': len(timings),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'max_ms': round(max(timings), 3),
+            'queries_mean': round(statistics.fmean(queries), 2),
+            'queries_max': max(queries),
+            'errors': errors,
+        }
+
+    def run(self, names=None) -> dict:
+        """
+        Run scenarios and describe the environment they ran in.
+
+        Args:
+            names: Scenario names, or None for all of them
+
+        Returns:
+            dict: Run metadata and per-scenario results
+        """
+        self._load_fixtures()
+        names = names or list(SCENARIOS)
+        results = {
+            **git_commit(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'seed': self.seed,
+            'warmup': self.warmup,
+            'catalog': {
+                'books': Book.objects.count(),
+                'authors': Author.objects.count(),
+                'categories': Category.objects.count(),
+                'reviews': Review.objects.count(),
+                'orders': Order.objects.count(),
+            },
+            'scenarios': {},
+        }
+
+        # Keep the per-request warnings of the instrumentation out of the way
+        with stub_stripe(), override_settings(SLOW_REQUEST_MS=0, N_PLUS_ONE_THRESHOLD=0):
+            try:
+                for name in names:
+                    self.log(f'Running {name}...')
+                    results['scenarios'][name] = self.run_scenario(SCENARIOS[name])
+            finally:
+                Cart.objects.filter(user=self.shopper).delete()
+        return results
+
+
+def compare_results(baseline: dict, current: dict):
+    """
+    Compare two result files scenario by scenario.
+
+    Args:
+        baseline: Results of the reference commit
+        current: Results of the commit under test
+
+    Returns:
+        list: (scenario, metric, baseline, current, change %) tuples
+    """
+    rows = []
+    for name, result in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean'):
+            old, new = before[metric], result[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            rows.append((name, metric, old, new, change))
+    return rows
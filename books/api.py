@@ -0,0 +1,500 @@
+"""
+Read-only JSON API for the catalogue.
+
+Books, authors and categories are exposed as list and detail endpoints
+under ``/books/api/``:
+
+    GET /books/api/books/?fields=id,title,price,authors&limit=100
+    GET /books/api/books/<uuid>/
+    GET /books/api/authors/  /books/api/authors/<uuid>/
+    GET /books/api/categories/  /books/api/categories/<slug>/
+
+Lists use keyset (cursor) pagination: each response carries a ``next``
+URL with an opaque cursor until the last page. ``fields`` selects the
+attributes to return; the query only loads the columns, relations and
+annotations those attributes need, and relations are prefetched, so a
+page costs the same small number of queries whatever its size.
+
+Responses carry an ETag and Last-Modified derived from the ``books``
+cache namespace, which every catalogue change bumps, so clients can
+revalidate with ``If-None-Match`` and get a 304. Pages of at least
+API_STREAM_PAGE_SIZE items are streamed as they are serialised instead
+of being built in memory. A streamed page is read after the middleware
+has returned, so it keeps the request's replica routing through
+``iterate_on_replica``. Its queries are not in the request's
+instrumentation stats.
+"""
+import hashlib
+import json
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Prefetch, Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+
+from bookstore_project.cache import namespace_changed_at, namespace_version
+from bookstore_project.db_router import iterate_on_replica, replica_reads_enabled
+
+from .covers import cover_url, source_url
+from .models import Author, Book, Category
+from .pagination import CursorPaginator
+
+# Rows fetched per query while a streamed page is serialised
+STREAM_CHUNK_SIZE = 500
+
+
+class ApiError(Exception):
+    """Raised for invalid query parameters; rendered as a 400 response."""
+
+
+class Field:
+    """
+    One attribute of an API resource and what it needs from the database.
+    """
+
+    def __init__(self, value, columns=(), prefetch=None, annotate=None):
+        """
+        Describe a field.
+
+        Args:
+            value: Callable (obj, request) returning the JSON value
+            columns: Model columns the value reads
+            prefetch: ``Prefetch`` for a relation the value reads
+            annotate: Dict of annotations the value reads
+        """
+        self.value = value
+        self.columns = tuple(columns)
+        self.prefetch = prefetch
+        self.annotate = annotate or {}
+
+
+def _attr(name):
+    """Field reading a plain model column."""
+    return Field(lambda obj, request: getattr(obj, name), columns=(name,))
+
+
+def _text(name):
+    """Field reading a column that is serialised as a string."""
+    def value(obj, request):
+        current = getattr(obj, name)
+        return None if current is None else str(current)
+    return Field(value, columns=(name,))
+
+
+def _url(obj, request):
+    """Absolute URL of an object's HTML page."""
+    return request.build_absolute_uri(obj.get_absolute_url())
+
+
+def _cover(book, request):
+    """Stored cover variants of a book, or its remote cover URL."""
+    variants = (book.cover_variants or {}).get('variants')
+    if not variants:
+        return {'source': source_url(book)}
+    return {
+        name: {
+            'width': variant['width'],
+            'height': variant['height'],
+            'webp': request.build_absolute_uri(cover_url(variant['webp'])),
+            'jpeg': request.build_absolute_uri(cover_url(variant['jpeg'])),
+        }
+        for name, variant in variants.items()
+    }
+
+
+def _books_url(filter_name, attribute):
+    """Field linking to the API list of an author's or category's books."""
+    def value(obj, request):
+        path = reverse('books:api_book_list')
+        return request.build_absolute_uri(
+            f'{path}?{filter_name}={getattr(obj, attribute)}'
+        )
+    return Field(value, columns=(attribute,))
+
+
+AVAILABLE_BOOKS = Q(books__is_available=True)
+
+BOOK_FIELDS = {
+    'id': _text('id'),
+    'url': Field(_url),
+    'title': _attr('title'),
+    'subtitle': _attr('subtitle'),
+    'isbn_10': _attr('isbn_10'),
+    'isbn_13': _attr('isbn_13'),
+    'publisher': _attr('publisher'),
+    'published_date': _attr('published_date'),
+    'description': _attr('description'),
+    'page_count': _attr('page_count'),
+    'language': _attr('language'),
+    'main_category': _attr('main_category'),
+    'price': _text('price'),
+    'in_stock': Field(
+        lambda book, request: book.is_in_stock,
+        columns=('stock_quantity', 'is_available'),
+    ),
+    'average_rating': _text('average_rating'),
+    'ratings_count': _attr('ratings_count'),
+    'cover': Field(_cover, columns=('cover_variants', 'cover_image', 'thumbnail')),
+    'authors': Field(
+        lambda book, request: [
+            {'id': str(author.pk), 'name': author.name}
+            for author in book.authors.all()
+        ],
+        prefetch=Prefetch('authors', queryset=Author.objects.only('id', 'name')),
+    ),
+    'categories': Field(
+        lambda book, request: [
+            {'slug': category.slug, 'name': category.name}
+            for category in book.categories.all()
+        ],
+        prefetch=Prefetch(
+            'categories', queryset=Category.objects.only('id', 'slug', 'name')
+        ),
+    ),
+    'created_at': _attr('created_at'),
+    'updated_at': _attr('updated_at'),
+}
+
+AUTHOR_FIELDS = {
+    'id': _text('id'),
+    'url': Field(_url),
+    'name': _attr('name'),
+    'biography': _attr('biography'),
+    'photo': _attr('photo'),
+    'is_featured': _attr('is_featured'),
+    'book_count': Field(
+        lambda author, request: author.book_count,
+        annotate={'book_count': Count('books', filter=AVAILABLE_BOOKS)},
+    ),
+    'books': _books_url('author', 'id'),
+}
+
+CATEGORY_FIELDS = {
+    'slug': _attr('slug'),
+    'url': Field(_url, columns=('slug',)),
+    'name': _attr('name'),
+    'description': _attr('description'),
+    'book_count': Field(
+        lambda category, request: category.book_count,
+        annotate={'book_count': Count('books', filter=AVAILABLE_BOOKS)},
+    ),
+    'books': _books_url('category', 'slug'),
+}
+
+
+class Resource:
+    """
+    An API resource: its queryset, ordering and available fields.
+    """
+
+    def __init__(self, queryset, fields, default_fields, ordering, lookup='id'):
+        """
+        Describe a resource.
+
+        Args:
+            queryset: Base queryset of the objects exposed
+            fields: Field name -> ``Field``
+            default_fields: Fields returned when ``fields`` is not given
+            ordering: Unique keyset ordering of list pages
+            lookup: Model field matched by the detail URL
+        """
+        self.queryset = queryset
+        self.fields = fields
+        self.default_fields = tuple(default_fields)
+        self.ordering = tuple(ordering)
+        self.lookup = lookup
+
+    def selected_fields(self, request):
+        """
+        Return the field names requested with ``fields``.
+
+        Raises:
+            ApiError: If an unknown field is requested
+        """
+        param = request.GET.get('fields')
+        if not param:
+            return self.default_fields
+        names = tuple(dict.fromkeys(
+            name.strip() for name in param.split(',') if name.strip()
+        ))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise ApiError(
+                f"Unknown fields: {', '.join(unknown) or param}. "
+                f"Available: {', '.join(self.fields)}"
+            )
+        return names
+
+    def queryset_for(self, names):
+        """
+        Build a queryset loading only what the selected fields read.
+
+        The primary key, the lookup field and the ordering fields are
+        always loaded, for URLs and cursors.
+        """
+        model = self.queryset.model
+        columns = {model._meta.pk.name, self.lookup}
+        columns.update(field.lstrip('-') for field in self.ordering)
+        prefetches = []
+        annotations = {}
+        for name in names:
+            field = self.fields[name]
+            columns.update(field.columns)
+            if field.prefetch is not None:
+                prefetches.append(field.prefetch)
+            annotations.update(field.annotate)
+
+        queryset = self.queryset.only(*columns)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        return queryset
+
+    def serialize(self, obj, names, request):
+        """Return the selected fields of an object as a dict."""
+        return {name: self.fields[name].value(obj, request) for name in names}
+
+
+RESOURCES = {
+    'books': Resource(
+        Book.objects.filter(is_available=True),
+        BOOK_FIELDS,
+        ('id', 'url', 'title', 'authors', 'price', 'in_stock', 'average_rating', 'cover'),
+        ordering=('-created_at', '-id'),
+    ),
+    'authors': Resource(
+        Author.objects.all(),
+        AUTHOR_FIELDS,
+        ('id', 'url', 'name', 'book_count', 'books'),
+        ordering=('name', 'id'),
+    ),
+    'categories': Resource(
+        Category.objects.all(),
+        CATEGORY_FIELDS,
+        ('slug', 'url', 'name', 'book_count', 'books'),
+        ordering=('name', 'id'),
+        lookup='slug',
+    ),
+}
+
+
+def _etag(request, *args, **kwargs):
+    """ETag of an API response: its URL and the catalogue version."""
+    validator = f"{request.get_full_path()}:{namespace_version('books')}"
+    return hashlib.md5(validator.encode()).hexdigest()
+
+
+def _last_modified(request, *args, **kwargs):
+    """Time of the last catalogue change."""
+    return namespace_changed_at('books')
+
+
+def api_view(view_func):
+    """
+    Wrap an API view with conditional GET support and error handling.
+
+    ``ApiError`` becomes a JSON 400 and ``Http404`` a JSON 404.
+    Successful responses may be cached publicly for API_CACHE_MAX_AGE
+    seconds and are revalidated with their ETag afterwards.
+
+    Args:
+        view_func: The view to wrap
+
+    Returns:
+        The wrapped view
+    """
+    conditional_view = condition(
+        etag_func=_etag, last_modified_func=_last_modified
+    )(view_func)
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            response = conditional_view(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except Http404:
+            return JsonResponse({'error': 'Not found'}, status=404)
+        if response.status_code in (200, 304):
+            patch_cache_control(
+                response, public=True,
+                max_age=getattr(settings, 'API_CACHE_MAX_AGE', 60),
+            )
+        return response
+
+    return require_GET(wrapper)
+
+
+def _page_size(request) -> int:
+    """
+    Return the ``limit`` of a list request, capped at API_MAX_PAGE_SIZE.
+
+    Raises:
+        ApiError: If the limit is not a positive integer
+    """
+    default = getattr(settings, 'API_PAGE_SIZE', 50)
+    maximum = getattr(settings, 'API_MAX_PAGE_SIZE', 1000)
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    if limit < 1:
+        raise ApiError('limit must be positive')
+    return min(limit, maximum)
+
+
+def _next_url(request, cursor: str) -> str:
+    """Return the URL of the following page, keeping the other parameters."""
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def _list_response(request, resource, names, queryset):
+    """
+    Render one cursor page of a resource.
+
+    Pages smaller than API_STREAM_PAGE_SIZE are built in memory; larger
+    ones are streamed, fetching rows (and their prefetched relations)
+    STREAM_CHUNK_SIZE at a time from the database the request was routed
+    to. One row past the page is read to tell whether a following page
+    exists.
+
+    Args:
+        request: The HTTP request object
+        resource: The ``Resource`` listed
+        names: Selected field names
+        queryset: Queryset from ``Resource.queryset_for``, filtered
+
+    Returns:
+        JsonResponse, or StreamingHttpResponse for large pages
+
+    Raises:
+        ApiError: If the limit or cursor is invalid
+    """
+    limit = _page_size(request)
+    paginator = CursorPaginator(queryset, limit, resource.ordering)
+    try:
+        rows, number = paginator.forward(request.GET.get('cursor'))
+    except ValueError:
+        raise ApiError('Invalid cursor')
+    rows = rows[:limit + 1]
+
+    if limit < getattr(settings, 'API_STREAM_PAGE_SIZE', 200):
+        objects = list(rows)
+        next_url = None
+        if len(objects) > limit:
+            next_url = _next_url(
+                request, paginator.cursor_after(objects[limit - 1], number + 1)
+            )
+        return JsonResponse({
+            'results': [
+                resource.serialize(obj, names, request) for obj in objects[:limit]
+            ],
+            'next': next_url,
+        })
+
+    def stream():
+        yield '{"results":['
+        previous = None
+        next_url = None
+        for position, obj in enumerate(rows.iterator(chunk_size=STREAM_CHUNK_SIZE)):
+            if position == limit:
+                next_url = _next_url(
+                    request, paginator.cursor_after(previous, number + 1)
+                )
+                break
+            item = json.dumps(
+                resource.serialize(obj, names, request), cls=DjangoJSONEncoder
+            )
+            yield (',' if position else '') + item
+            previous = obj
+        yield '],"next":' + json.dumps(next_url) + '}'
+
+    # The body is produced after the middleware has reset replica reads
+    chunks = iterate_on_replica(stream()) if replica_reads_enabled() else stream()
+    return StreamingHttpResponse(chunks, content_type='application/json')
+
+
+def _detail_response(request, resource, value):
+    """
+    Render a single object of a resource.
+
+    Raises:
+        Http404: If no object matches
+    """
+    names = resource.selected_fields(request)
+    obj = get_object_or_404(resource.queryset_for(names), **{resource.lookup: value})
+    return JsonResponse(resource.serialize(obj, names, request))
+
+
+@api_view
+def api_book_list(request):
+    """
+    List available books, newest first.
+
+    Optional ``author`` (UUID) and ``category`` (slug) parameters narrow
+    the list, e.g. to follow an author's ``books`` link.
+
+    Args:
+        request: The HTTP request object
+
+    Returns:
+        JSON page of books
+    """
+    resource = RESOURCES['books']
+    names = resource.selected_fields(request)
+    queryset = resource.queryset_for(names)
+
+    author = request.GET.get('author')
+    if author:
+        try:
+            queryset = queryset.filter(authors=uuid.UUID(author))
+        except ValueError:
+            raise ApiError('author must be a UUID')
+    category = request.GET.get('category')
+    if category:
+        queryset = queryset.filter(categories__slug=category)
+
+    return _list_response(request, resource, names, queryset)
+
+
+@api_view
+def api_book_detail(request, pk):
+    """Return one available book."""
+    return _detail_response(request, RESOURCES['books'], pk)
+
+
+@api_view
+def api_author_list(request):
+    """List authors by name."""
+    resource = RESOURCES['authors']
+    names = resource.selected_fields(request)
+    return _list_response(request, resource, names, resource.queryset_for(names))
+
+
+@api_view
+def api_author_detail(request, pk):
+    """Return one author."""
+    return _detail_response(request, RESOURCES['authors'], pk)
+
+
+@api_view
+def api_category_list(request):
+    """List categories by name."""
+    resource = RESOURCES['categories']
+    names = resource.selected_fields(request)
+    return _list_response(request, resource, names, resource.queryset_for(names))
+
+
+@api_view
+def api_category_detail(request, slug):
+    """Return one category."""
+    return _detail_response(request, RESOURCES['categories'], slug)
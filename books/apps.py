@@ -17,4 +17,8 @@ class BooksConfig(AppConfig):
     """
     default_auto_field = "django.db.models.BigAutoField"
     name = "books"
+
+    def ready(self):
+        """Connect the signal handlers that keep catalogue indexes in sync."""
+        from . import signals  # noqa: F401
     
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Conditional GET support for catalogue pages.
+
+``catalogue_page`` answers ``If-None-Match`` / ``If-Modified-Since``
+with a 304 before the view runs, so repeat visitors and crawlers do not
+cost a template render or any catalogue queries.
+
+The content version is the ``books`` cache namespace rather than the
+``updated_at`` of the page's object: stock and rating changes are made
+with ``F()`` updates and author, review or recommendation changes never
+touch the book row, but every one of them bumps the namespace. A book's
+detail page also depends on the book's ``stock_scope``, which stock
+changes bump instead when the book stays in (or out of) stock. The
+validator also covers what the base template shows about the viewer:
+who is logged in, the cart summary and the CSRF cookie the page's forms
+were rendered for. Pages with pending flash messages are never answered
+with a 304.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from bookstore_project.cache import (
+    namespace_changed_at, namespace_version, stock_scope,
+)
+from cart.summary import get_cart_summary
+
+
+def _scopes(request):
+    """Return the ``books`` namespace scopes a catalogue page depends on."""
+    match = request.resolver_match
+    if match is not None and match.view_name == 'books:book_detail':
+        return [None, stock_scope(match.kwargs['pk'])]
+    return [None]
+
+
+def catalogue_version(request) -> str:
+    """
+    Return the version token of the catalogue data a page shows.
+
+    Args:
+        request: The HTTP request object
+
+    Returns:
+        str: Version token, changing whenever the page's data changes
+    """
+    return ':'.join(namespace_version('books', scope) for scope in _scopes(request))
+
+
+def catalogue_changed_at(request):
+    """
+    Return when the catalogue data a page shows last changed.
+
+    Args:
+        request: The HTTP request object
+
+    Returns:
+        datetime: Aware UTC datetime, or None if unknown
+    """
+    changes = [namespace_changed_at('books', scope) for scope in _scopes(request)]
+    if None in changes:
+        return None
+    return max(changes)
+
+
+def _viewer_state(request):
+    """
+    Describe the per-viewer parts of a page, or None if it can't be reused.
+
+    Args:
+        request: The HTTP request object
+
+    Returns:
+        str: Viewer fingerprint, or None when messages are pending
+    """
+    if len(get_messages(request)):
+        return None
+    if request.user.is_authenticated:
+        summary = get_cart_summary(request)
+        user = f"{request.user.pk}:{summary['count']}:{summary['subtotal']}"
+    else:
+        user = 'anonymous'
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    return f'{user}:{csrf}'
+
+
+def _etag(request, *args, **kwargs):
+    """Build the ETag of a catalogue page for the current viewer."""
+    viewer = _viewer_state(request)
+    if viewer is None:
+        return None
+    validator = ':'.join([
+        request.get_full_path(), catalogue_version(request), viewer,
+    ])
+    return hashlib.md5(validator.encode()).hexdigest()
+
+
+def _last_modified(request, *args, **kwargs):
+    """
+    Return when the catalogue last changed, for anonymous viewers only.
+
+    ``If-Modified-Since`` carries no viewer information, so logged-in
+    pages rely on the ETag alone.
+    """
+    if request.user.is_authenticated or _viewer_state(request) is None:
+        return None
+    return catalogue_changed_at(request)
+
+
+def catalogue_page(view_func):
+    """
+    Make a catalogue view answer conditional GETs with 304 Not Modified.
+
+    Responses are marked ``Cache-Control: private, no-cache`` so browsers
+    keep them but always revalidate, and ``Vary: Cookie`` because they
+    depend on the session.
+
+    Args:
+        view_func: The view to wrap
+
+    Returns:
+        The wrapped view
+    """
+    conditional_view = condition(
+        etag_func=_etag, last_modified_func=_last_modified
+    )(view_func)
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = conditional_view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Cookie',))
+        return response
+
+    return wrapper
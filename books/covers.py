@@ -0,0 +1,201 @@
+"""
+Local cover image pipeline.
+
+Book covers are fetched once from their remote URL (``cover_image`` or
+``thumbnail``) and stored under ``MEDIA_ROOT/covers`` as resized WebP and
+JPEG variants. File names are derived from a hash of the file contents,
+so a stored variant never changes and can be served with a far-future
+``Cache-Control``. What was built is recorded on ``Book.cover_variants``:
+
+    {
+        "source": "<remote url>",
+        "variants": {
+            "thumb": {"width": 200, "height": 300,
+                      "webp": "covers/ab/ab12….webp",
+                      "jpeg": "covers/cd/cd34….jpg"},
+            ...
+        }
+    }
+
+The ``cover_img`` template tag turns that into ``<picture>`` markup with
+a ``srcset`` and falls back to the remote URL for books not processed
+yet.
+"""
+import hashlib
+import io
+import logging
+from typing import Dict, Optional
+
+import requests
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> maximum width in pixels; retina is detail at 2x
+VARIANTS = {
+    'thumb': 200,
+    'detail': 400,
+    'retina': 800,
+}
+
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+
+_session = requests.Session()
+
+
+class CoverError(Exception):
+    """Raised when a cover cannot be fetched or decoded."""
+
+
+def source_url(book) -> Optional[str]:
+    """
+    Return the best remote cover URL of a book.
+
+    Args:
+        book: The Book instance
+
+    Returns:
+        str: Remote image URL, or None if the book has no cover
+    """
+    return book.cover_image or book.thumbnail or None
+
+
+def needs_processing(book) -> bool:
+    """Check whether a book's stored variants are missing or out of date."""
+    url = source_url(book)
+    return bool(url) and (book.cover_variants or {}).get('source') != url
+
+
+def fetch_source(url: str) -> bytes:
+    """
+    Download a remote cover image.
+
+    Args:
+        url: Image URL
+
+    Returns:
+        bytes: The image file
+
+    Raises:
+        CoverError: If the download fails or is not an image
+    """
+    # Google serves covers over plain HTTP in older API responses
+    if url.startswith('http://books.google.'):
+        url = 'https://' + url[len('http://'):]
+    try:
+        response = _session.get(url, timeout=10, stream=True)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        raise CoverError(f"Could not fetch {url}: {e}")
+
+    if not response.headers.get('Content-Type', '').startswith('image/'):
+        raise CoverError(f"{url} is not an image")
+    content = response.raw.read(MAX_SOURCE_BYTES + 1, decode_content=True)
+    if len(content) > MAX_SOURCE_BYTES:
+        raise CoverError(f"{url} is larger than {MAX_SOURCE_BYTES} bytes")
+    return content
+
+
+def _store(content: bytes, extension: str) -> str:
+    """
+    Save a file under a content-hashed name, once.
+
+    Returns:
+        str: Storage path relative to MEDIA_ROOT
+    """
+    digest = hashlib.sha256(content).hexdigest()[:32]
+    name = f'covers/{digest[:2]}/{digest}.{extension}'
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+    return name
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    """Encode an RGB image as WebP or progressive JPEG."""
+    buffer = io.BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, 'WEBP', quality=80, method=6)
+    else:
+        image.save(buffer, 'JPEG', quality=82, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def build_variants(content: bytes) -> Dict:
+    """
+    Resize a cover image into every variant and store the files.
+
+    Images are never upscaled, so a small source yields variants of the
+    source size (which then share files, as their contents are equal).
+
+    Args:
+        content: The source image file
+
+    Returns:
+        dict: Variant name -> width, height and WebP/JPEG storage paths
+
+    Raises:
+        CoverError: If the image cannot be decoded
+    """
+    try:
+        source = Image.open(io.BytesIO(content))
+        source = ImageOps.exif_transpose(source)
+        if source.mode in ('RGBA', 'LA', 'P'):
+            source = source.convert('RGBA')
+            background = Image.new('RGB', source.size, (255, 255, 255))
+            background.paste(source, mask=source.getchannel('A'))
+            source = background
+        else:
+            source = source.convert('RGB')
+    except (OSError, Image.DecompressionBombError) as e:
+        raise CoverError(f"Could not decode image: {e}")
+
+    variants = {}
+    for name, max_width in VARIANTS.items():
+        image = source
+        if source.width > max_width:
+            height = round(source.height * max_width / source.width)
+            image = source.resize((max_width, height), Image.LANCZOS)
+        variants[name] = {
+            'width': image.width,
+            'height': image.height,
+            'webp': _store(_encode(image, 'webp'), 'webp'),
+            'jpeg': _store(_encode(image, 'jpeg'), 'jpg'),
+        }
+    return variants
+
+
+def process_cover(book, force: bool = False) -> bool:
+    """
+    Fetch a book's cover and store its variants on the book.
+
+    The book row is written with ``update()`` to avoid reindexing it;
+    callers should bump the ``books`` cache namespace when done.
+
+    Args:
+        book: The Book instance
+        force: Rebuild even if the stored variants are current
+
+    Returns:
+        bool: True if new variants were stored
+
+    Raises:
+        CoverError: If the cover cannot be fetched or decoded
+    """
+    if not force and not needs_processing(book):
+        return False
+    url = source_url(book)
+    if not url:
+        return False
+
+    variants = build_variants(fetch_source(url))
+    book.cover_variants = {'source': url, 'variants': variants}
+    type(book).objects.filter(pk=book.pk).update(cover_variants=book.cover_variants)
+    return True
+
+
+def cover_url(path: str) -> str:
+    """Return the URL of a stored cover file, served by ``cover_file``."""
+    return reverse('books:cover_file', args=[path[len('covers/'):]])
@@ -0,0 +1,182 @@
+"""
+Disk-backed HTTP response cache for external API calls.
+
+Responses are stored as JSON in a small SQLite database keyed by a hash
+of the URL and query parameters. Entries expire after a TTL, and the
+least recently used entries are evicted once the cache grows past its
+size limit. Each thread uses its own SQLite connection, so the cache can
+be shared by the concurrent fetchers of the import pipeline.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+
+def cache_key(url: str, params: Dict, ignore=('key',)) -> str:
+    """
+    Build a cache key from a URL and its query parameters.
+
+    Args:
+        url: Request URL without query string
+        params: Query parameters
+        ignore: Parameters left out of the key, such as API keys
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    items = sorted(
+        (str(name), str(value)) for name, value in params.items()
+        if name not in ignore
+    )
+    return hashlib.sha256(json.dumps([url, items]).encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite store of JSON responses with TTL and LRU eviction.
+    """
+
+    def __init__(self, path: str, ttl: int = 86400, max_entries: int = 5000):
+        """
+        Configure the cache; the database is opened on first use.
+
+        Args:
+            path: SQLite database file
+            ttl: Seconds a response stays valid
+            max_entries: Number of responses kept before eviction
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the schema if needed."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Return a cached response, or None if missing or expired.
+
+        Args:
+            key: Key from ``cache_key``
+
+        Returns:
+            Decoded JSON response or None
+        """
+        now = time.time()
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                'SELECT body FROM responses WHERE key = ? AND created > ?',
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    'UPDATE responses SET accessed = ? WHERE key = ?', (now, key)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache read failed: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, key: str, url: str, body: Dict):
+        """
+        Store a response, evicting old entries periodically.
+
+        Args:
+            key: Key from ``cache_key``
+            url: Request URL, kept for inspection
+            body: JSON-serialisable response
+        """
+        now = time.time()
+        try:
+            connection = self._connection()
+            connection.execute(
+                'INSERT OR REPLACE INTO responses (key, url, body, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, url, json.dumps(body), now, now),
+            )
+            with self._lock:
+                self._writes += 1
+                evict = self._writes % 100 == 1
+            if evict:
+                self.evict()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def evict(self):
+        """Delete expired entries and trim the cache to ``max_entries``."""
+        connection = self._connection()
+        connection.execute(
+            'DELETE FROM responses WHERE created <= ?', (time.time() - self.ttl,)
+        )
+        connection.execute(
+            'DELETE FROM responses WHERE key IN ('
+            'SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        """Remove every cached response and reset the counters."""
+        self._connection().execute('DELETE FROM responses')
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        """
+        Return hit/miss counters and the number of stored responses.
+
+        Returns:
+            dict: hits, misses, hit_rate and entries
+        """
+        try:
+            entries = self._connection().execute(
+                'SELECT COUNT(*) FROM responses'
+            ).fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+        }
@@ -0,0 +1,72 @@
+"""
+Management command to fetch book covers and store resized local variants
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from bookstore_project.cache import bump_namespace
+from books.covers import CoverError, needs_processing, process_cover
+from books.models import Book
+
+
+class Command(BaseCommand):
+    help = 'Fetch remote book covers once and store WebP/JPEG variants under MEDIA_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild variants even for covers that are up to date'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of covers fetched concurrently (default: 4)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Process at most this many books'
+        )
+
+    def handle(self, *args, **options):
+        books = Book.objects.exclude(
+            Q(cover_image__isnull=True) | Q(cover_image=''),
+            Q(thumbnail__isnull=True) | Q(thumbnail=''),
+        ).only('id', 'title', 'cover_image', 'thumbnail', 'cover_variants')
+        pending = [
+            book for book in books.iterator()
+            if options['force'] or needs_processing(book)
+        ][:options['limit']]
+
+        self.stdout.write(f'Processing {len(pending)} covers')
+        started = time.perf_counter()
+
+        def build(book):
+            try:
+                return process_cover(book, force=options['force']), None
+            except CoverError as e:
+                return False, f'{book.title}: {e}'
+            finally:
+                connection.close()
+
+        built = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for stored, error in pool.map(build, pending):
+                if stored:
+                    built += 1
+                elif error:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(error))
+
+        if built:
+            bump_namespace('books')
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {built} covers, {failed} failed '
+            f'in {time.perf_counter() - started:.2f}s.'
+        ))
@@ -0,0 +1,38 @@
+"""
+Management command to write the sharded, gzip-compressed sitemap files
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from bookstore_project.db_router import read_from_replica
+from bookstore_project.sitemaps import generate_sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Write the sitemap index and regenerate shards whose books changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rewrite every shard and rebalance the shard ranges'
+        )
+        parser.add_argument(
+            '--shard-size',
+            type=int,
+            default=None,
+            help='Target number of books per shard (default: SITEMAP_SHARD_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        # Only reads the catalogue, so the replica can serve it if there is one
+        with read_from_replica():
+            result = generate_sitemaps(
+                force=options['force'], size=options['shard_size']
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['books']} books in {result['shards']} shards: "
+            f"{result['written']} written, {result['removed']} removed "
+            f"in {time.perf_counter() - started:.2f}s."
+        ))
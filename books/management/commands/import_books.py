@@ -2,11 +2,9 @@
 Management command to import books from Google Books API
 """
 
-from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
+from django.core.management.base import BaseCommand
+from books.importer import ImportStats, fetch_volumes, import_volumes
 from books.services import google_books_api
-from books.models import Book, Author, Category
-from django.utils.text import slugify
 from decimal import Decimal
 import logging
 
@@ -33,122 +31,64 @@ class Command(BaseCommand):
             default=19.99,
             help='Default price for books without price data (default: 19.99)'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of concurrent API page fetchers (default: 4)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per bulk insert (default: 500)'
+        )
 
     def handle(self, *args, **options):
         query = options['query']
-        max_results = options['max_results']
         default_price = Decimal(str(options['default_price']))
+        stats = ImportStats()
 
         self.stdout.write(
             self.style.SUCCESS(f'Importing books for query: "{query}"')
         )
 
-        # Search for books
-        results = google_books_api.search_books(query, max_results=max_results)
+        # Fetch result pages concurrently
+        items = fetch_volumes(
+            query,
+            options['max_results'],
+            workers=options['workers'],
+            stats=stats,
+        )
         
-        if not results.get('items'):
+        if not items:
             self.stdout.write(
                 self.style.WARNING('No books found for the given query.')
             )
             return
 
-        imported_count = 0
-        skipped_count = 0
-
-        for book_item in results['items']:
-            try:
-                with transaction.atomic():
-                    book_data = google_books_api.extract_book_data(book_item)
-                    
-                    # Skip if no title
-                    if not book_data['title']:
-                        skipped_count += 1
-                        continue
-                    
-                    # Check if book already exists
-                    if Book.objects.filter(google_books_id=book_data['google_books_id']).exists():
-                        self.stdout.write(f"Skipping existing book: {book_data['title']}")
-                        skipped_count += 1
-                        continue
-                    
-                    # Create or get authors
-                    authors = []
-                    for author_name in book_data['authors']:
-                        author, created = Author.objects.get_or_create(
-                            name=author_name,
-                            defaults={'biography': f'Author of {book_data["title"]}'}
-                        )
-                        authors.append(author)
-                    
-                    # Create or get categories
-                    categories = []
-                    for category_name in book_data['categories']:
-                        category, created = Category.objects.get_or_create(
-                            name=category_name,
-                            defaults={'slug': slugify(category_name)}
-                        )
-                        categories.append(category)
-                    
-                    # Create book
-                    book = Book.objects.create(
-                        google_books_id=book_data['google_books_id'],
-                        title=book_data['title'],
-                        subtitle=book_data['subtitle'],
-                        publisher=book_data['publisher'],
-                        published_date=self._parse_date(book_data['published_date']),
-                        description=book_data['description'],
-                        page_count=book_data['page_count'],
-                        language=book_data['language'],
-                        isbn_10=book_data['isbn_10'],
-                        isbn_13=book_data['isbn_13'],
-                        thumbnail=book_data['thumbnail'],
-                        cover_image=book_data['cover_image'],
-                        main_category=book_data['main_category'],
-                        price=Decimal(str(book_data['price'])) if book_data['price'] > 0 else default_price,
-                        stock_quantity=10,  # Default stock
-                        is_available=True,
-                        average_rating=book_data['average_rating'],
-                        ratings_count=book_data['ratings_count'],
-                    )
-                    
-                    # Add relationships
-                    book.authors.set(authors)
-                    book.categories.set(categories)
-                    
-                    self.stdout.write(f"Imported: {book.title}")
-                    imported_count += 1
-                    
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'Error importing book: {e}')
-                )
-                skipped_count += 1
+        import_volumes(
+            items,
+            default_price,
+            batch_size=options['batch_size'],
+            stats=stats,
+        )
 
+        self.stdout.write(
+            f'Fetched {stats.fetched} volumes in {stats.fetch_seconds:.2f}s, '
+            f'wrote {stats.imported} books in {stats.write_seconds:.2f}s '
+            f'({stats.authors_created} new authors, '
+            f'{stats.categories_created} new categories)'
+        )
+        cache = google_books_api.cache_stats()
+        self.stdout.write(
+            f"API response cache: {cache['hits']} hits, {cache['misses']} misses "
+            f"({cache['hit_rate']:.0%}), {cache['entries']} stored"
+        )
         self.stdout.write(
             self.style.SUCCESS(
-                f'Import completed! Imported: {imported_count}, Skipped: {skipped_count}'
+                f'Import completed! Imported: {stats.imported}, '
+                f'Skipped: {stats.skipped} '
+                f'({stats.books_per_second:.1f} books/s)'
             )
         )
-
-    def _parse_date(self, date_string):
-        """Parse various date formats from Google Books"""
-        if not date_string:
-            return None
-        
-        try:
-            # Try different date formats
-            from datetime import datetime
-            
-            # Try YYYY-MM-DD
-            if len(date_string) == 10:
-                return datetime.strptime(date_string, '%Y-%m-%d').date()
-            # Try YYYY-MM
-            elif len(date_string) == 7:
-                return datetime.strptime(date_string + '-01', '%Y-%m-%d').date()
-            # Try YYYY
-            elif len(date_string) == 4:
-                return datetime.strptime(date_string + '-01-01', '%Y-%m-%d').date()
-        except:
-            pass
-        
-        return None
\ No newline at end of file
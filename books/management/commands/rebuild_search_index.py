@@ -0,0 +1,30 @@
+"""
+Management command to rebuild the catalogue full-text search index
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from books.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for all books'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of books to index per batch (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f'Rebuilding search index with {backend.__class__.__name__}...')
+
+        with transaction.atomic():
+            total = backend.rebuild(batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Search index rebuilt! Indexed: {total} books')
+        )
@@ -0,0 +1,30 @@
+"""
+Management command to rebuild book rating aggregates from reviews
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from bookstore_project.cache import bump_namespace
+from books.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the rating sum, count, average and histogram of every reviewed book'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Books per bulk update (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = recompute_ratings(batch_size=options['batch_size'])
+        bump_namespace('books')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed ratings for {updated} books '
+            f'in {time.perf_counter() - started:.2f}s.'
+        ))
@@ -0,0 +1,116 @@
+from django.db import migrations
+
+
+SQLITE_CREATE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS books_book_fts USING fts5(
+    book_id UNINDEXED,
+    title,
+    authors,
+    categories,
+    description,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+POSTGRES_CREATE = """
+CREATE TABLE IF NOT EXISTS books_book_search (
+    book_id uuid PRIMARY KEY REFERENCES books_book (id)
+        ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+    document tsvector NOT NULL
+);
+CREATE INDEX IF NOT EXISTS books_book_search_document_gin
+    ON books_book_search USING GIN (document);
+"""
+
+# The indexing SQL as of this migration, run on the migrating connection
+SQLITE_INSERT = """
+INSERT INTO books_book_fts
+    (rowid, book_id, title, authors, categories, description)
+VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+POSTGRES_INSERT = """
+INSERT INTO books_book_search (book_id, document) VALUES (
+    %s,
+    setweight(to_tsvector('english', %s), 'A') ||
+    setweight(to_tsvector('english', %s), 'B') ||
+    setweight(to_tsvector('english', %s), 'C') ||
+    setweight(to_tsvector('english', %s), 'D')
+)
+ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document
+"""
+
+
+def index_row(book, vendor):
+    """Return the index row of a book: its key and weighted text fields."""
+    authors = " ".join(author.name for author in book.authors.all())
+    categories = " ".join(category.name for category in book.categories.all())
+    identifiers = " ".join(
+        value for value in (book.isbn_13, book.isbn_10, book.main_category) if value
+    )
+    fields = (
+        " ".join(value for value in (book.title, book.subtitle) if value),
+        authors,
+        f"{categories} {identifiers}".strip(),
+        book.description or "",
+    )
+    if vendor == "sqlite":
+        # FTS rowids are the top 63 bits of the UUID; IDs are stored as hex
+        return (book.pk.int >> 65, book.pk.hex, *fields)
+    return (book.pk, *fields)
+
+
+def create_search_index(apps, schema_editor):
+    """Create the vendor specific full-text index and populate it."""
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            if "ENABLE_FTS5" not in {row[0] for row in cursor.fetchall()}:
+                return
+        schema_editor.execute(SQLITE_CREATE)
+        insert = SQLITE_INSERT
+    elif connection.vendor == "postgresql":
+        schema_editor.execute(POSTGRES_CREATE)
+        insert = POSTGRES_INSERT
+    else:
+        return
+
+    # Index existing rows using the historical model and this module's
+    # SQL, so later changes to Book or books.search cannot break this
+    # migration, and on the database being migrated.
+    Book = apps.get_model("books", "Book")
+    books = (
+        Book.objects.using(connection.alias)
+        .prefetch_related("authors", "categories")
+        .order_by("pk")
+    )
+    rows = []
+    with connection.cursor() as cursor:
+        for book in books.iterator(chunk_size=500):
+            rows.append(index_row(book, connection.vendor))
+            if len(rows) >= 500:
+                cursor.executemany(insert, rows)
+                rows = []
+        if rows:
+            cursor.executemany(insert, rows)
+
+
+def drop_search_index(apps, schema_editor):
+    """Drop the full-text index tables."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS books_book_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP TABLE IF EXISTS books_book_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0004_add_review_model"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
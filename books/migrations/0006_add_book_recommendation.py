@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0005_book_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookRecommendation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rank", models.PositiveSmallIntegerField()),
+                ("score", models.FloatField()),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="neighbours",
+                        to="books.book",
+                    ),
+                ),
+                (
+                    "recommended_book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="neighbour_of",
+                        to="books.book",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Book Recommendation",
+                "verbose_name_plural": "Book Recommendations",
+                "ordering": ["book", "rank"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="bookrecommendation",
+            constraint=models.UniqueConstraint(
+                fields=("book", "rank"), name="unique_book_recommendation_rank"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0006_add_book_recommendation"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["is_available", "-created_at", "-id"],
+                name="books_book_is_avai_479c47_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="books_revie_user_id_343168_idx",
+            ),
+        ),
+    ]
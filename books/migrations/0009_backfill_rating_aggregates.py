@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:13
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    """Fill the new aggregates of reviewed books with one GROUP BY."""
+    Book = apps.get_model("books", "Book")
+    Review = apps.get_model("books", "Review")
+    fields = {stars: f"rating_{stars}_count" for stars in range(1, 6)}
+
+    rows = (
+        Review.objects.values("book_id")
+        .order_by()
+        .annotate(
+            total=Sum("rating"),
+            **{
+                field: Count("pk", filter=Q(rating=stars))
+                for stars, field in fields.items()
+            },
+        )
+    )
+    books = []
+    for row in rows:
+        book = Book(pk=row["book_id"], rating_sum=row["total"])
+        count = 0
+        for field in fields.values():
+            setattr(book, field, row[field])
+            count += row[field]
+        book.ratings_count = count
+        book.average_rating = round(row["total"] / count, 2)
+        books.append(book)
+
+    Book.objects.bulk_update(
+        books,
+        ["rating_sum", "ratings_count", "average_rating", *fields.values()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0008_book_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
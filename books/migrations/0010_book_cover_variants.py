@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0009_backfill_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="cover_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Locally stored resized cover files, see books.covers",
+            ),
+        ),
+    ]
@@ -2,9 +2,10 @@
 Database models for the books application.
 
 This module defines the data models for books, authors, categories, reviews,
-and customer communication channels like contact messages and newsletters.
+precomputed book recommendations, and customer communication channels like
+contact messages and newsletters.
 """
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 from django.core.validators import MinValueValidator, MaxValueValidator
 import uuid
@@ -76,6 +77,10 @@ class Category(models.Model):
         return reverse('books:category_detail', kwargs={'slug': self.slug})
 
 
+# Book field holding the review count for each star rating
+RATING_COUNT_FIELDS = {stars: f'rating_{stars}_count' for stars in range(1, 6)}
+
+
 class Book(models.Model):
     """
     Model representing a book.
@@ -118,6 +123,11 @@ class Book(models.Model):
         null=True, 
         help_text="Large book cover image URL"
     )
+    cover_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Locally stored resized cover files, see books.covers"
+    )
     
     # Categories and classification
     categories = models.ManyToManyField(Category, related_name='books', blank=True)
@@ -142,6 +152,14 @@ class Book(models.Model):
     )
     ratings_count = models.PositiveIntegerField(default=0)
     
+    # Running review aggregates, kept up to date by Review writes
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -157,6 +175,8 @@ class Book(models.Model):
             models.Index(fields=['isbn_13']),
             models.Index(fields=['is_featured']),
             models.Index(fields=['is_available']),
+            models.Index(fields=['is_available', '-created_at', '-id']),
+            models.Index(fields=['-created_at', '-id']),
         ]
 
     def __str__(self):
@@ -210,20 +230,17 @@ class Book(models.Model):
 
     def update_average_rating(self):
         """
-        Calculate and update average rating from book reviews.
+        Rebuild this book's rating aggregates from its reviews.
         
-        Computes the average of all ratings and updates both the average
-        rating value and the count of ratings.
+        Review writes keep the aggregates up to date incrementally, so
+        this is only needed to repair them; see ``recompute_ratings``.
         """
-        reviews = self.reviews.all()
-        if reviews:
-            total_rating = sum(review.rating for review in reviews)
-            self.average_rating = total_rating / len(reviews)
-            self.ratings_count = len(reviews)
-        else:
-            self.average_rating = 0
-            self.ratings_count = 0
-        self.save(update_fields=["average_rating", "ratings_count"])
+        from .ratings import recompute_ratings
+        recompute_ratings(book_ids=[self.pk])
+        self.refresh_from_db(fields=[
+            'average_rating', 'ratings_count', 'rating_sum',
+            *RATING_COUNT_FIELDS.values(),
+        ])
 
     @property
     def star_display(self):
@@ -271,6 +288,43 @@ class Book(models.Model):
         return None
 
 
+class BookRecommendation(models.Model):
+    """
+    Precomputed related-book neighbour.
+    
+    Stores the top-N most similar books for each book, blending
+    co-purchase similarity with author and category overlap. Rows are
+    rebuilt by the ``build_recommendations`` management command so the
+    book detail page can fetch neighbours with a single indexed lookup.
+    """
+    book = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='neighbours'
+    )
+    recommended_book = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='neighbour_of'
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        """Meta options for the BookRecommendation model."""
+        ordering = ['book', 'rank']
+        verbose_name = "Book Recommendation"
+        verbose_name_plural = "Book Recommendations"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['book', 'rank'], name='unique_book_recommendation_rank'
+            ),
+        ]
+
+    def __str__(self):
+        """Return string representation of the recommendation."""
+        return f"{self.book_id} #{self.rank} -> {self.recommended_book_id}"
+
 
 class ContactMessage(models.Model):
     """
@@ -361,11 +415,67 @@ class Review(models.Model):
         """Meta options for the Review model."""
         unique_together = ('book', 'user')  # One review per user per book
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         """Return string representation of the review."""
         return f'{self.user.username} - {self.book.title} ({self.rating}⭐)'
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the stored book and rating of a loaded review.
+        
+        ``save`` uses them to move the review between the book's rating
+        aggregates without re-reading the old row. If either field was
+        deferred nothing is remembered, and ``save`` reads the old row.
+        """
+        instance = super().from_db(db, field_names, values)
+        stored = dict(zip(field_names, values))
+        if 'book_id' in stored and 'rating' in stored:
+            instance._stored_rating = (stored['book_id'], stored['rating'])
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """
+        Save the review and update the book's rating aggregates.
+        
+        The aggregates are adjusted with ``F()`` expressions in the same
+        transaction as the review write, so the cost does not grow with
+        the number of reviews. Deletions are handled by a signal so that
+        cascades are covered too.
+        
+        Args:
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments
+        """
+        from .ratings import apply_rating_change
+        
+        if self._state.adding:
+            previous = (None, None)
+        elif hasattr(self, '_stored_rating'):
+            previous = self._stored_rating
+        else:
+            previous = Review.objects.filter(pk=self.pk).values_list(
+                'book_id', 'rating'
+            ).first() or (None, None)
+        current = (self.book_id, self.rating)
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if previous[0] == self.book_id:
+                if previous[1] != self.rating:
+                    apply_rating_change(
+                        self.book_id, added=self.rating, removed=previous[1]
+                    )
+            else:
+                if previous[0] is not None:
+                    apply_rating_change(previous[0], removed=previous[1])
+                apply_rating_change(self.book_id, added=self.rating)
+        self._stored_rating = current
+    
     @property
     def star_display(self):
         """
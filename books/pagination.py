@@ -0,0 +1,449 @@
+"""
+Pagination helpers for catalogue listings.
+
+This module provides a paginator with a cached total count, one that
+estimates the size of large unfiltered tables (for admin change lists),
+and an opt-in keyset (cursor) paginator. Cursor pages expose the same interface
+as Django's ``Page`` objects, so the existing listing templates keep
+working: their next/previous links simply carry an opaque cursor token
+in the ``page`` parameter instead of a page number.
+"""
+import base64
+import hashlib
+import json
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import EmptyPage, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from bookstore_project.cache import make_key
+
+CURSOR_PREFIX = 'c'
+
+
+def cached_count(queryset, timeout: int = None) -> int:
+    """
+    Return ``queryset.count()``, cached by the SQL of the query.
+
+    Listing totals only need to be approximately current, so the COUNT
+    over the filtered join is reused for PAGINATION_COUNT_CACHE_TIMEOUT
+    seconds instead of running on every page view. Keys live in the
+    ``books`` cache namespace, so catalogue changes invalidate them.
+
+    Args:
+        queryset: QuerySet to count
+        timeout: Cache lifetime in seconds
+
+    Returns:
+        int: Number of rows in the queryset
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 60)
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    digest = hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()
+    key = make_key('books', 'count', digest)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Django paginator whose total count is cached.
+
+    Page slicing still uses OFFSET, but the COUNT(*) that Django runs on
+    every request is served from the cache.
+    """
+
+    @cached_property
+    def count(self):
+        """Return the cached total number of objects."""
+        if hasattr(self.object_list, 'query'):
+            return cached_count(self.object_list)
+        return len(self.object_list)
+
+
+def estimated_count(queryset):
+    """
+    Return the database's estimate of the number of rows in a table.
+
+    Uses planner statistics, so it costs a catalogue lookup instead of
+    a scan: ``pg_class.reltuples`` on PostgreSQL, ``information_schema``
+    on MySQL and ``sqlite_stat1`` (written by ANALYZE) on SQLite.
+
+    Args:
+        queryset: QuerySet whose model's table is estimated
+
+    Returns:
+        int: Estimated row count, or None if no estimate is available
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+    elif connection.vendor == 'mysql':
+        sql = (
+            'SELECT table_rows FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s'
+        )
+    elif connection.vendor == 'sqlite':
+        sql = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1'
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    # sqlite_stat1.stat starts with the table's row count
+    estimate = int(str(row[0]).split()[0])
+    # PostgreSQL reports -1 for tables that were never analysed
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(CachedCountPaginator):
+    """
+    Cached-count paginator that estimates the size of large tables.
+
+    Admin change lists count the whole table on every page view. When
+    the list is unfiltered and the database estimates at least
+    ADMIN_ESTIMATED_COUNT_THRESHOLD rows, that estimate is used instead.
+    Planner statistics can be above or below the real row count, so a
+    page past the real end (or past the estimated end) falls back to
+    the cached exact count and serves the real last page rather than an
+    empty or invalid one. Smaller or filtered lists use the exact count.
+    """
+
+    # Cleared once a page shows the estimate cannot be trusted
+    allow_estimate = True
+
+    @cached_property
+    def count(self):
+        """Return the estimated or cached total number of objects."""
+        query = getattr(self.object_list, 'query', None)
+        if self.allow_estimate and query is not None and not query.where:
+            estimate = estimated_count(self.object_list)
+            threshold = getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000)
+            if estimate is not None and estimate >= threshold:
+                return estimate
+        return super().count
+
+    def page(self, number):
+        """
+        Return a page, clamped to the real last page if the estimate is off.
+
+        Args:
+            number: 1-based page number
+
+        Returns:
+            Page: The requested page, or the last non-empty one
+        """
+        if not self.allow_estimate:
+            return super().page(number)
+        try:
+            page = super().page(number)
+        except EmptyPage:
+            # The estimate may be below the real count
+            self._use_exact_count()
+            return super().page(number)
+        if page.number > 1 and not page.object_list:
+            self._use_exact_count()
+            return super().page(min(page.number, self.num_pages))
+        return page
+
+    def _use_exact_count(self):
+        """Drop the estimate so count and num_pages use the exact count."""
+        self.allow_estimate = False
+        self.__dict__.pop('count', None)
+        self.__dict__.pop('num_pages', None)
+
+
+def encode_cursor(values, direction: str, number: int) -> str:
+    """
+    Encode an ordering position into an opaque URL-safe token.
+
+    Args:
+        values: Ordering field values of the boundary row
+        direction: 'next' for rows after the boundary, 'prev' for before
+        number: Page number of the page the cursor leads to
+
+    Returns:
+        str: Cursor token
+    """
+    payload = json.dumps(
+        {'v': [str(value) for value in values], 'd': direction, 'n': number},
+        separators=(',', ':'),
+    )
+    token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+    return CURSOR_PREFIX + token
+
+
+def decode_cursor(token: str):
+    """
+    Decode a cursor token.
+
+    Args:
+        token: Token produced by ``encode_cursor``
+
+    Returns:
+        tuple: (values, direction, number)
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    if not token or not token.startswith(CURSOR_PREFIX):
+        raise ValueError('Not a cursor token')
+    data = token[len(CURSOR_PREFIX):]
+    data += '=' * (-len(data) % 4)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(data.encode()))
+        values, direction, number = payload['v'], payload['d'], int(payload['n'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f'Invalid cursor: {e}')
+    if direction not in ('next', 'prev') or number < 1:
+        raise ValueError('Invalid cursor')
+    return values, direction, number
+
+
+def is_cursor(token) -> bool:
+    """Return True if the page parameter looks like a cursor token."""
+    return bool(token) and str(token).startswith(CURSOR_PREFIX)
+
+
+class CursorPaginator:
+    """
+    Keyset paginator ordered on a unique tuple of fields.
+
+    Instead of ``OFFSET`` each page is fetched with a range condition on
+    the ordering fields of the previous page's boundary row, so deep
+    pages cost the same as the first one. The total count is cached.
+    """
+
+    def __init__(self, queryset, per_page: int, ordering=('-created_at', '-id')):
+        """
+        Initialise the paginator.
+
+        Args:
+            queryset: QuerySet to paginate
+            per_page: Number of objects per page
+            ordering: Ordering fields; the last one must be unique
+        """
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+
+    @cached_property
+    def count(self):
+        """Return the cached total number of objects."""
+        return cached_count(self.queryset)
+
+    @property
+    def num_pages(self):
+        """Return the total number of pages."""
+        return max(1, math.ceil(self.count / self.per_page))
+
+    def _boundary_filter(self, values, after: bool):
+        """Build the keyset condition for rows after/before a boundary."""
+        model = self.queryset.model
+        values = [
+            model._meta.get_field(field).to_python(value)
+            for field, value in zip(self.fields, values)
+        ]
+        condition = Q()
+        for position, ordering_field in enumerate(self.ordering):
+            field = self.fields[position]
+            descending = ordering_field.startswith('-')
+            lookup = 'lt' if descending == after else 'gt'
+            clause = Q(**{f'{field}__{lookup}': values[position]})
+            for previous in range(position):
+                clause &= Q(**{self.fields[previous]: values[previous]})
+            condition |= clause
+        return condition
+
+    def _reversed_ordering(self):
+        """Return the ordering with every direction flipped."""
+        return [
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        ]
+
+    def _values(self, obj):
+        """Return the ordering field values of an object."""
+        return [getattr(obj, field) for field in self.fields]
+
+    def forward(self, token=None):
+        """
+        Return the ordered rows after a cursor, without fetching them.
+
+        Lets callers slice and iterate the rows themselves, e.g. to
+        stream a large page. Only 'next' cursors are accepted.
+
+        Args:
+            token: Cursor token from ``cursor_after``, or None for the start
+
+        Returns:
+            tuple: (ordered queryset, page number)
+
+        Raises:
+            ValueError: If the token is malformed or not a 'next' cursor
+        """
+        if not token:
+            return self.queryset.order_by(*self.ordering), 1
+        values, direction, number = decode_cursor(token)
+        if direction != 'next' or len(values) != len(self.fields):
+            raise ValueError('Invalid cursor')
+        try:
+            queryset = self.queryset.filter(self._boundary_filter(values, after=True))
+        except (ValidationError, TypeError) as e:
+            raise ValueError(f'Invalid cursor: {e}')
+        return queryset.order_by(*self.ordering), number
+
+    def cursor_after(self, obj, number: int) -> str:
+        """Return the 'next' cursor token for the rows following ``obj``."""
+        return encode_cursor(self._values(obj), 'next', number)
+
+    def page(self, token=None):
+        """
+        Return the page identified by a cursor token.
+
+        Missing or invalid tokens return the first page.
+
+        Args:
+            token: Cursor token from a previous page's links
+
+        Returns:
+            CursorPage: The requested page
+        """
+        try:
+            values, direction, number = decode_cursor(token)
+            if len(values) != len(self.fields):
+                raise ValueError('Invalid cursor')
+            boundary = self._boundary_filter(values, after=direction == 'next')
+        except (ValidationError, ValueError, TypeError):
+            values, direction, number = None, 'next', 1
+
+        if values is None:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            return CursorPage(self, rows[:self.per_page], 1, has_next=has_more,
+                              has_previous=False)
+
+        queryset = self.queryset.filter(boundary)
+        if direction == 'next':
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            return CursorPage(self, rows[:self.per_page], number, has_next=has_more,
+                              has_previous=True)
+
+        rows = list(queryset.order_by(*self._reversed_ordering())[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return CursorPage(self, rows, number, has_next=True,
+                          has_previous=has_more and number > 1)
+
+
+class CursorPage:
+    """
+    A page of results from ``CursorPaginator``.
+
+    Mirrors the parts of Django's ``Page`` API used by the templates.
+    ``next_page_number`` and ``previous_page_number`` return cursor
+    tokens, except that the link back to page one is a plain ``1``.
+    """
+
+    def __init__(self, paginator, object_list, number, has_next, has_previous):
+        """Create a page from already fetched objects."""
+        self.paginator = paginator
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next and bool(object_list)
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Cursor page {self.number}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        """Return True if there is a following page."""
+        return self._has_next
+
+    def has_previous(self):
+        """Return True if there is a preceding page."""
+        return self._has_previous
+
+    def has_other_pages(self):
+        """Return True if there is a preceding or following page."""
+        return self._has_next or self._has_previous
+
+    def next_page_number(self):
+        """Return the cursor token for the following page."""
+        last = self.object_list[-1]
+        return encode_cursor(self.paginator._values(last), 'next', self.number + 1)
+
+    def previous_page_number(self):
+        """Return the cursor token (or 1) for the preceding page."""
+        if self.number <= 2:
+            return 1
+        first = self.object_list[0]
+        return encode_cursor(self.paginator._values(first), 'prev', self.number - 1)
+
+    def start_index(self):
+        """Return the 1-based index of the first object on this page."""
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        """Return the 1-based index of the last object on this page."""
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+
+def paginate(request, queryset, per_page: int, cursor_ordering=None):
+    """
+    Paginate a listing queryset for a view.
+
+    When CATALOG_CURSOR_PAGINATION is enabled and the view supplies a
+    keyset ordering, the first page and every cursor link use keyset
+    pagination. Plain page numbers (e.g. the "Last" link) still work
+    through the offset paginator, whose count is cached either way.
+
+    Args:
+        request: The HTTP request object
+        queryset: QuerySet to paginate
+        per_page: Number of objects per page
+        cursor_ordering: Unique ordering for keyset pagination, or None
+            if the queryset has a custom order (e.g. search ranking)
+
+    Returns:
+        Page or CursorPage: The requested page
+    """
+    page = request.GET.get('page')
+    use_cursor = cursor_ordering and getattr(settings, 'CATALOG_CURSOR_PAGINATION', False)
+    if use_cursor and (not page or page == '1' or is_cursor(page)):
+        return CursorPaginator(queryset, per_page, cursor_ordering).page(page)
+    if cursor_ordering:
+        queryset = queryset.order_by(*cursor_ordering)
+    return CachedCountPaginator(queryset, per_page).get_page(page)
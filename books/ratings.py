@@ -0,0 +1,128 @@
+"""
+Book rating aggregates.
+
+Each book stores the sum of its review ratings and a per-star histogram
+(``rating_1_count`` … ``rating_5_count``), from which ``ratings_count``
+and ``average_rating`` are derived. Review writes adjust them with
+``F()`` expressions via ``apply_rating_change``, so submitting a review
+costs the same on a title with thousands of reviews as on a new one.
+``recompute_ratings`` rebuilds them from the reviews table with a single
+``GROUP BY``.
+
+Books without local reviews keep the rating imported from Google Books
+until their first review arrives.
+"""
+import logging
+from functools import reduce
+from operator import add
+from typing import Iterable, Optional
+
+from django.db.models import (
+    Case, Count, Exists, ExpressionWrapper, F, FloatField, OuterRef, Q, Sum, When,
+)
+from django.db.models.functions import Cast
+
+from .models import RATING_COUNT_FIELDS, Book, Review
+
+logger = logging.getLogger(__name__)
+
+
+def apply_rating_change(
+    book_id, added: Optional[int] = None, removed: Optional[int] = None
+) -> None:
+    """
+    Move a book's rating aggregates by one review.
+
+    Runs two single-row updates: the first adjusts the sum and the
+    histogram, the second derives the count and average from them.
+    Call it in the same transaction as the review write.
+
+    Args:
+        book_id: Primary key of the reviewed book
+        added: Rating of a review that was created or changed to
+        removed: Rating of a review that was deleted or changed from
+    """
+    changes = {}
+    delta = 0
+    if removed is not None:
+        field = RATING_COUNT_FIELDS[removed]
+        changes[field] = F(field) - 1
+        delta -= removed
+    if added is not None:
+        field = RATING_COUNT_FIELDS[added]
+        changes[field] = changes.get(field, F(field)) + 1
+        delta += added
+    if not changes:
+        return
+
+    books = Book.objects.filter(pk=book_id)
+    books.update(rating_sum=F('rating_sum') + delta, **changes)
+
+    count = reduce(add, (F(field) for field in RATING_COUNT_FIELDS.values()))
+    average = ExpressionWrapper(
+        Cast('rating_sum', FloatField()) / count, output_field=FloatField()
+    )
+    books.update(
+        ratings_count=count,
+        average_rating=Case(
+            When(rating_sum__gt=0, then=average),
+            default=0.0,
+            output_field=FloatField(),
+        ),
+    )
+
+
+def recompute_ratings(book_ids: Optional[Iterable] = None, batch_size: int = 500) -> int:
+    """
+    Rebuild rating aggregates from the reviews table.
+
+    All reviewed books are aggregated with one ``GROUP BY`` query and
+    written back with ``bulk_update``. Books whose aggregates say they
+    have reviews but no longer do are reset.
+
+    Args:
+        book_ids: Limit the rebuild to these books (default: all books)
+        batch_size: Rows per bulk update
+
+    Returns:
+        int: Number of books updated
+    """
+    reviews = Review.objects.all()
+    stale = Book.objects.filter(rating_sum__gt=0)
+    if book_ids is not None:
+        book_ids = list(book_ids)
+        reviews = reviews.filter(book_id__in=book_ids)
+        stale = stale.filter(pk__in=book_ids)
+
+    rows = reviews.values('book_id').order_by().annotate(
+        total=Sum('rating'),
+        **{
+            field: Count('pk', filter=Q(rating=stars))
+            for stars, field in RATING_COUNT_FIELDS.items()
+        },
+    )
+
+    books = []
+    for row in rows:
+        book = Book(pk=row['book_id'], rating_sum=row['total'])
+        count = 0
+        for field in RATING_COUNT_FIELDS.values():
+            setattr(book, field, row[field])
+            count += row[field]
+        book.ratings_count = count
+        book.average_rating = round(row['total'] / count, 2)
+        books.append(book)
+
+    Book.objects.bulk_update(
+        books,
+        ['rating_sum', 'ratings_count', 'average_rating', *RATING_COUNT_FIELDS.values()],
+        batch_size=batch_size,
+    )
+
+    reset = stale.filter(~Exists(Review.objects.filter(book=OuterRef('pk')))).update(
+        rating_sum=0, ratings_count=0, average_rating=0,
+        **{field: 0 for field in RATING_COUNT_FIELDS.values()},
+    )
+
+    logger.info(f"Recomputed ratings for {len(books)} books, reset {reset}")
+    return len(books) + reset
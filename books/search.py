@@ -0,0 +1,506 @@
+"""
+Full-text search backends for the books application.
+
+This module provides a pluggable inverted-index search over the book
+catalogue. SQLite databases use an FTS5 virtual table and PostgreSQL
+databases use a tsvector column with a GIN index. Any other database
+falls back to the original ``icontains`` lookups.
+
+The index is kept in sync by the signal handlers in ``books.signals``
+and can be rebuilt with the ``rebuild_search_index`` management command.
+"""
+import logging
+import re
+from typing import Iterable, List
+
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Book
+from .pagination import cached_count
+
+logger = logging.getLogger(__name__)
+
+SQLITE_TABLE = 'books_book_fts'
+POSTGRES_TABLE = 'books_book_search'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize_query(query: str) -> List[str]:
+    """
+    Split a user query into safe search terms.
+
+    Args:
+        query: Raw search string entered by the user
+
+    Returns:
+        List of lowercase word tokens with punctuation removed
+    """
+    return [token.lower() for token in TOKEN_RE.findall(query or '')]
+
+
+def build_document(book: Book) -> dict:
+    """
+    Build the indexed text fields for a book.
+
+    Uses prefetched authors and categories when available so that
+    bulk indexing does not issue a query per book.
+
+    Args:
+        book: Book instance to index
+
+    Returns:
+        Dictionary of weighted text fields for the search index
+    """
+    authors = ' '.join(author.name for author in book.authors.all())
+    categories = ' '.join(category.name for category in book.categories.all())
+    identifiers = ' '.join(
+        value for value in (book.isbn_13, book.isbn_10, book.main_category) if value
+    )
+    return {
+        'title': ' '.join(value for value in (book.title, book.subtitle) if value),
+        'authors': authors,
+        'categories': f'{categories} {identifiers}'.strip(),
+        'description': book.description or '',
+    }
+
+
+class BaseSearchBackend:
+    """
+    Interface shared by all catalogue search backends.
+
+    Backends return book primary keys ordered by relevance and are
+    responsible for keeping their own index up to date.
+    """
+
+    vendor = None
+
+    def search(self, query: str, limit: int = None, offset: int = 0,
+               within=None) -> List:
+        """
+        Return book IDs matching the query, best match first.
+
+        Args:
+            query: Search query string
+            limit: Maximum number of IDs to return
+            offset: Number of ranked matches to skip
+            within: Book queryset the matches must belong to
+
+        Returns:
+            List of Book primary keys ordered by rank
+        """
+        raise NotImplementedError
+
+    def match_sql(self, query: str):
+        """
+        Build a subquery selecting the IDs of every book matching the query.
+
+        Args:
+            query: Search query string
+
+        Returns:
+            Tuple of SQL and parameters, or None if the query has no terms
+        """
+        raise NotImplementedError
+
+    def matches(self, queryset, query: str):
+        """
+        Restrict a Book queryset to every search match, unranked.
+
+        Args:
+            queryset: Base Book queryset (filters are preserved)
+            query: Search query string
+
+        Returns:
+            QuerySet: Matching books in the queryset's own order
+        """
+        match = self.match_sql(query)
+        if match is None:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(*match))
+
+    def index_books(self, books: Iterable[Book]):
+        """
+        Add or refresh index entries for the given books.
+
+        Args:
+            books: Iterable of Book instances
+        """
+
+    def remove_books(self, book_ids: Iterable):
+        """
+        Remove index entries for the given book IDs.
+
+        Args:
+            book_ids: Iterable of Book primary keys
+        """
+
+    def rebuild(self, batch_size: int = 500) -> int:
+        """
+        Rebuild the whole index from the Book table.
+
+        Args:
+            batch_size: Number of books to index per batch
+
+        Returns:
+            int: Number of books indexed
+        """
+        self.clear()
+        total = 0
+        queryset = Book.objects.prefetch_related('authors', 'categories').order_by('pk')
+        batch = []
+        for book in queryset.iterator(chunk_size=batch_size):
+            batch.append(book)
+            if len(batch) >= batch_size:
+                self.index_books(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.index_books(batch)
+            total += len(batch)
+        return total
+
+    def clear(self):
+        """Remove every entry from the index."""
+
+    def filter_queryset(self, queryset, query: str):
+        """
+        Restrict a Book queryset to search matches, ordered by rank.
+
+        Args:
+            queryset: Base Book queryset (filters are preserved)
+            query: Search query string
+
+        Returns:
+            SearchResults: Matching books ordered by relevance
+        """
+        return SearchResults(self, queryset, query)
+
+
+class SearchResults:
+    """
+    Ranked search matches within a Book queryset, fetched a slice at a time.
+
+    Ranks only exist in the search index, so each slice asks the index
+    for that window of matches restricted to the queryset and then loads
+    those books. Paginators see an ordinary sequence whose length is
+    the exact number of matches, with no cap on how deep they can go.
+    """
+
+    def __init__(self, backend: BaseSearchBackend, queryset, query: str):
+        self.backend = backend
+        self.queryset = queryset
+        self.search_query = query
+
+    def count(self) -> int:
+        """Return the number of matching books."""
+        return cached_count(self.backend.matches(self.queryset, self.search_query))
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        limit = None if key.stop is None else max(key.stop - start, 0)
+        if limit == 0:
+            return []
+        book_ids = self.backend.search(
+            self.search_query, limit=limit, offset=start, within=self.queryset
+        )
+        books = {book.pk: book for book in self.queryset.filter(pk__in=book_ids)}
+        return [books[pk] for pk in book_ids if pk in books]
+
+
+def _subquery(queryset):
+    """Return the connection, SQL and parameters selecting a queryset's IDs."""
+    query = queryset.values('pk').order_by().query
+    return connections[queryset.db], *query.get_compiler(queryset.db).as_sql()
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Fallback backend using ``icontains`` lookups.
+
+    Used when the database has no supported full-text engine. It keeps
+    the original behaviour and needs no index maintenance.
+    """
+
+    def _lookup(self, query):
+        """Build the icontains condition across the searchable fields."""
+        return (
+            Q(title__icontains=query) |
+            Q(authors__name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(categories__name__icontains=query) |
+            Q(isbn_13__icontains=query)
+        )
+
+    def search(self, query, limit=None, offset=0, within=None):
+        """Return IDs of books whose fields contain the query."""
+        if not query:
+            return []
+        queryset = Book.objects.all() if within is None else within
+        book_ids = queryset.filter(
+            pk__in=Book.objects.filter(self._lookup(query)).values('pk')
+        ).values_list('pk', flat=True)
+        if limit:
+            return list(book_ids[offset:offset + limit])
+        return list(book_ids[offset:])
+
+    def matches(self, queryset, query):
+        """Restrict the queryset to books whose fields contain the query."""
+        if not query:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=Book.objects.filter(self._lookup(query)).values('pk')
+        )
+
+    def filter_queryset(self, queryset, query):
+        """Return matching books unranked, as the lookups have no score."""
+        return self.matches(queryset, query)
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    Search backend built on an SQLite FTS5 virtual table.
+
+    Each term is matched as a prefix and results are ranked with
+    BM25, weighting titles above authors, categories and descriptions.
+    """
+
+    vendor = 'sqlite'
+
+    # bm25() weights per column: book_id, title, authors, categories, description
+    WEIGHTS = (0.0, 10.0, 6.0, 3.0, 1.0)
+
+    @staticmethod
+    def rowid(book_id):
+        """
+        Derive a stable FTS rowid from a book's UUID.
+
+        FTS5 can only look rows up efficiently by integer rowid, so the
+        top 63 bits of the UUID are used to keep it a positive int64.
+        """
+        return Book._meta.pk.to_python(book_id).int >> 65
+
+    def _match_expression(self, query):
+        """Build an FTS5 MATCH expression of quoted prefix terms."""
+        return ' '.join(f'"{token}"*' for token in tokenize_query(query))
+
+    def match_sql(self, query):
+        """Select the book IDs of FTS rows matching the query."""
+        expression = self._match_expression(query)
+        if not expression:
+            return None
+        return (
+            f'SELECT book_id FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s',
+            [expression],
+        )
+
+    def search(self, query, limit=None, offset=0, within=None):
+        """Return book IDs ranked by BM25 relevance."""
+        match = self.match_sql(query)
+        if match is None:
+            return []
+        sql, params = match
+        db = connection
+        if within is not None:
+            db, subquery, subquery_params = _subquery(within)
+            sql += f' AND book_id IN ({subquery})'
+            params = [*params, *subquery_params]
+        weights = ', '.join(str(weight) for weight in self.WEIGHTS)
+        sql += f' ORDER BY bm25({SQLITE_TABLE}, {weights}), book_id'
+        if limit or offset:
+            # SQLite only accepts OFFSET after a LIMIT, where -1 means none
+            sql += ' LIMIT %s OFFSET %s'
+            params = [*params, limit or -1, offset]
+        with db.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        # Book IDs are stored as 32 character hex strings by Django on SQLite
+        return [Book._meta.pk.to_python(row[0]) for row in rows]
+
+    def index_books(self, books):
+        """Replace the FTS rows for the given books."""
+        books = list(books)
+        if not books:
+            return
+        self.remove_books([book.pk for book in books])
+        rows = []
+        for book in books:
+            document = build_document(book)
+            rows.append((
+                self.rowid(book.pk),
+                book.pk.hex,
+                document['title'],
+                document['authors'],
+                document['categories'],
+                document['description'],
+            ))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {SQLITE_TABLE} '
+                f'(rowid, book_id, title, authors, categories, description) '
+                f'VALUES (%s, %s, %s, %s, %s, %s)',
+                rows,
+            )
+
+    def remove_books(self, book_ids):
+        """Delete the FTS rows for the given book IDs."""
+        rowids = [self.rowid(pk) for pk in book_ids]
+        if not rowids:
+            return
+        placeholders = ', '.join(['%s'] * len(rowids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({placeholders})',
+                rowids,
+            )
+
+    def clear(self):
+        """Empty the FTS table."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Search backend built on a PostgreSQL tsvector column and GIN index.
+
+    Field weights A-D mirror the SQLite backend and results are
+    ordered with ``ts_rank``.
+    """
+
+    vendor = 'postgresql'
+    config = 'english'
+
+    def _tsquery(self, query):
+        """Build a to_tsquery expression of AND-ed prefix terms."""
+        return ' & '.join(f'{token}:*' for token in tokenize_query(query))
+
+    def match_sql(self, query):
+        """Select the book IDs of documents matching the query."""
+        tsquery = self._tsquery(query)
+        if not tsquery:
+            return None
+        return (
+            f'SELECT book_id FROM {POSTGRES_TABLE} '
+            f'WHERE document @@ to_tsquery(%s, %s)',
+            [self.config, tsquery],
+        )
+
+    def search(self, query, limit=None, offset=0, within=None):
+        """Return book IDs ranked by ts_rank."""
+        tsquery = self._tsquery(query)
+        if not tsquery:
+            return []
+        sql = (
+            f'SELECT book_id FROM {POSTGRES_TABLE}, '
+            f'to_tsquery(%s, %s) AS query '
+            f'WHERE document @@ query'
+        )
+        params = [self.config, tsquery]
+        db = connection
+        if within is not None:
+            db, subquery, subquery_params = _subquery(within)
+            sql += f' AND book_id IN ({subquery})'
+            params = [*params, *subquery_params]
+        sql += ' ORDER BY ts_rank(document, query) DESC, book_id'
+        if limit:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        if offset:
+            sql += ' OFFSET %s'
+            params.append(offset)
+        with db.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_books(self, books):
+        """Upsert the tsvector documents for the given books."""
+        rows = []
+        for book in books:
+            document = build_document(book)
+            rows.append((
+                book.pk,
+                self.config, document['title'],
+                self.config, document['authors'],
+                self.config, document['categories'],
+                self.config, document['description'],
+            ))
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {POSTGRES_TABLE} (book_id, document) VALUES (%s, '
+                f"setweight(to_tsvector(%s, %s), 'A') || "
+                f"setweight(to_tsvector(%s, %s), 'B') || "
+                f"setweight(to_tsvector(%s, %s), 'C') || "
+                f"setweight(to_tsvector(%s, %s), 'D')) "
+                f'ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document',
+                rows,
+            )
+
+    def remove_books(self, book_ids):
+        """Delete the tsvector documents for the given book IDs."""
+        book_ids = list(book_ids)
+        if not book_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {POSTGRES_TABLE} WHERE book_id = ANY(%s)',
+                [book_ids],
+            )
+
+    def clear(self):
+        """Empty the search table."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {POSTGRES_TABLE}')
+
+
+def sqlite_has_fts5() -> bool:
+    """
+    Check whether the SQLite library was compiled with FTS5.
+
+    Returns:
+        bool: True if FTS5 virtual tables are available
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        options = {row[0] for row in cursor.fetchall()}
+    return 'ENABLE_FTS5' in options
+
+
+_backend = None
+
+
+def get_search_backend() -> BaseSearchBackend:
+    """
+    Return the search backend matching the default database.
+
+    The backend is chosen once per process: FTS5 on SQLite, tsvector on
+    PostgreSQL and ``icontains`` lookups for anything else.
+
+    Returns:
+        BaseSearchBackend: The active search backend
+    """
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'sqlite' and sqlite_has_fts5():
+            _backend = SQLiteFTSBackend()
+        elif connection.vendor == 'postgresql':
+            _backend = PostgresSearchBackend()
+        else:
+            logger.info(
+                f"No full-text engine for '{connection.vendor}', "
+                f"using icontains search"
+            )
+            _backend = DatabaseSearchBackend()
+    return _backend
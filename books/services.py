@@ -3,13 +3,19 @@ Google Books API integration service.
 
 This module provides a service class for interacting with the Google Books API,
 allowing for book searches, retrieval by ID or ISBN, and data extraction.
+Requests share a pooled keep-alive session, and successful responses are
+kept in a disk-backed cache so repeated lookups are not re-downloaded.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
 from typing import Dict, List, Optional
 import logging
 
+from .http_cache import ResponseCache, cache_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,8 +33,67 @@ class GoogleBooksAPI:
     def __init__(self):
         """
         Initialise the API service with the API key from settings.
+        
+        Sets up a pooled HTTP session that retries transient failures and,
+        unless GOOGLE_BOOKS_CACHE_PATH is empty, a disk response cache.
         """
         self.api_key = settings.GOOGLE_BOOKS_API_KEY
+        
+        self.session = requests.Session()
+        retry = Retry(
+            total=2,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=('GET',),
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        self.session.mount('https://', adapter)
+        
+        cache_path = getattr(settings, 'GOOGLE_BOOKS_CACHE_PATH', '')
+        self.cache = ResponseCache(
+            cache_path,
+            ttl=getattr(settings, 'GOOGLE_BOOKS_CACHE_TTL', 86400),
+            max_entries=getattr(settings, 'GOOGLE_BOOKS_CACHE_MAX_ENTRIES', 5000),
+        ) if cache_path else None
+    
+    def _get(self, url: str, params: Dict) -> Dict:
+        """
+        Fetch a JSON response, using the response cache when possible.
+        
+        Args:
+            url: Request URL
+            params: Query parameters
+            
+        Returns:
+            Decoded JSON response
+            
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        key = cache_key(url, params) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        response = self.session.get(url, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        
+        if key:
+            self.cache.set(key, url, data)
+        return data
+    
+    def cache_stats(self) -> Dict:
+        """
+        Get response cache statistics.
+        
+        Returns:
+            Dictionary with hits, misses, hit rate and stored entries
+        """
+        if not self.cache:
+            return {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'entries': 0}
+        return self.cache.stats()
     
     def search_books(
         self, query: str, max_results: int = 10, start_index: int = 0
@@ -55,9 +120,7 @@ class GoogleBooksAPI:
             params['key'] = self.api_key
             
         try:
-            response = requests.get(self.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return self._get(self.BASE_URL, params)
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Google Books API request failed: {e}")
@@ -80,9 +143,7 @@ class GoogleBooksAPI:
             params['key'] = self.api_key
             
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return self._get(url, params)
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to get book {google_book_id}: {e}")
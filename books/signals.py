@@ -0,0 +1,133 @@
+"""
+Signal handlers for the books application.
+
+This module keeps derived catalogue data, such as the full-text search
+index, the typeahead index, rating aggregates and the ``books`` cache
+namespace, in sync with changes to books, authors, categories and
+reviews.
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from bookstore_project.cache import bump_namespace
+
+from .models import Author, Book, Category, Review
+from .ratings import apply_rating_change
+from .search import get_search_backend
+from .typeahead import typeahead_index
+
+
+def reindex_books(book_ids):
+    """
+    Refresh the search and typeahead index entries for the given books.
+
+    The search index is written in the current transaction; the
+    in-memory typeahead index is only updated once it commits.
+
+    Args:
+        book_ids: Iterable of Book primary keys to reindex
+    """
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+    books = Book.objects.filter(pk__in=book_ids).prefetch_related(
+        'authors', 'categories'
+    )
+    get_search_backend().index_books(books)
+    transaction.on_commit(lambda: typeahead_index.refresh(book_ids))
+
+
+@receiver(post_save, sender=Book)
+def book_saved(sender, instance, raw=False, **kwargs):
+    """Reindex a book after it is created or edited."""
+    if raw:
+        return
+    reindex_books([instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def book_deleted(sender, instance, **kwargs):
+    """Drop a deleted book from the search and typeahead indexes."""
+    get_search_backend().remove_books([instance.pk])
+    book_id = instance.pk
+    transaction.on_commit(lambda: typeahead_index.remove([book_id]))
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+@receiver(m2m_changed, sender=Book.categories.through)
+def book_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Reindex books whose authors or categories changed.
+
+    Handles both directions of the relation, e.g. ``book.authors.add()``
+    and ``author.books.add()``. For a reverse ``clear()`` the affected
+    book IDs are captured before the rows are removed.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            reindex_books([instance.pk])
+    elif action == 'pre_clear':
+        instance._search_cleared_book_ids = list(
+            instance.books.values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        reindex_books(getattr(instance, '_search_cleared_book_ids', []))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        reindex_books(pk_set)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Category)
+def related_object_saved(sender, instance, created, raw=False, **kwargs):
+    """Reindex the books of an author or category that was renamed."""
+    if raw or created:
+        return
+    reindex_books(instance.books.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Category)
+def related_object_deleting(sender, instance, **kwargs):
+    """Remember the books of an author or category about to be deleted."""
+    instance._search_book_ids = list(instance.books.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Category)
+def related_object_deleted(sender, instance, **kwargs):
+    """Reindex the books that lost a deleted author or category."""
+    reindex_books(getattr(instance, '_search_book_ids', []))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """
+    Take a deleted review out of its book's rating aggregates.
+
+    Runs inside the deletion's transaction, for direct deletes as well
+    as cascades from a deleted user.
+    """
+    apply_rating_change(instance.book_id, removed=instance.rating)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(m2m_changed, sender=Book.authors.through)
+@receiver(m2m_changed, sender=Book.categories.through)
+def invalidate_catalogue_cache(sender, raw=False, action=None, **kwargs):
+    """
+    Invalidate cached catalogue data once a change commits.
+
+    Bumping after commit stops a concurrent request from re-caching the
+    old data under the new namespace version.
+    """
+    if raw or (action is not None and not action.startswith('post_')):
+        return
+    transaction.on_commit(lambda: bump_namespace('books'))
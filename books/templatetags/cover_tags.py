@@ -0,0 +1,66 @@
+"""
+Template tags for book cover images.
+
+``cover_img`` renders a responsive ``<picture>`` for a book from its
+locally stored cover variants, offering WebP with a JPEG fallback and a
+``srcset`` of every stored width. Books whose covers have not been
+processed yet fall back to the remote cover URL.
+"""
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from books.covers import VARIANTS, cover_url, source_url
+
+register = template.Library()
+
+
+def _srcset(variants, fmt):
+    """Build a srcset of one format from the stored variants."""
+    seen = {}
+    for name in VARIANTS:
+        variant = variants.get(name)
+        if variant and variant['width'] not in seen:
+            seen[variant['width']] = cover_url(variant[fmt])
+    return ', '.join(f'{url} {width}w' for width, url in sorted(seen.items()))
+
+
+@register.simple_tag
+def cover_img(book, variant='thumb', css_class='', lazy=True):
+    """
+    Render a book cover as a responsive picture element.
+
+    Args:
+        book: The Book instance
+        variant: Display size, one of 'thumb' or 'detail'; sets the
+            ``sizes`` hint and the fallback image
+        css_class: CSS class of the ``<img>`` element
+        lazy: Whether to add ``loading="lazy"``
+
+    Returns:
+        str: Safe HTML for the cover
+    """
+    fallback = static('images/no-book-cover.png')
+    variants = (book.cover_variants or {}).get('variants') or {}
+    loading = 'lazy' if lazy else 'eager'
+
+    if variant not in variants:
+        return format_html(
+            '<img src="{}" class="{}" alt="{}" loading="{}" '
+            'onerror="this.onerror=null;this.src=\'{}\'">',
+            source_url(book) or fallback, css_class, book.title, loading,
+            fallback,
+        )
+
+    chosen = variants[variant]
+    sizes = f"{VARIANTS[variant]}px"
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" '
+        'class="{}" alt="{}" loading="{}" decoding="async">'
+        '</picture>',
+        _srcset(variants, 'webp'), sizes,
+        cover_url(chosen['jpeg']), _srcset(variants, 'jpeg'), sizes,
+        chosen['width'], chosen['height'], css_class, book.title, loading,
+    )
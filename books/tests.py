@@ -1,3 +1,167 @@
-from django.test import TestCase
+"""
+Tests for the books application.
+"""
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import Author, Book, Category, Review
+from .admin import BookAdmin
+from .pagination import EstimatedCountPaginator, encode_cursor
+from .search import DatabaseSearchBackend, get_search_backend
+
+
+@override_settings(CATALOG_CURSOR_PAGINATION=True, PAGE_CACHE_TIMEOUT=0)
+class CursorPaginationTests(TestCase):
+    """Listings must survive malformed or tampered cursor tokens."""
+
+    BAD_CURSORS = {
+        'not base64': 'c!!!not-a-cursor',
+        'bad values': encode_cursor(['not-a-date', 'not-a-uuid'], 'next', 2),
+        'bad prev values': encode_cursor(['not-a-date', 'not-a-uuid'], 'prev', 3),
+        'too few values': encode_cursor(['2024-01-01T00:00:00+00:00'], 'next', 2),
+        'too many values': encode_cursor(['a', 'b', 'c'], 'next', 2),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Test Author')
+        cls.category = Category.objects.create(name='Training', slug='training')
+        for n in range(15):
+            book = Book.objects.create(
+                title=f'Book {n}', price=Decimal('9.99'), stock_quantity=5
+            )
+            book.authors.add(cls.author)
+            book.categories.add(cls.category)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        urls = (
+            reverse('books:book_list'),
+            reverse('books:category_detail', args=[self.category.slug]),
+            reverse('books:author_detail', args=[self.author.pk]),
+        )
+        for url in urls:
+            for label, cursor in self.BAD_CURSORS.items():
+                with self.subTest(url=url, cursor=label):
+                    response = self.client.get(url, {'page': cursor})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.context['books'].number, 1)
+
+    def test_next_cursor_still_works(self):
+        first = self.client.get(reverse('books:book_list')).context['books']
+        self.assertTrue(first.has_next())
+        response = self.client.get(
+            reverse('books:book_list'), {'page': first.next_page_number()}
+        )
+        self.assertEqual(response.status_code, 200)
+        second = response.context['books']
+        self.assertEqual(second.number, 2)
+        self.assertFalse(set(book.pk for book in first) & set(book.pk for book in second))
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_estimated_count_clamps_to_real_last_page(self):
+        # Page 10 only exists by the high estimate, page 2 only by the real count
+        for estimate, number in ((100, 10), (5, 2)):
+            with self.subTest(estimate=estimate), mock.patch(
+                'books.pagination.estimated_count', return_value=estimate
+            ):
+                paginator = EstimatedCountPaginator(Book.objects.order_by('pk'), 10)
+                self.assertEqual(paginator.count, estimate)
+                page = paginator.page(number)
+                self.assertEqual((page.number, len(page)), (2, 5))
+                self.assertEqual((paginator.count, paginator.num_pages), (15, 2))
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class SearchTests(TestCase):
+    """Every search match is counted and reachable, best match first."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for n in range(30):
+            Book.objects.create(
+                title=f'Agility Book {n}', price=Decimal('9.99'), stock_quantity=5
+            )
+        Book.objects.create(
+            title='Weekend Walks', description='Ends with some agility games.',
+            price=Decimal('9.99'), stock_quantity=5,
+        )
+        Book.objects.create(
+            title='Agility Withdrawn', price=Decimal('9.99'), is_available=False,
+            google_books_id='gb123',
+        )
+        Book.objects.create(title='Obedience Basics', price=Decimal('9.99'))
+
+    def setUp(self):
+        cache.clear()
+        self.results = get_search_backend().filter_queryset(
+            Book.objects.filter(is_available=True), 'agility'
+        )
+
+    def test_every_match_is_counted(self):
+        self.assertEqual(len(self.results), 31)
+        pages = [self.results[start:start + 12] for start in range(0, 36, 12)]
+        self.assertEqual([len(page) for page in pages], [12, 12, 7])
+        titles = {book.title for page in pages for book in page}
+        self.assertEqual(len(titles), 31)
+        self.assertNotIn('Agility Withdrawn', titles)
+
+    def test_title_matches_rank_first(self):
+        if isinstance(get_search_backend(), DatabaseSearchBackend):
+            self.skipTest('icontains search has no ranking')
+        self.assertEqual(self.results[30].title, 'Weekend Walks')
+
+    def test_last_search_page(self):
+        response = self.client.get(reverse('books:book_list'), {'q': 'agility', 'page': 3})
+        books = response.context['books']
+        self.assertEqual(books.paginator.count, 31)
+        self.assertEqual(len(books), 7)
+
+    def test_admin_search_lists_every_match(self):
+        book_admin = BookAdmin(Book, site)
+        books, may_have_duplicates = book_admin.get_search_results(
+            None, Book.objects.all(), 'agility'
+        )
+        self.assertEqual(books.count(), 32)
+        self.assertFalse(may_have_duplicates)
+        books, _ = book_admin.get_search_results(None, Book.objects.all(), 'gb123')
+        self.assertEqual([book.title for book in books], ['Agility Withdrawn'])
+
+
+class ReviewRatingTests(TestCase):
+    """Saving a review keeps the book's rating aggregates exact."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            username='reader', email='reader@example.com', password='secret'
+        )
+        self.book = Book.objects.create(title='Rated Book', price=Decimal('9.99'))
+        Review.objects.create(
+            book=self.book, user=user, rating=4, title='Good', comment='Nice'
+        )
+
+    def assertRatings(self, rating_sum, ratings_count):
+        self.book.refresh_from_db()
+        self.assertEqual(
+            (self.book.rating_sum, self.book.ratings_count), (rating_sum, ratings_count)
+        )
+
+    def test_saving_a_partially_loaded_review(self):
+        review = Review.objects.only('pk', 'comment').get()
+        review.comment = 'Very nice'
+        review.save()
+        self.assertRatings(4, 1)
+
+    def test_changing_a_deferred_rating(self):
+        review = Review.objects.defer('rating').get()
+        review.rating = 5
+        review.save()
+        self.assertRatings(5, 1)
@@ -0,0 +1,282 @@
+"""
+In-memory typeahead index for live search suggestions.
+
+This module keeps a sorted token array over normalised book titles and
+author names so that ``search_ajax`` can answer prefix queries without
+touching the database. The index is built in the background by each
+worker process on its first live search (never at import, which with
+``gunicorn --preload`` would only build it in the master), and is
+refreshed incrementally by the signal handlers in ``books.signals``.
+"""
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+
+from .models import Book
+
+logger = logging.getLogger(__name__)
+
+
+def normalise(text: str) -> str:
+    """
+    Lowercase text and strip accents for prefix matching.
+
+    Args:
+        text: Text to normalise
+
+    Returns:
+        str: Accent-free lowercase text
+    """
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split normalised text into alphanumeric tokens.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens in their original order
+    """
+    tokens = []
+    current = []
+    for char in normalise(text):
+        if char.isalnum():
+            current.append(char)
+        elif current:
+            tokens.append(''.join(current))
+            current = []
+    if current:
+        tokens.append(''.join(current))
+    return tokens
+
+
+class TypeaheadIndex:
+    """
+    Prefix index over book titles and author names.
+
+    Tokens are kept in a sorted list so that every token starting with a
+    prefix can be found with a binary search. Each token maps to the set
+    of book IDs containing it, and each book keeps a ready-to-serialise
+    suggestion payload.
+    """
+
+    def __init__(self):
+        """Create an empty, cold index."""
+        self._lock = threading.RLock()
+        self._building = False
+        self.tokens: List[str] = []
+        self.postings: Dict[str, set] = {}
+        self.entries: Dict[str, dict] = {}
+        self.built_at = None
+
+    @property
+    def is_warm(self) -> bool:
+        """Return True once the index has been fully built."""
+        return self.built_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        """
+        Return True when the index is older than TYPEAHEAD_MAX_AGE.
+
+        Signals only reach the worker that made a change, so other
+        workers periodically rebuild to pick up remote edits.
+        """
+        max_age = getattr(settings, 'TYPEAHEAD_MAX_AGE', 300)
+        return self.is_warm and time.monotonic() - self.built_at > max_age
+
+    @staticmethod
+    def _entry_for(book: Book) -> dict:
+        """Build the suggestion payload and token set for a book."""
+        authors = [author.name for author in book.authors.all()]
+        title_tokens = tokenize(book.title)
+        author_tokens = [token for name in authors for token in tokenize(name)]
+        return {
+            'id': str(book.id),
+            'title': book.title,
+            'authors': ', '.join(authors),
+            'price': str(book.price),
+            'url': book.get_absolute_url(),
+            'title_key': normalise(book.title),
+            'title_tokens': frozenset(title_tokens),
+            'tokens': frozenset(title_tokens + author_tokens),
+            'popularity': book.ratings_count,
+        }
+
+    def _add(self, entry: dict):
+        """Insert an entry's tokens into the postings (lock held)."""
+        for token in entry['tokens']:
+            postings = self.postings.get(token)
+            if postings is None:
+                self.postings[token] = {entry['id']}
+                index = bisect_left(self.tokens, token)
+                self.tokens.insert(index, token)
+            else:
+                postings.add(entry['id'])
+        self.entries[entry['id']] = entry
+
+    def _discard(self, book_id: str):
+        """Remove a book's tokens from the postings (lock held)."""
+        entry = self.entries.pop(book_id, None)
+        if entry is None:
+            return
+        for token in entry['tokens']:
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(book_id)
+            if not postings:
+                del self.postings[token]
+                index = bisect_left(self.tokens, token)
+                if index < len(self.tokens) and self.tokens[index] == token:
+                    del self.tokens[index]
+
+    def build(self):
+        """
+        Build the index from every available book.
+
+        The new index is assembled off to the side and swapped in under
+        the lock so that concurrent lookups never see a partial index.
+        """
+        started = time.monotonic()
+        books = Book.objects.filter(is_available=True).prefetch_related('authors')
+        entries = {}
+        postings: Dict[str, set] = {}
+        for book in books.iterator(chunk_size=1000):
+            entry = self._entry_for(book)
+            entries[entry['id']] = entry
+            for token in entry['tokens']:
+                postings.setdefault(token, set()).add(entry['id'])
+        with self._lock:
+            self.entries = entries
+            self.postings = postings
+            self.tokens = sorted(postings)
+            self.built_at = time.monotonic()
+        logger.info(
+            f"Typeahead index built: {len(entries)} books, "
+            f"{len(postings)} tokens in {time.monotonic() - started:.2f}s"
+        )
+
+    def build_in_background(self):
+        """Start a background build unless one is already running."""
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+
+        def run():
+            try:
+                self.build()
+            except Exception as e:
+                logger.error(f"Typeahead index build failed: {e}")
+            finally:
+                from django.db import connection
+                connection.close()
+                self._building = False
+
+        threading.Thread(target=run, name='typeahead-build', daemon=True).start()
+
+    def refresh(self, book_ids: Iterable):
+        """
+        Re-read the given books and update their index entries.
+
+        Unavailable or deleted books are removed from the index.
+
+        Args:
+            book_ids: Iterable of Book primary keys to refresh
+        """
+        if not self.is_warm:
+            return
+        keys = {str(pk) for pk in book_ids}
+        if not keys:
+            return
+        books = Book.objects.filter(
+            pk__in=keys, is_available=True
+        ).prefetch_related('authors')
+        fresh = [self._entry_for(book) for book in books]
+        with self._lock:
+            for key in keys:
+                self._discard(key)
+            for entry in fresh:
+                self._add(entry)
+
+    def remove(self, book_ids: Iterable):
+        """
+        Drop the given books from the index.
+
+        Args:
+            book_ids: Iterable of Book primary keys to remove
+        """
+        with self._lock:
+            for pk in book_ids:
+                self._discard(str(pk))
+
+    def _matching_ids(self, prefix: str) -> set:
+        """Return IDs of books with any token starting with prefix."""
+        matches = set()
+        tokens = self.tokens
+        index = bisect_left(tokens, prefix)
+        while index < len(tokens) and tokens[index].startswith(prefix):
+            matches |= self.postings[tokens[index]]
+            index += 1
+        return matches
+
+    def suggest(self, query: str, limit: int = 5) -> List[dict]:
+        """
+        Return the best suggestions for a partially typed query.
+
+        Every query token must prefix-match a title or author token.
+        Results whose title starts with the query rank first, then
+        books matching more terms in the title, then popular books.
+
+        Args:
+            query: Partial search query
+            limit: Maximum number of suggestions to return
+
+        Returns:
+            List of suggestion dictionaries for JSON serialisation
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+        with self._lock:
+            # Narrow with the most selective (longest) token first
+            candidates = None
+            for token in sorted(query_tokens, key=len, reverse=True):
+                matches = self._matching_ids(token)
+                candidates = matches if candidates is None else candidates & matches
+                if not candidates:
+                    return []
+            entries = [self.entries[book_id] for book_id in candidates]
+
+        query_key = normalise(query).strip()
+
+        def rank(entry):
+            title_hits = sum(
+                1 for token in query_tokens
+                if any(word.startswith(token) for word in entry['title_tokens'])
+            )
+            return (
+                not entry['title_key'].startswith(query_key),
+                -title_hits,
+                -entry['popularity'],
+                entry['title_key'],
+            )
+
+        return [
+            {key: entry[key] for key in ('id', 'title', 'authors', 'price', 'url')}
+            for entry in heapq.nsmallest(limit, entries, key=rank)
+        ]
+
+
+typeahead_index = TypeaheadIndex()
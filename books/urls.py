@@ -6,7 +6,7 @@ detail pages, categories, authors, reviews, and various administrative functions
 It also includes development utilities for email testing and previewing.
 """
 from django.urls import path
-from . import views
+from . import api, views
 from .email_preview import preview_email_template
 from .test_email_public import test_email_public
 
@@ -25,9 +25,21 @@ urlpatterns = [
     path('category/<slug:slug>/', views.category_detail, name='category_detail'),
     path('author/<uuid:pk>/', views.author_detail, name='author_detail'),
     
+    # Locally stored cover variants
+    path('covers/<path:path>', views.cover_file, name='cover_file'),
+    
     # AJAX endpoints
     path('search/ajax/', views.search_ajax, name='search_ajax'),
     
+    # Read-only JSON API
+    path('api/books/', api.api_book_list, name='api_book_list'),
+    path('api/books/<uuid:pk>/', api.api_book_detail, name='api_book_detail'),
+    path('api/authors/', api.api_author_list, name='api_author_list'),
+    path('api/authors/<uuid:pk>/', api.api_author_detail, name='api_author_detail'),
+    path('api/categories/', api.api_category_list, name='api_category_list'),
+    path('api/categories/<slug:slug>/', api.api_category_detail,
+         name='api_category_detail'),
+    
     # Static pages
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
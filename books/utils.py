@@ -7,8 +7,11 @@ and generating book recommendations.
 """
 
 from typing import List, Dict, Optional
+from django.conf import settings
+from bookstore_project.cache import get_or_set
 from .models import Book, Author, Category
 from .services import google_books_api
+from .search import get_search_backend
 from django.db.models import Q
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
@@ -17,8 +20,9 @@ def search_books_local(query: str, page: int = 1, per_page: int = 12) -> Dict:
     """
     Search for books in the local database.
     
-    Performs a search across multiple book fields including title, author,
-    description, and category. Results are paginated for display.
+    Performs a ranked full-text search across title, author, description,
+    and category using the configured search backend. Results are
+    paginated for display.
     
     Args:
         query: Search query string
@@ -28,12 +32,10 @@ def search_books_local(query: str, page: int = 1, per_page: int = 12) -> Dict:
     Returns:
         Dictionary with search results and pagination information
     """
-    books = Book.objects.filter(
-        Q(title__icontains=query) |
-        Q(authors__name__icontains=query) |
-        Q(description__icontains=query) |
-        Q(categories__name__icontains=query)
-    ).distinct().select_related().prefetch_related('authors', 'categories')
+    books = get_search_backend().filter_queryset(
+        Book.objects.prefetch_related('authors', 'categories'),
+        query,
+    )
     
     paginator = Paginator(books, per_page)
     
@@ -46,7 +48,7 @@ def search_books_local(query: str, page: int = 1, per_page: int = 12) -> Dict:
     
     return {
         'books': books_page,
-        'has_results': books.exists(),
+        'has_results': paginator.count > 0,
         'total_count': paginator.count,
         'page_range': paginator.get_elided_page_range(books_page.number),
     }
@@ -89,6 +91,40 @@ def get_recent_books(limit: int = 8) -> List[Book]:
     ).select_related().prefetch_related('authors').order_by('-created_at')[:limit]
 
 
+def get_homepage_snapshot() -> Dict:
+    """
+    Get the homepage aggregates and book lists from the cache.
+    
+    The site counts, featured books, recent books and category list are
+    each cached as a precomputed snapshot in the ``books`` namespace,
+    which is invalidated by catalogue changes. Books are cached with
+    their authors prefetched, so rendering them needs no queries.
+    
+    Returns:
+        Dictionary of homepage template context
+    """
+    timeout = getattr(settings, 'HOMEPAGE_CACHE_TIMEOUT', 600)
+    counts = get_or_set('books', ['home', 'counts'], lambda: {
+        'total_books': Book.objects.filter(is_available=True).count(),
+        'total_authors': Author.objects.count(),
+    }, timeout)
+    return {
+        'featured_books': get_or_set(
+            'books', ['home', 'featured'],
+            lambda: list(get_featured_books(limit=8)), timeout,
+        ),
+        'recent_books': get_or_set(
+            'books', ['home', 'recent'],
+            lambda: list(get_recent_books(limit=8)), timeout,
+        ),
+        'categories': get_or_set(
+            'books', ['home', 'categories'],
+            lambda: list(Category.objects.all()[:6]), timeout,
+        ),
+        **counts,
+    }
+
+
 def get_books_by_category(category_slug: str, page: int = 1, per_page: int = 12) -> Dict:
     """
     Get books by category with pagination.
@@ -188,10 +224,12 @@ def sync_book_from_google(google_books_id: str) -> Optional[Book]:
 
 def get_book_recommendations(book: Book, limit: int = 4) -> List[Book]:
     """
-    Get book recommendations based on categories and authors.
+    Get book recommendations for a book.
     
-    Generates personalised book recommendations by finding books that share
-    categories or authors with the specified book, excluding the original book.
+    Reads the precomputed neighbours stored by the ``build_recommendations``
+    command with a single indexed lookup. Books that have no stored
+    neighbours yet (e.g. newly added titles) fall back to books sharing
+    categories or authors with the specified book.
     
     Args:
         book: Book instance to base recommendations on
@@ -200,6 +238,15 @@ def get_book_recommendations(book: Book, limit: int = 4) -> List[Book]:
     Returns:
         List of recommended Book objects
     """
+    recommendations = list(
+        Book.objects.filter(
+            neighbour_of__book=book,
+            is_available=True
+        ).order_by('neighbour_of__rank').prefetch_related('authors')[:limit]
+    )
+    if recommendations:
+        return recommendations
+    
     # Get books in same categories or by same authors
     recommendations = Book.objects.filter(
         Q(categories__in=book.categories.all()) |
@@ -211,4 +258,3 @@ def get_book_recommendations(book: Book, limit: int = 4) -> List[Book]:
     ).distinct().select_related().prefetch_related('authors')[:limit]
     
     return list(recommendations)
-    
\ No newline at end of file
@@ -9,23 +9,33 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.db.models import Q
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_POST
-from django.core.mail import send_mail, EmailMultiAlternatives
+from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib.auth.decorators import user_passes_test
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
 import json
+import os
 
 from .models import Book, Author, Category, ContactMessage, Newsletter, Review
-from .utils import get_featured_books, get_recent_books
+from .conditional import catalogue_page
+from .utils import get_book_recommendations, get_homepage_snapshot
+from .pagination import paginate
+from .search import get_search_backend
+from .typeahead import typeahead_index
 from .forms import BookForm, ReviewForm
 from accounts.forms import CustomUserCreationForm, ProfileUpdateForm
 from accounts.models import CustomUser
+from outbox.services import enqueue_email
+
+# Unique newest-first ordering used by the paginated listings
+LISTING_ORDERING = ('-created_at', '-id')
 
 
 def home(request):
@@ -33,7 +43,8 @@ def home(request):
     Display the homepage with featured and recent books.
     
     Shows a curated selection of featured and recently added books,
-    along with category navigation and site statistics.
+    along with category navigation and site statistics. All of it is
+    served from cached snapshots that catalogue changes invalidate.
     
     Args:
         request: The HTTP request object
@@ -41,14 +52,7 @@ def home(request):
     Returns:
         Rendered homepage template with context data
     """
-    context = {
-        'featured_books': get_featured_books(limit=8),
-        'recent_books': get_recent_books(limit=8),
-        'categories': Category.objects.all()[:6],
-        'total_books': Book.objects.filter(is_available=True).count(),
-        'total_authors': Author.objects.count(),
-    }
-    return render(request, 'books/home.html', context)
+    return render(request, 'books/home.html', get_homepage_snapshot())
 
 
 def book_list(request):
@@ -56,7 +60,8 @@ def book_list(request):
     Display the book listing page with search and filtering capabilities.
     
     Shows all available books with pagination, and allows filtering by
-    search query terms that match title, author, or ISBN.
+    search query terms that match title, author, category, or ISBN.
+    Search results are ranked by relevance using the search backend.
     
     Args:
         request: The HTTP request object
@@ -68,25 +73,17 @@ def book_list(request):
         is_available=True
     ).select_related().prefetch_related('authors', 'categories')
     
-    # Handle search query
+    # Handle search query; ranked results keep offset pagination
     query = request.GET.get("q")
+    cursor_ordering = LISTING_ORDERING
     if query:
-        books_queryset = books_queryset.filter(
-            Q(title__icontains=query) |
-            Q(authors__name__icontains=query) |
-            Q(isbn__icontains=query)
-        ).distinct()
-    
-    # Pagination
-    paginator = Paginator(books_queryset, 12)  # Show 12 books per page
-    page = request.GET.get('page')
+        books_queryset = get_search_backend().filter_queryset(
+            books_queryset, query
+        )
+        cursor_ordering = None
     
-    try:
-        books = paginator.page(page)
-    except PageNotAnInteger:
-        books = paginator.page(1)
-    except EmptyPage:
-        books = paginator.page(paginator.num_pages)
+    # Pagination (12 books per page)
+    books = paginate(request, books_queryset, 12, cursor_ordering)
     
     context = {
         'books': books,
@@ -96,6 +93,7 @@ def book_list(request):
     return render(request, 'books/book_list.html', context)
 
 
+@catalogue_page
 def book_detail(request, pk):
     """
     Display detailed information for a specific book.
@@ -117,15 +115,8 @@ def book_detail(request, pk):
         is_available=True
     )
     
-    # Get recommendations (books in same categories or by same authors)
-    recommendations = Book.objects.filter(
-        Q(categories__in=book.categories.all()) |
-        Q(authors__in=book.authors.all())
-    ).exclude(
-        id=book.id
-    ).filter(
-        is_available=True
-    ).distinct().select_related().prefetch_related('authors')[:4]
+    # Get precomputed recommendations (co-purchases, authors and categories)
+    recommendations = get_book_recommendations(book, limit=4)
     
     # Check if user can review and get user review
     user_can_review = False
@@ -145,6 +136,7 @@ def book_detail(request, pk):
     return render(request, 'books/book_detail.html', context)
 
 
+@catalogue_page
 def category_detail(request, slug):
     """
     Display all books belonging to a specific category.
@@ -164,12 +156,10 @@ def category_detail(request, slug):
     books_list = Book.objects.filter(
         categories=category, 
         is_available=True
-    ).order_by("-created_at")
+    ).prefetch_related('authors')
     
     # Add pagination (12 books per page to match books page)
-    paginator = Paginator(books_list, 12)
-    page_number = request.GET.get("page")
-    books = paginator.get_page(page_number)
+    books = paginate(request, books_list, 12, LISTING_ORDERING)
     
     context = {
         "category": category,
@@ -179,6 +169,7 @@ def category_detail(request, slug):
     return render(request, "books/category_detail.html", context)
 
 
+@catalogue_page
 def author_detail(request, pk):
     """
     Display an author's profile and books.
@@ -198,12 +189,10 @@ def author_detail(request, pk):
     books_list = Book.objects.filter(
         authors=author, 
         is_available=True
-    ).order_by("-created_at")
+    ).prefetch_related('authors')
     
     # Add pagination (12 books per page)
-    paginator = Paginator(books_list, 12)
-    page_number = request.GET.get("page")
-    books = paginator.get_page(page_number)
+    books = paginate(request, books_list, 12, LISTING_ORDERING)
     
     context = {
         "author": author,
@@ -213,12 +202,39 @@ def author_detail(request, pk):
     return render(request, "books/author_detail.html", context)
 
 
+def cover_file(request, path):
+    """
+    Serve a stored cover variant with far-future cache headers.
+    
+    Cover files have content-hashed names, so a URL always refers to the
+    same bytes and browsers and CDNs may keep it for a year.
+    
+    Args:
+        request: The HTTP request object
+        path: File path below MEDIA_ROOT/covers
+        
+    Returns:
+        FileResponse with the image
+        
+    Raises:
+        Http404: If the file does not exist
+    """
+    response = serve(
+        request, path, document_root=os.path.join(settings.MEDIA_ROOT, 'covers')
+    )
+    if response.status_code == 200:
+        patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    return response
+
+
 def search_ajax(request):
     """
     Provide AJAX search results for live search functionality.
     
     Returns JSON data containing matching books based on a search query.
     Only returns results if the query is at least 3 characters long.
+    Suggestions come from the in-memory typeahead index; the database is
+    only queried while the index is still being built.
     
     Args:
         request: The HTTP request object with 'q' GET parameter
@@ -231,10 +247,17 @@ def search_ajax(request):
     if len(query) < 3:
         return JsonResponse({'results': []})
     
-    books = Book.objects.filter(
-        Q(title__icontains=query) |
-        Q(authors__name__icontains=query)
-    ).filter(is_available=True).distinct()[:5]
+    if typeahead_index.is_warm:
+        if typeahead_index.is_stale:
+            typeahead_index.build_in_background()
+        return JsonResponse({'results': typeahead_index.suggest(query, limit=5)})
+    
+    # Cold index - start building it and answer from the database meanwhile
+    typeahead_index.build_in_background()
+    books = get_search_backend().filter_queryset(
+        Book.objects.filter(is_available=True).prefetch_related('authors'),
+        query,
+    )[:5]
     
     results = []
     for book in books:
@@ -366,7 +389,7 @@ def newsletter_signup(request):
     Handle newsletter signup requests.
     
     Processes newsletter subscription requests, validates the email address,
-    creates or reactivates a subscription, and sends a confirmation email.
+    creates or reactivates a subscription, and queues a welcome email.
     
     Args:
         request: The HTTP POST request containing subscription data
@@ -425,28 +448,20 @@ The Tales & Tails Team
                 html_content = render_to_string('emails/newsletter_welcome.html', {
                     'email': email,
                 })
-                
-                email_message = EmailMultiAlternatives(
-                    subject=subject,
-                    body=text_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=[email]
-                )
-                email_message.attach_alternative(html_content, "text/html")
-                email_message.send(fail_silently=True)
-                
-                print(f"✅ Welcome email sent to {email}")
             except Exception as template_error:
-                # Fallback to simple text email if template loading fails
-                send_mail(
-                    subject=subject,
-                    message=text_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[email],
-                    fail_silently=True
-                )
-                print(f"⚠️ HTML email failed, sent plain text email to {email}: "
+                # Fall back to a plain text email if template loading fails
+                html_content = None
+                print(f"⚠️ HTML email failed, queueing plain text email to {email}: "
                      f"{str(template_error)}")
+            
+            enqueue_email(
+                subject=subject,
+                body=text_content,
+                to=[email],
+                html_body=html_content,
+                category='newsletter_welcome',
+            )
+            print(f"✅ Welcome email queued for {email}")
                 
         except Exception as email_error:
             print(f"❌ Failed to send confirmation email: {str(email_error)}")
@@ -522,10 +537,7 @@ def book_manage(request):
             Q(authors__name__icontains=search)
         ).distinct()
     
-    books = books.order_by('-created_at')
-    paginator = Paginator(books, 20)
-    page = request.GET.get('page')
-    books = paginator.get_page(page)
+    books = paginate(request, books, 20, LISTING_ORDERING)
     
     return render(request, 'books/manage.html', {
         'books': books,
@@ -663,9 +675,6 @@ def review_create(request, book_id):
             review.book = book
             review.save()
             
-            # Update book's average rating
-            book.update_average_rating()
-            
             messages.success(request, 'Your review has been added successfully!')
             return redirect('books:book_detail', pk=book.id)
     else:
@@ -702,9 +711,6 @@ def review_edit(request, review_id):
         if form.is_valid():
             form.save()
             
-            # Update book's average rating
-            book.update_average_rating()
-            
             messages.success(request, 'Your review has been updated successfully!')
             return redirect('books:book_detail', pk=book.id)
     else:
@@ -741,9 +747,6 @@ def review_delete(request, review_id):
     if request.method == 'POST':
         review.delete()
         
-        # Update book's average rating
-        book.update_average_rating()
-        
         messages.success(request, 'Your review has been deleted.')
         return redirect('books:book_detail', pk=book.id)
     
@@ -769,16 +772,14 @@ def user_reviews(request):
     """
     reviews_list = Review.objects.filter(
         user=request.user
-    ).select_related("book").order_by("-created_at")
+    ).select_related("book")
     
     # Add pagination (10 reviews per page)
-    paginator = Paginator(reviews_list, 10)
-    page_number = request.GET.get("page")
-    reviews = paginator.get_page(page_number)
+    reviews = paginate(request, reviews_list, 10, LISTING_ORDERING)
     
     context = {
         "reviews": reviews,
-        "total_reviews": reviews_list.count(),
+        "total_reviews": reviews.paginator.count,
     }
     
     return render(request, "books/user_reviews.html", context)
@@ -0,0 +1,251 @@
+"""
+Cache backend and key helpers for the bookstore project.
+
+``TieredCache`` puts a small per-process LRU (Django's local-memory
+cache) in front of a shared backend that needs no external service, by
+default the file-based cache. Reads are served from the local tier when
+possible; writes and deletes go to both tiers.
+
+Cached values are grouped into namespaces (currently only ``books``),
+optionally scoped (e.g. to one book's stock). Every key embeds the
+namespace's current version token, so bumping a namespace from a signal
+handler makes all of its entries unreachable at once, in every process.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.module_loading import import_string
+
+from bookstore_project.instrumentation import record_cache
+
+NAMESPACES = ('books',)
+
+_MISSING = object()
+
+
+class TieredCache(BaseCache):
+    """
+    Two-tier cache: per-process LRU in front of a shared backend.
+
+    Options:
+        LOCAL_TIMEOUT: Seconds an entry may live in the local tier
+        LOCAL_MAX_ENTRIES: Size of the local LRU
+        SHARED_BACKEND: Dotted path of the shared backend class
+        Any other option is passed to the shared backend.
+    """
+
+    def __init__(self, location, params):
+        """
+        Create both tiers.
+
+        Args:
+            location: LOCATION of the shared backend (e.g. a directory)
+            params: Cache settings for this alias
+        """
+        super().__init__(params)
+        options = dict(params.get('OPTIONS', {}))
+        self.local_timeout = options.pop('LOCAL_TIMEOUT', 5)
+        local_max_entries = options.pop('LOCAL_MAX_ENTRIES', 1000)
+        shared_backend = options.pop(
+            'SHARED_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'
+        )
+
+        shared_params = dict(params, OPTIONS=options)
+        local_params = dict(
+            params,
+            TIMEOUT=self.local_timeout,
+            OPTIONS={'MAX_ENTRIES': local_max_entries, 'CULL_FREQUENCY': 10},
+        )
+        self.local = LocMemCache(f'tiered:{location}', local_params)
+        self.shared = import_string(shared_backend)(location, shared_params)
+
+    def _local_timeout(self, timeout):
+        """Cap a timeout at the local tier's lifetime."""
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.local_timeout
+        return min(self.local_timeout, max(0, timeout - time.time()))
+
+    def get(self, key, default=None, version=None):
+        """Return a value from the local tier, falling back to the shared one."""
+        value = self.local.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            record_cache(hit=True)
+            return value
+        value = self.shared.get(key, _MISSING, version=version)
+        record_cache(hit=value is not _MISSING)
+        if value is _MISSING:
+            return default
+        self.local.set(key, value, self.local_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Store a value in both tiers."""
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set(key, value, self._local_timeout(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Store a value unless the shared tier already has the key."""
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.local.set(key, value, self._local_timeout(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        """Update the expiry of a key in the shared tier."""
+        self.local.delete(key, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        """Delete a key from both tiers."""
+        self.local.delete(key, version=version)
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        """Return True if either tier holds the key."""
+        return (
+            self.local.has_key(key, version=version) or
+            self.shared.has_key(key, version=version)
+        )
+
+    def clear(self):
+        """Empty both tiers."""
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        """Close the shared tier's resources."""
+        self.shared.close(**kwargs)
+
+
+def _shared_cache():
+    """Return the shared tier of the default cache, or the cache itself."""
+    return getattr(cache, 'shared', cache)
+
+
+def _version_key(namespace: str, scope=None) -> str:
+    """Return the cache key holding a namespace's version token."""
+    if scope is None:
+        return f'ns:{namespace}'
+    return f'ns:{namespace}:{scope}'
+
+
+def namespace_version(namespace: str, scope=None) -> str:
+    """
+    Return the current version token of a cache namespace.
+
+    The token is read from the shared tier so that a bump made by any
+    process is seen immediately.
+
+    Args:
+        namespace: One of NAMESPACES
+        scope: Optional sub-namespace, such as a book's stock scope
+
+    Returns:
+        str: Version token
+    """
+    key = _version_key(namespace, scope)
+    shared = _shared_cache()
+    version = shared.get(key)
+    if version is None:
+        version = str(time.time_ns())
+        if not shared.add(key, version, None):
+            version = shared.get(key, version)
+    return version
+
+
+def namespace_changed_at(namespace: str, scope=None):
+    """
+    Return when a cache namespace was last bumped.
+
+    Version tokens are nanosecond timestamps, so the current token also
+    says when the namespace's data last changed (or, if the token was
+    lost, a time no earlier than that).
+
+    Args:
+        namespace: One of NAMESPACES
+        scope: Optional sub-namespace, such as a book's stock scope
+
+    Returns:
+        datetime: Aware UTC datetime, or None for an unknown token format
+    """
+    try:
+        version = int(namespace_version(namespace, scope))
+    except ValueError:
+        return None
+    return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+def bump_namespace(namespace: str, scope=None):
+    """
+    Invalidate every cached entry in a namespace.
+
+    Args:
+        namespace: One of NAMESPACES
+        scope: Optional sub-namespace, such as a book's stock scope
+    """
+    _shared_cache().set(_version_key(namespace, scope), str(time.time_ns()), None)
+
+
+def stock_scope(book_id) -> str:
+    """
+    Return the ``books`` scope versioning a book's stock count.
+
+    Stock changes that leave a book in (or out of) stock bump only this
+    scope, which the book's detail page depends on, rather than the
+    whole catalogue.
+
+    Args:
+        book_id: Primary key of the book
+
+    Returns:
+        str: Scope to pass to the namespace functions
+    """
+    return f'stock:{book_id}'
+
+
+def make_key(namespace: str, *parts, scope=None) -> str:
+    """
+    Build a versioned cache key.
+
+    Args:
+        namespace: One of NAMESPACES
+        *parts: Key components, converted to strings
+        scope: Optional sub-namespace, such as a book's stock scope
+
+    Returns:
+        str: Cache key embedding the namespace version
+    """
+    if namespace not in NAMESPACES:
+        raise ValueError(f'Unknown cache namespace: {namespace}')
+    body = ':'.join(str(part) for part in parts)
+    if len(body) > 150:
+        body = hashlib.md5(body.encode()).hexdigest()
+    prefix = namespace if scope is None else f'{namespace}:{scope}'
+    return f'{prefix}:{namespace_version(namespace, scope)}:{body}'
+
+
+def get_or_set(namespace: str, parts, producer, timeout=DEFAULT_TIMEOUT, scope=None):
+    """
+    Return a cached value, computing and storing it on a miss.
+
+    Args:
+        namespace: One of NAMESPACES
+        parts: Iterable of key components
+        producer: Callable returning the value to cache
+        timeout: Cache lifetime in seconds
+        scope: Optional sub-namespace, such as a book's stock scope
+
+    Returns:
+        The cached or freshly computed value
+    """
+    key = make_key(namespace, *parts, scope=scope)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = producer()
+        cache.set(key, value, timeout)
+    return value
@@ -0,0 +1,121 @@
+"""
+Database routing for an optional read replica.
+
+When ``DATABASE_REPLICA_URL`` is set, settings add a ``replica``
+database and install ``ReplicaRouter``. Reads of catalogue models
+(the apps in ``REPLICA_APPS``) go to the replica only while replica
+reads are switched on for the current context:
+
+* ``ReplicaRoutingMiddleware`` switches them on for GET requests to the
+  read-only views in ``REPLICA_VIEWS``, unless the visitor has written
+  something in the last ``REPLICA_STICKY_SECONDS``
+* ``read_from_replica()`` switches them on for a block of code, e.g. in
+  reporting commands
+* ``iterate_on_replica()`` switches them on while each item of a
+  streamed response is produced, after the middleware has finished
+
+Everything else, including sessions, users, carts and orders, and every
+write, uses the primary (``default``) database, so checkout never reads
+data that is behind.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+REPLICA = 'replica'
+PRIMARY = 'default'
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+def replica_configured() -> bool:
+    """Return True if a replica database is configured."""
+    return REPLICA in connections
+
+
+def replica_reads_enabled() -> bool:
+    """Return True if reads in the current context may use the replica."""
+    return _replica_reads.get()
+
+
+def enable_replica_reads():
+    """
+    Let catalogue reads in the current context use the replica.
+
+    Returns:
+        Token to pass to ``reset_replica_reads``
+    """
+    return _replica_reads.set(True)
+
+
+def reset_replica_reads(token):
+    """Undo ``enable_replica_reads``."""
+    _replica_reads.reset(token)
+
+
+@contextmanager
+def read_from_replica():
+    """Read catalogue models from the replica inside the block, if configured."""
+    token = enable_replica_reads()
+    try:
+        yield
+    finally:
+        reset_replica_reads(token)
+
+
+def iterate_on_replica(iterable):
+    """
+    Produce each item of an iterable with replica reads switched on.
+
+    Streamed responses are consumed after the middleware has switched
+    replica reads off again. Reads are switched on and off around each
+    item, so the setting never leaks into the server between items.
+
+    Args:
+        iterable: Iterable whose items read from the database
+
+    Yields:
+        The iterable's items
+    """
+    iterator = iter(iterable)
+    while True:
+        with read_from_replica():
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+class ReplicaRouter:
+    """
+    Send catalogue reads to the replica when enabled; everything else to
+    the primary.
+    """
+
+    def __init__(self):
+        self.apps = set(getattr(settings, 'REPLICA_APPS', ('books',)))
+
+    def db_for_read(self, model, **hints):
+        """Use the replica for catalogue reads while replica reads are on."""
+        if (
+            _replica_reads.get()
+            and model._meta.app_label in self.apps
+            and replica_configured()
+        ):
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        """Always write to the primary."""
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Both databases hold the same data, so any relation is fine."""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Only migrate the primary; the replica copies its schema."""
+        return db == PRIMARY
@@ -0,0 +1,327 @@
+"""
+Streaming CSV and JSON Lines exports.
+
+Books, orders and users can be exported from their admin change lists
+(as admin actions, which export the selection or, with "select all",
+every row matching the current filters and search) and with the
+``export_data`` management command.
+
+Rows are read as tuples with ``queryset.iterator(chunk_size=...)``,
+related columns (a book's authors, an order's items) are fetched with
+one query per chunk, and the output is produced and optionally
+gzip-compressed a block at a time, so memory use stays flat however many
+rows are exported. Admin exports are sent as a
+``StreamingHttpResponse`` while they are generated.
+"""
+import csv
+import json
+import zlib
+from collections import defaultdict
+from datetime import date, datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from books.models import Book
+from orders.models import Order, OrderItem
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Bytes of output collected before a block is compressed and sent
+BLOCK_SIZE = 64 * 1024
+
+# Leading characters that make spreadsheets read a CSV cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Export:
+    """
+    The columns of an export and how to read them.
+    """
+
+    def __init__(self, name, model, columns):
+        """
+        Describe an export.
+
+        Args:
+            name: Export name, used in file names and by ``export_data``
+            model: Model exported
+            columns: (header, source) pairs. A source is either a field
+                lookup read with ``values_list`` (e.g. 'user__username')
+                or a function taking a list of primary keys and returning
+                a dict of pk -> value, called once per chunk of rows.
+        """
+        self.name = name
+        self.model = model
+        self.columns = columns
+
+    @property
+    def headers(self):
+        """Column headers, in order."""
+        return [header for header, _ in self.columns]
+
+    def rows(self, queryset, chunk_size=None):
+        """
+        Yield the values of each row of a queryset.
+
+        Rows are read as tuples rather than model instances, and each
+        related column costs one query per chunk.
+
+        Args:
+            queryset: Rows to export, already filtered and ordered
+            chunk_size: Rows fetched per query (default: EXPORT_CHUNK_SIZE)
+
+        Yields:
+            list: One value per column
+        """
+        chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+        lookups = [source for _, source in self.columns if isinstance(source, str)]
+        values = queryset.prefetch_related(None).values_list('pk', *lookups)
+
+        chunk = []
+        for row in values.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield from self._fill(chunk)
+                chunk = []
+        if chunk:
+            yield from self._fill(chunk)
+
+    def _fill(self, chunk):
+        """Merge a chunk of ``values_list`` rows with its related columns."""
+        pks = [row[0] for row in chunk]
+        related = {
+            index: source(pks)
+            for index, (_, source) in enumerate(self.columns)
+            if not isinstance(source, str)
+        }
+        for row in chunk:
+            fields = iter(row[1:])
+            yield [
+                related[index].get(row[0]) if index in related else next(fields)
+                for index in range(len(self.columns))
+            ]
+
+
+def _names(model, relation):
+    """Return a source joining the names of a many-to-many relation."""
+    field = model._meta.get_field(relation)
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+
+    def fetch(pks):
+        names = defaultdict(list)
+        for pk, name in through.objects.filter(
+            **{f'{source}__in': pks}
+        ).order_by(f'{target}__name').values_list(f'{source}_id', f'{target}__name'):
+            names[pk].append(name)
+        return {pk: '; '.join(items) for pk, items in names.items()}
+    return fetch
+
+
+def _order_items(pks):
+    """Summarise orders' items as '2 x Title; 1 x Title'."""
+    items = defaultdict(list)
+    for order_id, quantity, title in OrderItem.objects.filter(
+        order_id__in=pks
+    ).order_by('created_at', 'pk').values_list('order_id', 'quantity', 'book_title'):
+        items[order_id].append(f'{quantity} x {title}')
+    return {pk: '; '.join(lines) for pk, lines in items.items()}
+
+
+EXPORTS = {
+    export.name: export
+    for export in (
+        Export('books', Book, [
+            ('id', 'id'),
+            ('title', 'title'),
+            ('subtitle', 'subtitle'),
+            ('authors', _names(Book, 'authors')),
+            ('categories', _names(Book, 'categories')),
+            ('publisher', 'publisher'),
+            ('published_date', 'published_date'),
+            ('isbn_13', 'isbn_13'),
+            ('isbn_10', 'isbn_10'),
+            ('google_books_id', 'google_books_id'),
+            ('language', 'language'),
+            ('main_category', 'main_category'),
+            ('page_count', 'page_count'),
+            ('price', 'price'),
+            ('stock_quantity', 'stock_quantity'),
+            ('is_available', 'is_available'),
+            ('is_featured', 'is_featured'),
+            ('average_rating', 'average_rating'),
+            ('ratings_count', 'ratings_count'),
+            ('created_at', 'created_at'),
+            ('updated_at', 'updated_at'),
+        ]),
+        Export('orders', Order, [
+            ('order_number', 'order_number'),
+            ('username', 'user__username'),
+            ('customer_email', 'customer_email'),
+            ('customer_first_name', 'customer_first_name'),
+            ('customer_last_name', 'customer_last_name'),
+            ('status', 'status'),
+            ('payment_status', 'payment_status'),
+            ('total_amount', 'total_amount'),
+            ('items', _order_items),
+            ('stripe_payment_intent_id', 'stripe_payment_intent_id'),
+            ('created_at', 'created_at'),
+            ('confirmed_at', 'confirmed_at'),
+            ('updated_at', 'updated_at'),
+        ]),
+        Export('users', get_user_model(), [
+            (field, field) for field in (
+                'id', 'username', 'email', 'first_name', 'last_name',
+                'dog_owner', 'dog_breed', 'dog_age', 'training_level',
+                'newsletter_subscription', 'marketing_emails', 'is_active',
+                'is_staff', 'date_joined', 'last_login',
+            )
+        ]),
+    )
+}
+
+
+class _Line:
+    """File-like object that hands back what ``csv.writer`` writes."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    """
+    Format a value for a CSV cell.
+
+    Text that a spreadsheet would evaluate as a formula (e.g. a customer
+    name or book title starting with ``=``) is prefixed with a quote so it
+    is shown as text instead.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def _lines(export, queryset, fmt, chunk_size):
+    """Yield the export as text lines."""
+    if fmt == 'csv':
+        writer = csv.writer(_Line())
+        yield writer.writerow(export.headers)
+        for row in export.rows(queryset, chunk_size):
+            yield writer.writerow([_csv_value(value) for value in row])
+    else:
+        headers = export.headers
+        for row in export.rows(queryset, chunk_size):
+            yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_export(export, queryset, fmt='csv', compress=False, chunk_size=None):
+    """
+    Generate an export block by block.
+
+    Args:
+        export: An ``Export`` from EXPORTS
+        queryset: Rows to export
+        fmt: 'csv' or 'jsonl'
+        compress: Gzip the output
+        chunk_size: Rows fetched per query
+
+    Yields:
+        bytes: Blocks of (compressed) output
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    block, size = [], 0
+    for line in _lines(export, queryset, fmt, chunk_size):
+        block.append(line)
+        size += len(line)
+        if size >= BLOCK_SIZE:
+            data = ''.join(block).encode('utf-8')
+            block, size = [], 0
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+    data = ''.join(block).encode('utf-8')
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+
+def export_filename(export, fmt='csv', compress=False):
+    """Return a timestamped file name such as 'books-20250101-120000.csv.gz'."""
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+    return f"{export.name}-{stamp}.{fmt}{'.gz' if compress else ''}"
+
+
+def export_response(export, queryset, fmt='csv', compress=False):
+    """
+    Stream an export as a file download.
+
+    Args:
+        export: An ``Export`` from EXPORTS
+        queryset: Rows to export
+        fmt: 'csv' or 'jsonl'
+        compress: Gzip the output
+
+    Returns:
+        StreamingHttpResponse: The download
+    """
+    response = StreamingHttpResponse(
+        stream_export(export, queryset, fmt, compress),
+        content_type='application/gzip' if compress else f'{FORMATS[fmt]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{export_filename(export, fmt, compress)}"'
+    )
+    return response
+
+
+class ExportActionsMixin:
+    """
+    Admin actions exporting the selected rows.
+
+    Set ``export_name`` to a key of EXPORTS and add EXPORT_ACTIONS to the
+    admin's ``actions``.
+    """
+
+    export_name = None
+
+    def _export(self, queryset, fmt, compress):
+        return export_response(EXPORTS[self.export_name], queryset, fmt, compress)
+
+    def export_csv(self, request, queryset):
+        """Download the selected rows as CSV."""
+        return self._export(queryset, 'csv', False)
+    export_csv.short_description = "Export selected as CSV"
+
+    def export_csv_gzip(self, request, queryset):
+        """Download the selected rows as gzipped CSV."""
+        return self._export(queryset, 'csv', True)
+    export_csv_gzip.short_description = "Export selected as CSV (gzip)"
+
+    def export_jsonl(self, request, queryset):
+        """Download the selected rows as JSON Lines."""
+        return self._export(queryset, 'jsonl', False)
+    export_jsonl.short_description = "Export selected as JSON Lines"
+
+    def export_jsonl_gzip(self, request, queryset):
+        """Download the selected rows as gzipped JSON Lines."""
+        return self._export(queryset, 'jsonl', True)
+    export_jsonl_gzip.short_description = "Export selected as JSON Lines (gzip)"
+
+
+EXPORT_ACTIONS = ['export_csv', 'export_csv_gzip', 'export_jsonl', 'export_jsonl_gzip']
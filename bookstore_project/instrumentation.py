@@ -0,0 +1,197 @@
+"""
+Per-request performance instrumentation.
+
+``RequestStats`` collects, for the request being served, the number and
+total time of SQL queries, the time spent rendering templates and the
+cache hits and misses. Collection is tied to a context variable, so
+concurrent requests in other threads never see each other's numbers.
+
+Three hooks feed the current ``RequestStats``:
+
+* ``QueryRecorder`` is installed with ``connection.execute_wrapper`` by
+  ``RequestInstrumentationMiddleware`` for the duration of a request.
+* ``TimedDjangoTemplates`` is a Django template backend whose templates
+  time their own ``render()``. Included templates are rendered by the
+  engine directly, so only the outermost render of each page counts.
+* ``TieredCache.get`` calls ``record_cache``.
+
+Queries are grouped by "shape": the SQL with its parameters left out
+and ``IN (%s, %s, …)`` lists collapsed, so the same lookup made for each
+row of a listing (an N+1 pattern) shows up as one shape run many times.
+"""
+import contextvars
+import re
+import time
+from collections import defaultdict
+
+from django.template.backends.django import DjangoTemplates
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def sql_shape(sql: str) -> str:
+    """
+    Normalise a SQL statement so repeats of one query compare equal.
+
+    Args:
+        sql: SQL as passed to the cursor, with parameter placeholders
+
+    Returns:
+        str: The statement with whitespace and IN lists collapsed
+    """
+    return IN_LIST.sub('IN (…)', WHITESPACE.sub(' ', sql).strip())
+
+
+class RequestStats:
+    """
+    Timings and counters of a single request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.rendering = False
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.shapes = defaultdict(lambda: [0, 0.0])
+
+    @property
+    def total_time(self) -> float:
+        """Return the seconds elapsed since the request started."""
+        return time.perf_counter() - self.started
+
+    def record_query(self, sql: str, duration: float):
+        """Count a query and add its time to its shape."""
+        self.queries += 1
+        self.sql_time += duration
+        shape = self.shapes[sql_shape(sql)]
+        shape[0] += 1
+        shape[1] += duration
+
+    def repeated_shapes(self, minimum: int = 2, limit: int = 5):
+        """
+        Return the query shapes run most often.
+
+        Args:
+            minimum: Smallest number of executions reported
+            limit: Number of shapes returned
+
+        Returns:
+            list: (shape, count, seconds) tuples, most frequent first
+        """
+        repeated = [
+            (shape, count, duration)
+            for shape, (count, duration) in self.shapes.items()
+            if count >= minimum
+        ]
+        repeated.sort(key=lambda item: (-item[1], -item[2]))
+        return repeated[:limit]
+
+    def server_timing(self) -> str:
+        """
+        Format the stats as a ``Server-Timing`` header value.
+
+        Returns:
+            str: Metrics for SQL, templates, cache and the whole request
+        """
+        metrics = [
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ]
+        return ', '.join(metrics)
+
+
+def start_request() -> RequestStats:
+    """
+    Begin collecting stats for the current request.
+
+    Returns:
+        RequestStats: The stats object that the hooks now update
+    """
+    stats = RequestStats()
+    stats.token = _current.set(stats)
+    return stats
+
+
+def finish_request(stats: RequestStats):
+    """Stop collecting stats for the current request."""
+    _current.reset(stats.token)
+
+
+def current_stats():
+    """Return the stats of the request being served, or None."""
+    return _current.get()
+
+
+def record_cache(hit: bool):
+    """Count a cache lookup against the current request, if any."""
+    stats = _current.get()
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+class QueryRecorder:
+    """
+    ``execute_wrapper`` callable timing every query of a request.
+    """
+
+    def __init__(self, stats: RequestStats):
+        self.stats = stats
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.stats.record_query(sql, time.perf_counter() - started)
+
+
+class TimedTemplate:
+    """
+    Backend template wrapper adding its render time to the request stats.
+
+    Templates rendered while another one is (e.g. ``render_to_string``
+    in a template tag) are part of the outer render and not added again.
+    """
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        """Render the wrapped template and time it."""
+        stats = _current.get()
+        if stats is None or stats.rendering:
+            return self.template.render(context, request)
+        stats.rendering = True
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - started
+            stats.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Django template backend whose templates report their render time.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
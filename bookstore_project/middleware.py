@@ -0,0 +1,314 @@
+"""
+Middleware for the bookstore project.
+
+``RequestInstrumentationMiddleware`` measures every request: SQL query
+count and time, template render time and cache hits, reported in a
+``Server-Timing`` header, a slow request log and N+1 query warnings.
+
+``AnonymousPageCacheMiddleware`` serves whole catalogue pages to
+anonymous visitors from the cache, skipping the view, the template and
+the context processors. Entries are keyed by host, path and query
+string in the ``books`` cache namespace (and, for a book's page, the
+book's stock scope), so the catalogue signals that already invalidate
+cached data also invalidate cached pages.
+
+Visitors with anything personal to show bypass the cache: logged-in
+users, sessions holding a cart summary and requests with pending flash
+messages. The only per-visitor content on an anonymous page is the CSRF
+token of its forms, which is swapped for a placeholder when a page is
+stored and for a token issued to the current visitor when it is served.
+
+``ReplicaRoutingMiddleware`` lets the read-only catalogue views read from
+the replica database, when one is configured (see ``db_router``).
+"""
+import logging
+import re
+import time
+from contextlib import ExitStack
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+from books.conditional import catalogue_changed_at, catalogue_version
+from bookstore_project import db_router, instrumentation
+from bookstore_project.cache import make_key
+from cart.summary import SESSION_KEY as CART_SUMMARY_KEY
+
+logger = logging.getLogger('bookstore_project.instrumentation')
+
+CSRF_INPUT = re.compile(rb'(name="csrfmiddlewaretoken" value=")[A-Za-z0-9]+(")')
+CSRF_PLACEHOLDER = b'__page_cache_csrf_token__'
+
+DEFAULT_PAGE_CACHE_VIEWS = (
+    'home',
+    'books:book_list',
+    'books:book_detail',
+    'books:category_detail',
+    'books:author_detail',
+    'books:about',
+    'books:contact',
+)
+
+DEFAULT_REPLICA_VIEWS = (
+    'home',
+    'books:book_list',
+    'books:book_detail',
+    'books:category_detail',
+    'books:author_detail',
+    'books:search_ajax',
+    'books:api_*',
+    'django.contrib.sitemaps.views.sitemap',
+    'sitemap_file',
+)
+
+REPLICA_STICKY_SESSION_KEY = '_primary_until'
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Full-page cache for anonymous catalogue traffic.
+
+    Must come after the CSRF, authentication and messages middleware.
+
+    Settings:
+        PAGE_CACHE_TIMEOUT: Seconds a page is cached (0 disables it)
+        PAGE_CACHE_VIEWS: URL names of the views whose pages are cached
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 300)
+        self.views = set(getattr(settings, 'PAGE_CACHE_VIEWS', DEFAULT_PAGE_CACHE_VIEWS))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(request, '_page_cache_key', None)
+        if key and self._storable(request, response):
+            cache.set(key, self._snapshot(response), self.timeout)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Answer from the cache, or mark the request for storing."""
+        if not self._cacheable(request):
+            return None
+        key = make_key(
+            'books', 'page', catalogue_version(request), request.get_host(),
+            request.get_full_path(),
+        )
+        snapshot = cache.get(key)
+        if snapshot is None:
+            request._page_cache_key = key
+            return None
+        return self._response(request, snapshot)
+
+    def _cacheable(self, request) -> bool:
+        """Check whether the request may be answered from the cache."""
+        if not self.timeout or request.method not in ('GET', 'HEAD'):
+            return False
+        match = request.resolver_match
+        if match is None or match.view_name not in self.views:
+            return False
+        if request.user.is_authenticated:
+            return False
+        if request.session.get(CART_SUMMARY_KEY):
+            return False
+        return not len(get_messages(request))
+
+    def _storable(self, request, response) -> bool:
+        """Check that a freshly rendered page holds nothing personal."""
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.session.modified
+            and not len(get_messages(request))
+        )
+
+    def _snapshot(self, response) -> dict:
+        """Capture the parts of a response needed to replay it."""
+        return {
+            'content': CSRF_INPUT.sub(
+                rb'\g<1>' + CSRF_PLACEHOLDER + rb'\g<2>', response.content
+            ),
+            'headers': {
+                header: response[header]
+                for header in ('Content-Type', 'Cache-Control', 'Last-Modified')
+                if response.has_header(header)
+            },
+        }
+
+    def _response(self, request, snapshot):
+        """Rebuild a cached page for the current visitor."""
+        last_modified = parse_http_date_safe(
+            snapshot['headers'].get('Last-Modified', '')
+        )
+        content = snapshot['content']
+        if CSRF_PLACEHOLDER in content:
+            content = content.replace(
+                CSRF_PLACEHOLDER, get_token(request).encode('ascii')
+            )
+
+        response = HttpResponse(content)
+        for header, value in snapshot['headers'].items():
+            response[header] = value
+        response['X-Page-Cache'] = 'hit'
+        patch_vary_headers(response, ('Cookie',))
+        return get_conditional_response(
+            request, last_modified=last_modified, response=response
+        )
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Per-request query, template and cache instrumentation.
+
+    Should come first in MIDDLEWARE so that the timings cover the other
+    middleware, including page cache hits. Queries run while a streaming
+    response is consumed are not counted.
+
+    Settings:
+        INSTRUMENTATION_ENABLED: Collect stats at all
+        SERVER_TIMING: Add a ``Server-Timing`` header to responses
+        SLOW_REQUEST_MS: Log requests slower than this, with their most
+            repeated query shapes (0 disables the log)
+        N_PLUS_ONE_THRESHOLD: Warn when one query shape runs this many
+            times in a request (0 disables the warning)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'INSTRUMENTATION_ENABLED', True)
+        self.server_timing = getattr(settings, 'SERVER_TIMING', settings.DEBUG)
+        self.slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        self.n_plus_one = getattr(settings, 'N_PLUS_ONE_THRESHOLD', 5)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats = instrumentation.start_request()
+        try:
+            with ExitStack() as stack:
+                recorder = instrumentation.QueryRecorder(stats)
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            instrumentation.finish_request(stats)
+
+        if self.server_timing:
+            response['Server-Timing'] = stats.server_timing()
+        self._report(request, response, stats)
+        return response
+
+    def _view_name(self, request) -> str:
+        """Return the URL name of the view that served a request."""
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match is not None else request.path
+
+    def _report(self, request, response, stats):
+        """Log slow requests and repeated query shapes."""
+        view = self._view_name(request)
+        total_ms = stats.total_time * 1000
+
+        if self.n_plus_one:
+            for shape, count, duration in stats.repeated_shapes(self.n_plus_one):
+                logger.warning(
+                    "Possible N+1 in %s: %d x %.1fms %s",
+                    view, count, duration * 1000, shape[:300],
+                )
+
+        if self.slow_ms and total_ms >= self.slow_ms:
+            repeated = ''.join(
+                f"\n  {count} x {duration * 1000:.1f}ms {shape[:300]}"
+                for shape, count, duration in stats.repeated_shapes()
+            )
+            logger.warning(
+                "Slow request %s %s (%s) %d: %.0fms, %d queries in %.1fms, "
+                "templates %.1fms, cache %d hits/%d misses%s",
+                request.method, request.get_full_path(), view,
+                response.status_code, total_ms, stats.queries,
+                stats.sql_time * 1000, stats.template_time * 1000,
+                stats.cache_hits, stats.cache_misses, repeated,
+            )
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the catalogue reads of read-only views to the replica.
+
+    A GET or HEAD request to one of ``REPLICA_VIEWS`` reads from the
+    replica unless it might see data older than what it should:
+
+    * for ``REPLICA_STICKY_SECONDS`` after a session makes a POST (or any
+      other unsafe request), its requests stay on the primary, so
+      visitors see their own reviews, edits and stock changes at once
+    * for ``REPLICA_STICKY_SECONDS`` after the ``books`` cache namespace
+      (or the stock scope of the book shown) is bumped, everybody stays
+      on the primary, so pages and API
+      responses cached under the new version are never rendered from a
+      replica that has not caught up yet
+
+    Must come after the session and authentication middleware and before
+    ``AnonymousPageCacheMiddleware``. Streamed responses read what is
+    left of them from the primary.
+
+    Settings:
+        REPLICA_VIEWS: URL names (or fnmatch patterns) of read-only views
+        REPLICA_STICKY_SECONDS: Seconds reads stay on the primary after a
+            write, about the replica's worst expected lag
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.views = tuple(getattr(settings, 'REPLICA_VIEWS', DEFAULT_REPLICA_VIEWS))
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            token = getattr(request, '_replica_token', None)
+            if token is not None:
+                db_router.reset_replica_reads(token)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            self._stick(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Switch replica reads on for this request if it is safe."""
+        if self._use_replica(request):
+            request._replica_token = db_router.enable_replica_reads()
+        return None
+
+    def _use_replica(self, request) -> bool:
+        """Check whether the request may read from the replica."""
+        if not db_router.replica_configured() or request.method not in ('GET', 'HEAD'):
+            return False
+        match = request.resolver_match
+        if match is None or not any(
+            fnmatchcase(match.view_name, pattern) for pattern in self.views
+        ):
+            return False
+        now = time.time()
+        if request.session.get(REPLICA_STICKY_SESSION_KEY, 0) > now:
+            return False
+        changed_at = catalogue_changed_at(request)
+        return changed_at is None or changed_at.timestamp() + self.sticky_seconds <= now
+
+    def _stick(self, request):
+        """Keep a session that has just written on the primary for a while."""
+        if not db_router.replica_configured():
+            return
+        session = getattr(request, 'session', None)
+        # Skip sessionless callers such as the Stripe webhook
+        if session is None or not (session.session_key or session.modified):
+            return
+        session[REPLICA_STICKY_SESSION_KEY] = time.time() + self.sticky_seconds
@@ -43,6 +43,8 @@ LOCAL_APPS = [
     'orders',
     # 'reviews',
     'newsletter',
+    'outbox',
+    'benchmarks',
 ]
 
 # Sitemap configuration
@@ -50,6 +52,7 @@ DJANGO_APPS += ['django.contrib.sitemaps']
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'bookstore_project.middleware.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -58,13 +61,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'bookstore_project.middleware.ReplicaRoutingMiddleware',
+    'bookstore_project.middleware.AnonymousPageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'bookstore_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'bookstore_project.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -90,6 +95,23 @@ DATABASES = {
     )
 }
 
+# Read replica - optional; catalogue reads of read-only views go to it
+# (see bookstore_project/db_router.py). Tests reuse the default database.
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['bookstore_project.db_router.ReplicaRouter']
+
+# Read replica - seconds reads stay on the primary after a session writes
+# or the catalogue changes; set to the replica's worst expected lag
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -128,6 +150,71 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 GOOGLE_BOOKS_API_KEY = config('GOOGLE_BOOKS_API_KEY', default='')
 GOOGLE_BOOKS_API_URL = 'https://www.googleapis.com/books/v1/volumes'
 
+# Live search - seconds before a worker rebuilds its in-memory typeahead index
+TYPEAHEAD_MAX_AGE = config('TYPEAHEAD_MAX_AGE', default=300, cast=int)
+
+# Cache - per-process LRU in front of a shared file-based cache
+CACHE_DIR = config('CACHE_DIR', default=str(BASE_DIR / '.cache'))
+CACHES = {
+    'default': {
+        'BACKEND': 'bookstore_project.cache.TieredCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'default'),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+        'OPTIONS': {
+            'LOCAL_TIMEOUT': config('CACHE_LOCAL_TIMEOUT', default=5, cast=int),
+            'LOCAL_MAX_ENTRIES': 1000,
+            'SHARED_BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# Google Books - disk cache of API responses (empty path disables it)
+GOOGLE_BOOKS_CACHE_PATH = config(
+    'GOOGLE_BOOKS_CACHE_PATH', default=os.path.join(CACHE_DIR, 'google_books.sqlite3')
+)
+GOOGLE_BOOKS_CACHE_TTL = config('GOOGLE_BOOKS_CACHE_TTL', default=86400, cast=int)
+GOOGLE_BOOKS_CACHE_MAX_ENTRIES = config('GOOGLE_BOOKS_CACHE_MAX_ENTRIES', default=5000, cast=int)
+
+# Instrumentation - Server-Timing header, slow request log threshold (ms)
+# and number of repeats of one query shape reported as a possible N+1
+INSTRUMENTATION_ENABLED = config('INSTRUMENTATION_ENABLED', default=True, cast=bool)
+SERVER_TIMING = config('SERVER_TIMING', default=DEBUG, cast=bool)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)
+N_PLUS_ONE_THRESHOLD = config('N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+
+# Page cache - seconds whole catalogue pages are cached for anonymous visitors
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Homepage - seconds the counts and book list snapshots are cached
+HOMEPAGE_CACHE_TIMEOUT = config('HOMEPAGE_CACHE_TIMEOUT', default=600, cast=int)
+
+# Listings - keyset pagination on (created_at, id) instead of OFFSET pages
+CATALOG_CURSOR_PAGINATION = config('CATALOG_CURSOR_PAGINATION', default=False, cast=bool)
+
+# Listings - seconds a paginated listing's total count is cached
+PAGINATION_COUNT_CACHE_TIMEOUT = config('PAGINATION_COUNT_CACHE_TIMEOUT', default=60, cast=int)
+
+# Admin - unfiltered change lists of tables the database estimates at or
+# above this many rows show the estimate instead of running COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100000, cast=int)
+
+# JSON API - default/maximum page size, size from which pages are streamed,
+# and seconds responses may be cached by clients before revalidating
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=50, cast=int)
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=1000, cast=int)
+API_STREAM_PAGE_SIZE = config('API_STREAM_PAGE_SIZE', default=200, cast=int)
+API_CACHE_MAX_AGE = config('API_CACHE_MAX_AGE', default=60, cast=int)
+
+# Exports - rows fetched per query while an admin or command export streams
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Benchmarks - directory run_benchmarks writes its JSON results to
+BENCHMARK_RESULTS_DIR = config('BENCHMARK_RESULTS_DIR', default=str(BASE_DIR / 'benchmarks' / 'results'))
+
+# Checkout - seconds stock stays reserved for a customer at checkout
+STOCK_RESERVATION_TTL = config('STOCK_RESERVATION_TTL', default=900, cast=int)
+
 # Security settings (for production)
 if not DEBUG:
     SECURE_BROWSER_XSS_FILTER = True
@@ -155,6 +242,10 @@ AUTHENTICATION_BACKENDS = [
 # Sitemap configuration
 SITE_ID = 1
 
+# Sitemaps - pre-generated gzip shards written by generate_sitemaps
+SITEMAP_ROOT = config('SITEMAP_ROOT', default=str(BASE_DIR / 'sitemaps'))
+SITEMAP_SHARD_SIZE = config('SITEMAP_SHARD_SIZE', default=5000, cast=int)
+
 # Add to INSTALLED_APPS if not already there
 if 'django.contrib.sitemaps' not in INSTALLED_APPS:
     INSTALLED_APPS += ['django.contrib.sitemaps']
@@ -187,6 +278,11 @@ EMAIL_SUBJECT_PREFIX = '[Tales & Tails] '
 ADMINS = [('Admin', os.getenv('ADMIN_EMAIL', 'admin@talesandtails.com'))]
 MANAGERS = ADMINS
 
+# Email outbox - retries back off exponentially from OUTBOX_RETRY_BACKOFF seconds
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+OUTBOX_RETRY_BACKOFF = config('OUTBOX_RETRY_BACKOFF', default=60, cast=int)
+OUTBOX_LEASE_SECONDS = config('OUTBOX_LEASE_SECONDS', default=300, cast=int)
+
 # =================================
 # STRIPE CONFIGURATION - DEVELOPMENT MODE
 # =================================
@@ -194,6 +290,14 @@ STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY', default='')
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='')
 STRIPE_ENDPOINT_SECRET = config('STRIPE_ENDPOINT_SECRET', default='')
 
+# Stripe webhooks - signing secret (falls back to STRIPE_ENDPOINT_SECRET),
+# attempts and backoff (seconds, doubling) for succeeded events whose
+# order is not found yet, and seconds a worker holds a claimed batch
+STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET', default=STRIPE_ENDPOINT_SECRET)
+STRIPE_WEBHOOK_MAX_ATTEMPTS = config('STRIPE_WEBHOOK_MAX_ATTEMPTS', default=8, cast=int)
+STRIPE_WEBHOOK_RETRY_BACKOFF = config('STRIPE_WEBHOOK_RETRY_BACKOFF', default=30, cast=int)
+STRIPE_WEBHOOK_LEASE_SECONDS = config('STRIPE_WEBHOOK_LEASE_SECONDS', default=60, cast=int)
+
 # Development mode indicator for Stripe
 STRIPE_TEST_MODE = DEBUG and (
     STRIPE_PUBLISHABLE_KEY.startswith('pk_test_') if STRIPE_PUBLISHABLE_KEY else False
@@ -237,5 +341,10 @@ if DEBUG:
                 'level': 'INFO',  # Change to 'DEBUG' to see SQL queries
                 'handlers': ['console'],
             },
+            'bookstore_project.instrumentation': {
+                'level': 'WARNING',
+                'handlers': ['console'],
+                'propagate': False,
+            },
         },
     }
\ No newline at end of file
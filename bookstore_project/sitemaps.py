@@ -1,11 +1,45 @@
+"""
+Sitemaps for the bookstore.
+
+Book URLs are published as a sitemap index over fixed-size shards that
+are written to ``SITEMAP_ROOT`` as pre-compressed ``.xml.gz`` files by
+the ``generate_sitemaps`` command, so crawler requests only read files
+from disk.
+
+Shards hold contiguous ranges of book primary keys. The range starts are
+kept in a manifest between runs, so a new or edited book only changes
+the shard its key falls into; each shard's fingerprint of
+``(pk, updated_at)`` pairs decides whether it has to be rewritten.
+Shards that grow past twice ``SITEMAP_SHARD_SIZE`` are split and empty
+ones are merged away.
+
+Until the command has run, ``sitemap.xml`` falls back to rendering the
+``sitemaps`` below on demand.
+"""
+import gzip
+import hashlib
+import json
+import os
+from bisect import bisect_right
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from django.conf import settings
 from django.contrib.sitemaps import GenericSitemap, Sitemap
+from django.contrib.sitemaps.views import sitemap
+from django.http import Http404
 from django.urls import reverse
+from django.views.static import serve
 from books.models import Book
 
+MANIFEST_NAME = 'manifest.json'
+INDEX_NAME = 'sitemap.xml'
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
 # Define your sitemaps
 book_info = {
-    'queryset': Book.objects.all(),
-    'date_field': 'created_at',  # Adjust if your field name is different
+    'queryset': Book.objects.filter(is_available=True).order_by('pk'),
+    'date_field': 'updated_at',
 }
 
 # Static pages sitemap
@@ -24,3 +58,232 @@ sitemaps = {
     'books': GenericSitemap(book_info, priority=0.7),
     'static': StaticViewSitemap(),
 }
+
+
+def _sitemap_root() -> str:
+    """Return the directory the generated sitemap files live in."""
+    return str(getattr(settings, 'SITEMAP_ROOT', settings.BASE_DIR / 'sitemaps'))
+
+
+def _absolute(path: str) -> str:
+    """Prefix a site path with SITE_URL."""
+    return f"{settings.SITE_URL.rstrip('/')}{path}"
+
+
+def _write_file(path: str, content: bytes, compress: bool = False):
+    """
+    Write a file atomically, optionally gzip-compressed.
+
+    The gzip timestamp is fixed so unchanged content produces identical
+    bytes.
+    """
+    if compress:
+        content = gzip.compress(content, mtime=0)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _urlset(entries) -> bytes:
+    """
+    Render a ``<urlset>`` document.
+
+    Args:
+        entries: Iterable of (location, lastmod or None, priority) tuples
+
+    Returns:
+        bytes: UTF-8 encoded XML
+    """
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<urlset xmlns="{SITEMAP_NS}">',
+    ]
+    for location, lastmod, priority in entries:
+        lines.append(f'<url><loc>{escape(location)}</loc>')
+        if lastmod:
+            lines.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+        lines.append(f'<priority>{priority}</priority></url>')
+    lines.append('</urlset>')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def _sitemap_index(shards: List[Dict]) -> bytes:
+    """Render the ``<sitemapindex>`` document listing every shard."""
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<sitemapindex xmlns="{SITEMAP_NS}">',
+    ]
+    for shard in shards:
+        location = _absolute(reverse('sitemap_file', args=[shard['file']]))
+        lines.append(f'<sitemap><loc>{escape(location)}</loc>')
+        if shard.get('lastmod'):
+            lines.append(f"<lastmod>{shard['lastmod'][:10]}</lastmod>")
+        lines.append('</sitemap>')
+    lines.append('</sitemapindex>')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def _load_manifest(root: str) -> Dict:
+    """Read the manifest of the previous run, if any."""
+    try:
+        with open(os.path.join(root, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _plan_shards(rows: List, starts: List[str], size: int) -> List[List]:
+    """
+    Assign books to shards by key range and rebalance the ranges.
+
+    Args:
+        rows: (pk string, updated_at) pairs sorted by primary key
+        starts: First key of each shard from the previous run
+        size: Target number of books per shard
+
+    Returns:
+        List of shards, each a list of rows
+    """
+    if not starts:
+        return [rows[i:i + size] for i in range(0, len(rows), size)] or [[]]
+
+    # The first shard always starts at the lowest possible key
+    starts = [''] + sorted(starts)[1:]
+    shards = [[] for _ in starts]
+    for row in rows:
+        shards[bisect_right(starts, row[0]) - 1].append(row)
+
+    planned = []
+    for shard in shards:
+        if len(shard) > size * 2:
+            planned.extend(shard[i:i + size] for i in range(0, len(shard), size))
+        elif shard or not planned:
+            planned.append(shard)
+    return planned
+
+
+def generate_sitemaps(force: bool = False, size: Optional[int] = None) -> Dict:
+    """
+    Write the sitemap index and any shards whose books changed.
+
+    Args:
+        force: Rewrite every shard and rebalance from scratch
+        size: Target number of books per shard (defaults to
+            SITEMAP_SHARD_SIZE)
+
+    Returns:
+        dict: Counts of books, shards, and shards written and removed
+    """
+    size = size or getattr(settings, 'SITEMAP_SHARD_SIZE', 5000)
+    root = _sitemap_root()
+    os.makedirs(root, exist_ok=True)
+    previous = {} if force else _load_manifest(root)
+    previous_shards = {shard['file']: shard for shard in previous.get('shards', [])}
+
+    rows = [
+        (str(pk), updated_at)
+        for pk, updated_at in Book.objects.filter(is_available=True)
+        .order_by('pk').values_list('pk', 'updated_at').iterator(chunk_size=5000)
+    ]
+    rows.sort(key=lambda row: row[0])
+    planned = _plan_shards(
+        rows, [shard['start'] for shard in previous.get('shards', []) if 'start' in shard], size
+    )
+
+    shards = []
+    written = 0
+    for number, shard_rows in enumerate(planned, start=1):
+        filename = f'sitemap-books-{number:04d}.xml.gz'
+        fingerprint = hashlib.sha1(
+            ''.join(f'{pk}:{updated_at.isoformat()}\n' for pk, updated_at in shard_rows)
+            .encode('utf-8')
+        ).hexdigest()
+        lastmod = max((updated_at for _, updated_at in shard_rows), default=None)
+        shard = {
+            'file': filename,
+            'start': shard_rows[0][0] if shard_rows else '',
+            'count': len(shard_rows),
+            'fingerprint': fingerprint,
+            'lastmod': lastmod.isoformat() if lastmod else None,
+        }
+        shards.append(shard)
+
+        old = previous_shards.get(filename)
+        path = os.path.join(root, filename)
+        if old and old['fingerprint'] == fingerprint and os.path.exists(path):
+            continue
+        _write_file(path, _urlset(
+            (_absolute(reverse('books:book_detail', args=[pk])), updated_at, 0.7)
+            for pk, updated_at in shard_rows
+        ), compress=True)
+        written += 1
+
+    # Static pages are few and cheap, so they are always rewritten
+    static_file = 'sitemap-static.xml.gz'
+    static_sitemap = StaticViewSitemap()
+    _write_file(os.path.join(root, static_file), _urlset(
+        (_absolute(static_sitemap.location(item)), None, static_sitemap.priority)
+        for item in static_sitemap.items()
+    ), compress=True)
+
+    _write_file(
+        os.path.join(root, INDEX_NAME),
+        _sitemap_index([{'file': static_file}] + shards),
+    )
+    _write_file(
+        os.path.join(root, MANIFEST_NAME),
+        json.dumps({'shard_size': size, 'shards': shards}, indent=2).encode('utf-8'),
+    )
+
+    removed = 0
+    current = {shard['file'] for shard in shards} | {static_file}
+    for filename in os.listdir(root):
+        if filename.startswith('sitemap-books-') and filename not in current:
+            os.remove(os.path.join(root, filename))
+            removed += 1
+
+    return {
+        'books': len(rows),
+        'shards': len(shards),
+        'written': written,
+        'removed': removed,
+    }
+
+
+def sitemap_index(request):
+    """
+    Serve the pre-generated sitemap index.
+
+    Falls back to rendering the sitemap on demand until
+    ``generate_sitemaps`` has written the index.
+
+    Args:
+        request: The HTTP request object
+
+    Returns:
+        HttpResponse: The sitemap index or the on-demand sitemap
+    """
+    root = _sitemap_root()
+    if os.path.exists(os.path.join(root, INDEX_NAME)):
+        return serve(request, INDEX_NAME, document_root=root)
+    return sitemap(request, sitemaps)
+
+
+def sitemap_file(request, filename):
+    """
+    Serve a pre-compressed sitemap shard.
+
+    Args:
+        request: The HTTP request object
+        filename: Shard file name, e.g. ``sitemap-books-0001.xml.gz``
+
+    Returns:
+        FileResponse: The gzip file with Last-Modified set
+
+    Raises:
+        Http404: If the shard does not exist
+    """
+    if not (filename.startswith('sitemap-') and filename.endswith('.xml.gz')):
+        raise Http404("Unknown sitemap")
+    return serve(request, filename, document_root=_sitemap_root())
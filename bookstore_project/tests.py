@@ -0,0 +1,191 @@
+"""
+Tests for the bookstore project's shared infrastructure.
+"""
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from books import conditional
+from books.models import Book
+from bookstore_project import db_router
+from bookstore_project.cache import bump_namespace
+from bookstore_project.exports import EXPORTS, stream_export
+from cart.models import Cart, CartItem
+
+# Returned for the catalogue's last change outside the bump tests, so
+# reads are not kept on the primary by a recent change
+LONG_AGO = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Catalogue reads of read-only views go to the replica, everything else
+    to the primary.
+
+    The replica is a second SQLite file holding a copy of the primary.
+    Changes made after the copy tell which database served a page.
+    """
+
+    databases = {'default'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='reader', email='reader@example.com', password='secret'
+        )
+        self.book = Book.objects.create(
+            title='Replica Title', price=Decimal('9.99'), stock_quantity=5
+        )
+
+        fd, self.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        primary = connections[db_router.PRIMARY]
+        primary.ensure_connection()
+        target = sqlite3.connect(self.replica_path)
+        primary.connection.backup(target)
+        target.close()
+        connections.settings[db_router.REPLICA] = dict(
+            copy.deepcopy(connections.settings[db_router.PRIMARY]),
+            NAME=self.replica_path,
+        )
+
+        Book.objects.filter(pk=self.book.pk).update(title='Primary Title')
+        self.url = reverse('books:book_detail', args=[self.book.pk])
+
+        patcher = mock.patch(
+            'bookstore_project.middleware.catalogue_changed_at',
+            return_value=LONG_AGO,
+        )
+        self.changed_at = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        connections[db_router.REPLICA].close()
+        del connections[db_router.REPLICA]
+        del connections.settings[db_router.REPLICA]
+        os.remove(self.replica_path)
+        cache.clear()
+
+    def get(self, url):
+        """GET a page, returning the response and the replica's queries."""
+        with CaptureQueriesContext(connections[db_router.REPLICA]) as queries:
+            response = self.client.get(url)
+        return response, len(queries)
+
+    def test_catalogue_view_reads_from_replica(self):
+        response, replica_queries = self.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Replica Title')
+        self.assertGreater(replica_queries, 0)
+
+    @override_settings(API_STREAM_PAGE_SIZE=1)
+    def test_streamed_api_page_reads_from_replica(self):
+        response, _ = self.get(reverse('books:api_book_list') + '?fields=title')
+        self.assertTrue(response.streaming)
+        with CaptureQueriesContext(connections[db_router.REPLICA]) as queries:
+            body = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(body['results'], [{'title': 'Replica Title'}])
+        self.assertGreater(len(queries), 0)
+
+    def test_writes_stay_on_primary(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connections[db_router.REPLICA]) as queries:
+            response = self.client.post(
+                reverse('cart:add_to_cart', args=[self.book.pk])
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(self.user.cart.items.get().book_id, self.book.pk)
+
+    def test_unlisted_view_reads_from_primary(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, book=self.book, quantity=1)
+        self.client.force_login(self.user)
+
+        response, replica_queries = self.get(reverse('cart:cart_detail'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Primary Title')
+        self.assertEqual(replica_queries, 0)
+
+    def test_reads_stay_on_primary_after_a_post(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('cart:add_to_cart', args=[self.book.pk]))
+
+        response, replica_queries = self.get(self.url)
+        self.assertContains(response, 'Primary Title')
+        self.assertEqual(replica_queries, 0)
+
+    def test_reads_stay_on_primary_after_a_catalogue_change(self):
+        self.changed_at.side_effect = conditional.catalogue_changed_at
+        bump_namespace('books')
+
+        response, replica_queries = self.get(self.url)
+        self.assertContains(response, 'Primary Title')
+        self.assertEqual(replica_queries, 0)
+
+
+class NoReplicaTests(TransactionTestCase):
+    """Without a replica, everything reads from the primary."""
+
+    databases = {'default'}
+
+    def test_router_falls_back_to_primary(self):
+        self.assertFalse(db_router.replica_configured())
+        with db_router.read_from_replica():
+            self.assertEqual(
+                db_router.ReplicaRouter().db_for_read(Book), db_router.PRIMARY
+            )
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_catalogue_view_reads_from_primary(self):
+        cache.clear()
+        book = Book.objects.create(
+            title='Only Title', price=Decimal('9.99'), stock_quantity=5
+        )
+        with mock.patch(
+            'bookstore_project.middleware.catalogue_changed_at',
+            return_value=LONG_AGO,
+        ):
+            response = self.client.get(
+                reverse('books:book_detail', args=[book.pk])
+            )
+        self.assertContains(response, 'Only Title')
+
+
+class ExportTests(TestCase):
+    """Exports keep user-entered text from running as spreadsheet formulas."""
+
+    FORMULA = '=HYPERLINK("http://example.com", "Click")'
+
+    def setUp(self):
+        get_user_model().objects.create_user(
+            username='reader', email='reader@example.com', first_name=self.FORMULA
+        )
+        Book.objects.create(title='-2+3 Tricks', price=Decimal('9.99'))
+
+    def export(self, name, fmt):
+        model = EXPORTS[name].model
+        return b''.join(
+            stream_export(EXPORTS[name], model.objects.all(), fmt)
+        ).decode()
+
+    def test_csv_escapes_formulas(self):
+        self.assertIn("'=HYPERLINK", self.export('users', 'csv'))
+        self.assertIn("'-2+3 Tricks", self.export('books', 'csv'))
+
+    def test_jsonl_keeps_text_as_is(self):
+        row = json.loads(self.export('users', 'jsonl'))
+        self.assertEqual(row['first_name'], self.FORMULA)
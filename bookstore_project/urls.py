@@ -6,8 +6,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
-from django.contrib.sitemaps.views import sitemap
-from bookstore_project.sitemaps import sitemaps
+from bookstore_project.sitemaps import sitemap_file, sitemap_index
 from books.views import home
 
 from django.http import HttpResponse
@@ -38,7 +37,8 @@ urlpatterns = [
     
     # SEO URLs
     path('robots.txt', TemplateView.as_view(template_name='robots.txt', content_type='text/plain'), name='robots'),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemap_index, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemaps/<str:filename>', sitemap_file, name='sitemap_file'),
 ]
 
 # Custom error handlers
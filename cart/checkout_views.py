@@ -13,14 +13,21 @@ from decimal import Decimal
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import JsonResponse
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
-from cart.models import Cart
-from orders.models import Order, OrderItem
-from books.models import Book
+from cart.summary import refresh_cart_summary
+from orders.inventory import (
+    InsufficientStockError, check_cart, release_reservations, reserve_cart,
+)
+from orders.numbers import next_order_number
+from orders.webhooks import record_event
+from orders.services import (
+    cart_totals, create_order_from_cart, load_cart_items, stock_error_message,
+)
 
 
 # Configure logging
@@ -37,7 +44,8 @@ def hardwired_checkout(request):
     
     This view handles the display of the checkout form with all necessary
     context for payment processing, including cart items, total amount,
-    and Stripe configuration.
+    and Stripe configuration. The cart is checked against the stock, which
+    is only reserved once the customer pays.
     
     Args:
         request: The HTTP request object containing user and session data.
@@ -49,20 +57,23 @@ def hardwired_checkout(request):
         Http404: If user's cart is not found or is empty.
     """
     try:
-        # Get user's cart
-        cart = get_object_or_404(Cart, user=request.user)
-        cart_items = cart.items.all()
+        # Get user's cart with books loaded
+        cart_items = load_cart_items(request.user)
         
-        if not cart_items.exists():
+        if not cart_items:
             messages.warning(request, 'Your cart is empty.')
             return redirect('cart:cart_detail')
         
+        # Send the customer back to the cart if a book has run out
+        try:
+            check_cart(request.user, cart_items)
+        except InsufficientStockError as e:
+            messages.error(request, stock_error_message(e, cart_items))
+            return redirect('cart:cart_detail')
+        
         # Calculate totals
-        subtotal = sum(
-            item.book.price * item.quantity for item in cart_items
-        )
-        shipping = Decimal('0.00')  # Free shipping  # Fixed shipping cost
-        total = subtotal + shipping
+        shipping = Decimal('0.00')  # Free shipping
+        subtotal, total = cart_totals(cart_items, shipping)
         
         # Convert to pence for Stripe (multiply by 100)
         stripe_total = int(total * 100)
@@ -101,7 +112,10 @@ def process_hardwired_payment(request):
     
     This view handles the server-side payment processing using Stripe's
     Payment Intent API, creates the order upon successful payment,
-    and clears the user's cart.
+    clears the user's cart and queues the confirmation email, all in
+    one transaction. The cart's stock is reserved before the card is
+    charged and released if the payment fails; if the stock has run out
+    by the time a slow payment succeeds, the payment is refunded.
     
     Args:
         request: The HTTP request object containing payment data.
@@ -111,11 +125,10 @@ def process_hardwired_payment(request):
                      appropriate error messages.
     """
     try:
-        # Get user's cart
-        cart = get_object_or_404(Cart, user=request.user)
-        cart_items = cart.items.all()
+        # Get user's cart with books and authors loaded once
+        cart_items = load_cart_items(request.user)
         
-        if not cart_items.exists():
+        if not cart_items:
             logger.warning(f"Empty cart for user {request.user.id}")
             return JsonResponse({
                 'success': False,
@@ -123,11 +136,8 @@ def process_hardwired_payment(request):
             })
         
         # Calculate totals
-        subtotal = sum(
-            item.book.price * item.quantity for item in cart_items
-        )
         shipping = Decimal('0.00')  # Free shipping
-        total = subtotal + shipping
+        subtotal, total = cart_totals(cart_items, shipping)
         stripe_total = int(total * 100)  # Convert to pence
         
         # Get payment method ID from request
@@ -141,6 +151,15 @@ def process_hardwired_payment(request):
                 'error': 'Payment method is required.'
             })
         
+        # Make sure the stock is still held before charging the card
+        try:
+            reserve_cart(request.user, cart_items)
+        except InsufficientStockError as e:
+            return JsonResponse({
+                'success': False,
+                'error': stock_error_message(e, cart_items)
+            })
+        
         logger.info(
             f"Processing payment for user {request.user.id}. "
             f"Amount: {stripe_total}p, Payment method: {payment_method_id}"
@@ -168,12 +187,14 @@ def process_hardwired_payment(request):
             
         except stripe.error.CardError as e:
             logger.error(f"Stripe card error: {str(e)}")
+            release_reservations(request.user)
             return JsonResponse({
                 'success': False,
                 'error': f'Card error: {e.user_message}'
             })
         except stripe.error.StripeError as e:
             logger.error(f"Stripe API error: {str(e)}")
+            release_reservations(request.user)
             return JsonResponse({
                 'success': False,
                 'error': 'Payment processing error. Please try again.'
@@ -193,45 +214,34 @@ def process_hardwired_payment(request):
         elif intent.status == 'succeeded':
             logger.info(f"Payment succeeded: {intent.id}")
             
-            # Create order with correct field names
+            # Create the order, its items and clear the cart in one transaction
             try:
-                order = Order.objects.create(
-                    user=request.user,
-                    stripe_payment_intent_id=intent.id,  # Correct field name
-                    total_amount=total,
-                    status='confirmed',  # Valid status from your choices
-                    payment_status='paid',  # Set payment status
-                    customer_email=request.user.email,
-                    customer_first_name=request.user.first_name or '',
-                    customer_last_name=request.user.last_name or '',
-                )
-                
-                # Create order items - let the save() method handle book details
-                for cart_item in cart_items:
-                    OrderItem.objects.create(
-                        order=order,
-                        book=cart_item.book,
-                        quantity=cart_item.quantity,
-                        unit_price=cart_item.book.price
+                # Taken first so the counter row is not locked for the
+                # whole transaction
+                order_number = next_order_number()
+                with transaction.atomic():
+                    order = create_order_from_cart(
+                        request.user,
+                        items=cart_items,
+                        shipping=shipping,
+                        order_number=order_number,
+                        stripe_payment_intent_id=intent.id,
+                        status='confirmed',
+                        payment_status='paid',
                     )
+                    refresh_cart_summary(request)
                 
-                # Clear cart
-                cart_items.delete()
+                    # Queue the confirmation email with the order
+                    email_queued = send_order_confirmation(order)
                 
                 logger.info(
                     f"Order created successfully: {order.id} "
                     f"for user {request.user.id}"
                 )
-                
-                # Send order confirmation email
-                try:
-                    email_sent = send_order_confirmation(order)
-                    if email_sent:
-                        logger.info(f"Order confirmation email sent for order {order.order_number}")
-                    else:
-                        logger.warning(f"Failed to send confirmation email for order {order.order_number}")
-                except Exception as e:
-                    logger.error(f"Error sending email for order {order.order_number}: {e}")
+                if email_queued:
+                    logger.info(f"Order confirmation email queued for order {order.order_number}")
+                else:
+                    logger.warning(f"Failed to queue confirmation email for order {order.order_number}")
                 
                 return JsonResponse({
                     'success': True,
@@ -240,6 +250,35 @@ def process_hardwired_payment(request):
                     'redirect_url': f'/orders/{order.order_number}/success/'
                 })
                 
+            except InsufficientStockError as e:
+                # The reservation expired during a slow payment and the
+                # stock has gone since: the card was charged, so refund it
+                logger.error(
+                    f"Stock ran out after payment {intent.id} for user "
+                    f"{request.user.id}: {e}"
+                )
+                release_reservations(request.user)
+                try:
+                    stripe.Refund.create(payment_intent=intent.id)
+                except stripe.error.StripeError as refund_error:
+                    logger.error(
+                        f"Refund of payment {intent.id} failed: {refund_error}"
+                    )
+                    return JsonResponse({
+                        'success': False,
+                        'error': (
+                            f'{stock_error_message(e, cart_items)} Your payment '
+                            'could not be refunded automatically; please '
+                            'contact support.'
+                        )
+                    })
+                return JsonResponse({
+                    'success': False,
+                    'error': (
+                        f'{stock_error_message(e, cart_items)} Your payment '
+                        'has been refunded.'
+                    )
+                })
             except Exception as e:
                 logger.error(f"Error creating order: {str(e)}")
                 return JsonResponse({
@@ -248,6 +287,7 @@ def process_hardwired_payment(request):
                 })
         else:
             logger.error(f"Unexpected payment status: {intent.status}")
+            release_reservations(request.user)
             return JsonResponse({
                 'success': False,
                 'error': f'Payment failed with status: {intent.status}'
@@ -271,10 +311,11 @@ def process_hardwired_payment(request):
 @require_POST
 def stripe_webhook(request):
     """
-    Handle Stripe webhook events.
+    Receive Stripe webhook events.
     
-    This view processes webhook events from Stripe to handle various
-    payment-related events and update order statuses accordingly.
+    Verified events are recorded in the webhook ledger and acknowledged
+    straight away; the ``process_webhook_events`` worker applies them to
+    orders. Events Stripe sends again are recorded only once.
     
     Args:
         request: The HTTP request object containing webhook data.
@@ -291,11 +332,8 @@ def stripe_webhook(request):
         return JsonResponse({'error': 'Webhook not configured'}, status=400)
     
     try:
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, endpoint_secret
-        )
-        logger.info(f"Stripe webhook received: {event['type']}")
-        
+        stripe.Webhook.construct_event(payload, sig_header, endpoint_secret)
+        event = json.loads(payload)
     except ValueError:
         logger.error("Invalid payload in Stripe webhook")
         return JsonResponse({'error': 'Invalid payload'}, status=400)
@@ -303,45 +341,5 @@ def stripe_webhook(request):
         logger.error("Invalid signature in Stripe webhook")
         return JsonResponse({'error': 'Invalid signature'}, status=400)
     
-    # Handle the event
-    if event['type'] == 'payment_intent.succeeded':
-        payment_intent = event['data']['object']
-        logger.info(f"Payment succeeded: {payment_intent['id']}")
-        
-        # Update order status if needed
-        try:
-            order = Order.objects.get(
-                stripe_payment_intent_id=payment_intent['id']  # Correct field name
-            )
-            if order.payment_status != 'paid':
-                order.payment_status = 'paid'
-                order.status = 'confirmed'
-                order.save()
-                logger.info(f"Order {order.id} status updated to paid")
-        except Order.DoesNotExist:
-            logger.warning(
-                f"Order not found for payment intent: {payment_intent['id']}"
-            )
-    
-    elif event['type'] == 'payment_intent.payment_failed':
-        payment_intent = event['data']['object']
-        logger.warning(f"Payment failed: {payment_intent['id']}")
-        
-        # Update order status
-        try:
-            order = Order.objects.get(
-                stripe_payment_intent_id=payment_intent['id']  # Correct field name
-            )
-            order.payment_status = 'failed'
-            order.status = 'cancelled'
-            order.save()
-            logger.info(f"Order {order.id} status updated to failed")
-        except Order.DoesNotExist:
-            logger.warning(
-                f"Order not found for failed payment: {payment_intent['id']}"
-            )
-    
-    else:
-        logger.info(f"Unhandled event type: {event['type']}")
-    
-    return JsonResponse({'status': 'success'})
\ No newline at end of file
+    record_event(event)
+    return JsonResponse({'status': 'success'})
@@ -0,0 +1,79 @@
+"""
+Session-stored cart summary for the cart application.
+
+The item count and subtotal shown in the navigation are denormalised
+into the user's session so that rendering a page costs no cart queries.
+Views that change the cart recompute the summary with a single aggregate
+query inside the same transaction as the change.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Sum
+
+from .models import CartItem
+
+SESSION_KEY = 'cart_summary'
+
+EMPTY_SUMMARY = {'count': 0, 'subtotal': '0.00'}
+
+
+def compute_cart_summary(user) -> dict:
+    """
+    Aggregate a user's cart in one query.
+
+    Args:
+        user: The cart owner
+
+    Returns:
+        dict: Item count and subtotal (as a string) of the cart
+    """
+    totals = CartItem.objects.filter(cart__user=user).aggregate(
+        count=Sum('quantity'),
+        subtotal=Sum(
+            F('quantity') * F('book__price'),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+    )
+    subtotal = Decimal(totals['subtotal'] or 0).quantize(Decimal('0.01'))
+    return {'count': totals['count'] or 0, 'subtotal': str(subtotal)}
+
+
+def refresh_cart_summary(request) -> dict:
+    """
+    Recompute the summary for the current user and store it in the session.
+
+    Call this from inside the transaction that modified the cart so the
+    stored summary matches what was committed.
+
+    Args:
+        request: The HTTP request object
+
+    Returns:
+        dict: The refreshed summary
+    """
+    if not request.user.is_authenticated:
+        return dict(EMPTY_SUMMARY)
+    summary = compute_cart_summary(request.user)
+    request.session[SESSION_KEY] = dict(summary, user_id=str(request.user.pk))
+    return summary
+
+
+def get_cart_summary(request) -> dict:
+    """
+    Return the stored cart summary for the current user.
+
+    The summary is computed once per session (e.g. just after login) and
+    then served from the session until the cart is next modified.
+
+    Args:
+        request: The HTTP request object
+
+    Returns:
+        dict: Item count and subtotal of the user's cart
+    """
+    if not request.user.is_authenticated:
+        return dict(EMPTY_SUMMARY)
+    summary = request.session.get(SESSION_KEY)
+    if not summary or summary.get('user_id') != str(request.user.pk):
+        return refresh_cart_summary(request)
+    return summary
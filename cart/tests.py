@@ -1,3 +1,84 @@
+"""
+Tests for the cart application.
+"""
+import json
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+import stripe
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from books.models import Book
+from orders.models import Order, StockReservation
+
+from .models import Cart, CartItem
+
+
+class PaymentStockTests(TestCase):
+    """Stock held for a payment is released or refunded when it fails."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='reader', email='reader@example.com', password='secret'
+        )
+        self.book = Book.objects.create(
+            title='Stock Book', price=Decimal('9.99'), stock_quantity=5
+        )
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, book=self.book, quantity=2)
+        self.client.force_login(self.user)
+
+    def pay(self):
+        return self.client.post(
+            reverse('cart:process_hardwired_payment'),
+            json.dumps({'payment_method_id': 'pm_test'}),
+            content_type='application/json',
+        ).json()
+
+    def assertStock(self, quantity):
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.stock_quantity, quantity)
+
+    @mock.patch('stripe.PaymentIntent.create')
+    def test_declined_card_releases_stock(self, create):
+        create.side_effect = stripe.error.CardError('Declined', None, 'card_declined')
+        self.assertFalse(self.pay()['success'])
+        self.assertStock(5)
+        self.assertFalse(StockReservation.objects.exists())
+
+    @mock.patch('stripe.PaymentIntent.create')
+    def test_stripe_error_releases_stock(self, create):
+        create.side_effect = stripe.error.APIConnectionError('Unreachable')
+        self.assertFalse(self.pay()['success'])
+        self.assertStock(5)
+
+    @mock.patch('stripe.PaymentIntent.create')
+    def test_successful_payment_takes_stock(self, create):
+        create.return_value = SimpleNamespace(id='pi_test', status='succeeded')
+        self.assertTrue(self.pay()['success'])
+        order = Order.objects.get()
+        self.assertEqual((order.payment_status, order.stock_taken), ('paid', True))
+        self.assertStock(3)
+        self.assertFalse(StockReservation.objects.exists())
+
+    @mock.patch('stripe.Refund.create')
+    @mock.patch('stripe.PaymentIntent.create')
+    def test_stock_gone_after_payment_is_refunded(self, create, refund):
+        def charge(**kwargs):
+            # The reservation lapsed and someone else bought the books
+            StockReservation.objects.all().delete()
+            Book.objects.filter(pk=self.book.pk).update(stock_quantity=1)
+            return SimpleNamespace(id='pi_test', status='succeeded')
+        create.side_effect = charge
 
-# Create your tests here.
+        result = self.pay()
+        self.assertFalse(result['success'])
+        self.assertIn('refunded', result['error'])
+        refund.assert_called_once_with(payment_intent='pi_test')
+        self.assertFalse(Order.objects.exists())
+        self.assertStock(1)
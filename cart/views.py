@@ -8,6 +8,7 @@ import json
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
@@ -15,6 +16,7 @@ from django.views.decorators.http import require_POST
 
 from books.models import Book
 from .models import Cart, CartItem
+from .summary import refresh_cart_summary
 
 
 @login_required
@@ -33,6 +35,9 @@ def cart_detail(request):
     """
     cart, created = Cart.objects.get_or_create(user=request.user)
     
+    # Resync the session summary with changes made in other sessions
+    refresh_cart_summary(request)
+    
     context = {
         'cart': cart,
         'cart_items': cart.items.select_related('book').all(),
@@ -70,34 +75,37 @@ def add_to_cart(request, book_id):
         )
         return redirect('books:book_detail', pk=book_id)
     
-    cart_item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        book=book,
-        defaults={'quantity': 1}
-    )
-    
-    if not created:
-        # Item already in cart, increase quantity
-        if cart_item.quantity < book.stock_quantity:
-            cart_item.quantity += 1
-            cart_item.save()
-            messages.success(
-                request,
-                f"Added another '{book.title}' to your cart."
-            )
+    with transaction.atomic():
+        cart_item, created = CartItem.objects.get_or_create(
+            cart=cart,
+            book=book,
+            defaults={'quantity': 1}
+        )
+        
+        if not created:
+            # Item already in cart, increase quantity
+            if cart_item.quantity < book.stock_quantity:
+                cart_item.quantity += 1
+                cart_item.save()
+                messages.success(
+                    request,
+                    f"Added another '{book.title}' to your cart."
+                )
+            else:
+                messages.warning(
+                    request,
+                    f"Cannot add more '{book.title}' - maximum stock reached."
+                )
         else:
-            messages.warning(
-                request,
-                f"Cannot add more '{book.title}' - maximum stock reached."
-            )
-    else:
-        messages.success(request, f"'{book.title}' added to your cart!")
+            messages.success(request, f"'{book.title}' added to your cart!")
+        
+        summary = refresh_cart_summary(request)
     
     # Return JSON for AJAX requests
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
             'success': True,
-            'cart_count': cart.total_items,
+            'cart_count': summary['count'],
             'message': f"'{book.title}' added to cart!"
         })
     
@@ -125,25 +133,27 @@ def update_cart_item(request, item_id):
     try:
         quantity = int(request.POST.get('quantity', 1))
         
-        if quantity <= 0:
-            cart_item.delete()
-            messages.success(
-                request,
-                f"'{cart_item.book.title}' removed from cart."
-            )
-        elif quantity <= cart_item.book.stock_quantity:
-            cart_item.quantity = quantity
-            cart_item.save()
-            messages.success(
-                request,
-                f"Updated '{cart_item.book.title}' quantity."
-            )
-        else:
-            messages.error(
-                request,
-                f"Cannot add {quantity} items - only "
-                f"{cart_item.book.stock_quantity} in stock."
-            )
+        with transaction.atomic():
+            if quantity <= 0:
+                cart_item.delete()
+                messages.success(
+                    request,
+                    f"'{cart_item.book.title}' removed from cart."
+                )
+            elif quantity <= cart_item.book.stock_quantity:
+                cart_item.quantity = quantity
+                cart_item.save()
+                messages.success(
+                    request,
+                    f"Updated '{cart_item.book.title}' quantity."
+                )
+            else:
+                messages.error(
+                    request,
+                    f"Cannot add {quantity} items - only "
+                    f"{cart_item.book.stock_quantity} in stock."
+                )
+            refresh_cart_summary(request)
             
     except ValueError:
         messages.error(request, "Invalid quantity specified.")
@@ -169,16 +179,17 @@ def remove_from_cart(request, item_id):
     """
     cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
     book_title = cart_item.book.title
-    cart_item.delete()
+    with transaction.atomic():
+        cart_item.delete()
+        summary = refresh_cart_summary(request)
     
     messages.success(request, f"'{book_title}' removed from your cart.")
     
     # Return JSON for AJAX requests
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        cart = Cart.objects.get(user=request.user)
         return JsonResponse({
             'success': True,
-            'cart_count': cart.total_items,
+            'cart_count': summary['count'],
             'message': f"'{book_title}' removed from cart."
         })
     
@@ -200,7 +211,9 @@ def clear_cart(request):
     """
     try:
         cart = Cart.objects.get(user=request.user)
-        cart.items.all().delete()
+        with transaction.atomic():
+            cart.items.all().delete()
+            refresh_cart_summary(request)
         messages.success(request, "Your cart has been cleared.")
     except Cart.DoesNotExist:
         pass
@@ -7,15 +7,15 @@ and unsubscription functionality with double opt-in system.
 
 import logging
 
-from django.conf import settings
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.html import strip_tags
 
+from outbox.services import enqueue_email
+
 from .models import NewsletterSubscriber
 
 
@@ -70,7 +70,7 @@ def send_confirmation_email(subscriber, request):
     """
     Send confirmation email to new newsletter subscriber.
     
-    Generates confirmation URL and sends HTML/plain text email
+    Generates confirmation URL and queues an HTML/plain text email
     with subscription confirmation link.
     """
     confirmation_url = request.build_absolute_uri(
@@ -89,13 +89,12 @@ def send_confirmation_email(subscriber, request):
     )
     plain_message = strip_tags(html_message)
     
-    send_mail(
+    enqueue_email(
         subject='🐕 Confirm your Tales & Tails newsletter subscription',
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[subscriber.email],
-        html_message=html_message,
-        fail_silently=False,
+        body=plain_message,
+        to=[subscriber.email],
+        html_body=html_message,
+        category='newsletter_confirmation',
     )
 
 
@@ -133,7 +132,7 @@ def send_welcome_email(subscriber):
     """
     Send welcome email to confirmed newsletter subscriber.
     
-    Sends branded welcome message with HTML/plain text versions
+    Queues branded welcome message with HTML/plain text versions
     to newly confirmed subscribers.
     """
     context = {'subscriber': subscriber}
@@ -143,13 +142,12 @@ def send_welcome_email(subscriber):
     )
     plain_message = strip_tags(html_message)
     
-    send_mail(
+    enqueue_email(
         subject='🐾 Welcome to Tales & Tails Newsletter!',
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[subscriber.email],
-        html_message=html_message,
-        fail_silently=False,
+        body=plain_message,
+        to=[subscriber.email],
+        html_body=html_message,
+        category='newsletter_welcome',
     )
 
 
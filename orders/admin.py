@@ -4,8 +4,10 @@ Admin configuration for the orders application.
 This module defines Django admin interfaces for managing orders and order items,
 including custom admin views, inlines, and optimised querysets.
 """
-from django.contrib import admin
-from .models import Order, OrderItem
+from django.contrib import admin, messages
+from bookstore_project.exports import EXPORT_ACTIONS, ExportActionsMixin
+from .inventory import InsufficientStockError, settle_order
+from .models import Order, OrderItem, StockReservation, StripeWebhookEvent
 
 
 class OrderItemInline(admin.TabularInline):
@@ -36,13 +38,15 @@ class OrderItemInline(admin.TabularInline):
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(ExportActionsMixin, admin.ModelAdmin):
     """
     Admin configuration for the Order model.
     
     Provides a comprehensive interface for managing orders, including
     list display, filtering, search capabilities, and field organisation.
-    Includes order items as inline elements.
+    Includes order items as inline elements and CSV/JSON Lines exports.
+    Changing an order's status or payment status takes or hands back its
+    stock.
     """
     list_display = [
         'order_number', 'user', 'status', 'payment_status',
@@ -53,13 +57,20 @@ class OrderAdmin(admin.ModelAdmin):
         'order_number', 'user__username', 'user__email', 'customer_email'
     ]
     readonly_fields = [
-        'order_number', 'created_at', 'updated_at', 'confirmed_at', 'total_price'
+        'order_number', 'stock_taken', 'created_at', 'updated_at',
+        'confirmed_at', 'total_price'
     ]
     inlines = [OrderItemInline]
     
+    export_name = 'orders'
+    actions = EXPORT_ACTIONS
+    
     fieldsets = (
         ('Order Information', {
-            'fields': ('order_number', 'user', 'status', 'total_amount', 'total_price')
+            'fields': (
+                'order_number', 'user', 'status', 'total_amount', 'total_price',
+                'stock_taken'
+            )
         }),
         ('Customer Information', {
             'fields': ('customer_email', 'customer_first_name', 'customer_last_name')
@@ -74,6 +85,29 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     )
     
+    def save_related(self, request, form, formsets, change):
+        """
+        Save the order's items, then settle its stock for a new status.
+        
+        Args:
+            request: The HTTP request object
+            form: The order form
+            formsets: The inline formsets
+            change: True when editing an existing order
+        """
+        super().save_related(request, form, formsets, change)
+        if not change or not {'status', 'payment_status'} & set(form.changed_data):
+            return
+        try:
+            settle_order(form.instance)
+        except InsufficientStockError as e:
+            self.message_user(
+                request,
+                f"Order {form.instance.order_number} was saved, but its stock "
+                f"could not be taken: {e}",
+                level=messages.ERROR,
+            )
+    
     def get_queryset(self, request):
         """
         Optimise the queryset for the admin list view.
@@ -121,4 +155,56 @@ class OrderItemAdmin(admin.ModelAdmin):
             QuerySet: Optimised order item queryset
         """
         return super().get_queryset(request).select_related('order', 'book')
-        
\ No newline at end of file
+        
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the StockReservation model.
+    
+    Lists the stock currently held by customers at checkout. Reservations
+    are read-only here; they are released by checkout or expired by the
+    ``expire_reservations`` command, which also hands back the stock.
+    """
+    list_display = ['book', 'user', 'order', 'quantity', 'expires_at', 'created_at']
+    search_fields = ['book__title', 'user__username', 'user__email']
+    list_select_related = ['book', 'user', 'order']
+    
+    def has_add_permission(self, request):
+        """Reservations are only created by checkout."""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Editing a reservation would desync it from the book's stock."""
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        """Deleting a reservation here would not hand its stock back."""
+        return False
+
+
+@admin.register(StripeWebhookEvent)
+class StripeWebhookEventAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the StripeWebhookEvent model.
+    
+    Shows the webhook ledger for inspecting deliveries and failures.
+    Events are recorded by the webhook view and applied by the
+    ``process_webhook_events`` command, so they are read-only here.
+    """
+    list_display = [
+        'event_id', 'event_type', 'payment_intent_id', 'status',
+        'attempts', 'received_at', 'processed_at'
+    ]
+    list_filter = ['status', 'event_type', 'received_at']
+    search_fields = ['event_id', 'payment_intent_id']
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        """Events are only recorded by the webhook view."""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Events are applied by the worker, not edited by hand."""
+        return False
@@ -2,16 +2,19 @@
 Email notification functions for the orders application.
 
 This module provides functions for sending order-related email notifications,
-such as order confirmations and shipping notifications.
+such as order confirmations and shipping notifications. Emails are queued
+in the outbox and delivered by the ``send_queued_emails`` worker.
 """
 import logging
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.db.models import prefetch_related_objects
 from decimal import Decimal
 from django.template.loader import render_to_string
 from django.urls import reverse
 
+from outbox.services import enqueue_email
+
 
 logger = logging.getLogger(__name__)
 
@@ -20,14 +23,15 @@ def send_order_confirmation(order):
     """
     Send order confirmation email to the customer.
     
-    Generates and sends an order confirmation email with order details
-    in both plain text and HTML formats (if a template exists).
+    Generates an order confirmation email with order details in both
+    plain text and HTML formats (if a template exists) and queues it in
+    the outbox. Call it inside the transaction that creates the order.
     
     Args:
         order: The Order object with customer and order information
         
     Returns:
-        bool: True if the email was sent successfully, False otherwise
+        bool: True if the email was queued successfully, False otherwise
     """
     if not order.user or not order.user.email:
         return False
@@ -36,7 +40,8 @@ def send_order_confirmation(order):
     site_url = getattr(settings, 'SITE_URL', 'https://127.0.0.1:8000')
     order_url = f"{site_url}{reverse('orders:order_detail', kwargs={'order_number': order.order_number})}"
     
-    # Calculate subtotal from order items
+    # Load items with their books once for the subtotal and the template
+    prefetch_related_objects([order], 'items__book')
     subtotal = sum(item.unit_price * item.quantity for item in order.items.all())
     shipping = Decimal('0.00')  # Free shipping
     
@@ -78,22 +83,18 @@ Thank you for shopping with Tales & Tails!
         logger.error(f"Error rendering HTML template: {str(e)}")
         html_content = None
     
-    # Send email
+    # Queue email
     try:
-        msg = EmailMultiAlternatives(
+        enqueue_email(
             subject=subject,
             body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
             to=[order.user.email],
+            html_body=html_content,
+            category='order_confirmation',
         )
-        
-        if html_content:
-            msg.attach_alternative(html_content, "text/html")
-        
-        msg.send()
         return True
     except Exception as e:
-        logger.error(f"Error sending order confirmation: {str(e)}")
+        logger.error(f"Error queueing order confirmation: {str(e)}")
         return False
 
 
@@ -101,14 +102,15 @@ def send_shipping_notification(order):
     """
     Send shipping notification email to the customer.
     
-    Generates and sends an email notifying the customer that their order
-    has been shipped, including tracking information if available.
+    Generates an email notifying the customer that their order has been
+    shipped, including tracking information if available, and queues it
+    in the outbox.
     
     Args:
         order: The Order object with shipping and customer information
         
     Returns:
-        bool: True if the email was sent successfully, False otherwise
+        bool: True if the email was queued successfully, False otherwise
     """
     if not order.user or not order.user.email:
         return False
@@ -126,7 +128,8 @@ def send_shipping_notification(order):
             f"{order.tracking_number}"
         )
     
-    # Calculate subtotal from order items
+    # Load items with their books once for the subtotal and the template
+    prefetch_related_objects([order], 'items__book')
     subtotal = sum(item.unit_price * item.quantity for item in order.items.all())
     shipping = Decimal('0.00')  # Free shipping
     
@@ -180,21 +183,17 @@ We hope you enjoy your books!
         logger.error(f"Error rendering HTML template: {str(e)}")
         html_content = None
     
-    # Send email
+    # Queue email
     try:
-        msg = EmailMultiAlternatives(
+        enqueue_email(
             subject=subject,
             body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
             to=[order.user.email],
+            html_body=html_content,
+            category='shipping_notification',
         )
-        
-        if html_content:
-            msg.attach_alternative(html_content, "text/html")
-        
-        msg.send()
         return True
     except Exception as e:
-        logger.error(f"Error sending shipping notification: {str(e)}")
+        logger.error(f"Error queueing shipping notification: {str(e)}")
         return False
         
\ No newline at end of file
@@ -0,0 +1,376 @@
+"""
+Stock control for checkout.
+
+Stock is only ever changed with conditional ``UPDATE`` statements
+(``stock_quantity = stock_quantity - n WHERE stock_quantity >= n``), so
+the database row lock taken by the update, not a Python-side read,
+decides whether a sale fits. When several books change together they
+are always updated in primary key order, which keeps two concurrent
+checkouts from locking the same rows in opposite orders and
+deadlocking.
+
+The checkout page only checks the cart against the stock with
+``check_cart``. Paying reserves the cart with ``reserve_cart``: the
+stock is taken immediately and recorded as ``StockReservation`` rows
+that expire after ``STOCK_RESERVATION_TTL`` seconds. Placing the order settles the
+reservations against the final cart with ``commit_cart``. Abandoned
+reservations are handed back by the ``expire_reservations`` command,
+and also by the next checkout that wants the same books, so a stopped
+sweeper never makes stock unavailable at checkout.
+
+Orders placed before they are paid hold their stock with reservations
+bound to the order (``reserve_cart(..., order=order)``), which expire
+like any other. ``settle_order`` keeps an order's stock once it is paid
+and hands it back when the order is cancelled or its payment fails;
+``Order.stock_taken`` records which orders hold stock outright.
+
+``QuerySet.update`` skips model signals, so each function invalidates
+the catalogue cache itself once its transaction commits. Only a book
+going in or out of stock changes listings and bumps the whole ``books``
+namespace; other changes only bump the book's ``stock_scope``, which
+versions the stock count shown on its detail page.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from books.models import Book
+from bookstore_project.cache import bump_namespace, stock_scope
+from .models import Order, StockReservation
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientStockError(Exception):
+    """Raised when there is not enough stock to cover a request."""
+
+    def __init__(self, book_id, requested):
+        self.book_id = book_id
+        self.requested = requested
+        super().__init__(
+            f"Not enough stock for book {book_id} (requested {requested})"
+        )
+
+
+def _quantities(items: Iterable) -> Dict:
+    """
+    Sum the quantities of cart or order lines per book.
+
+    Args:
+        items: Objects with ``book_id`` and ``quantity`` attributes
+
+    Returns:
+        dict: Mapping of book ID to total quantity
+    """
+    totals = defaultdict(int)
+    for item in items:
+        totals[item.book_id] += item.quantity
+    return totals
+
+
+def _invalidate_stock(changes: Dict) -> None:
+    """
+    Invalidate the cached stock of books after the transaction commits.
+
+    Call this after the changes are applied, while their rows are still
+    locked, so the stock read back is the result of the changes.
+
+    Args:
+        changes: Mapping of book ID to the change in stock
+    """
+    changes = {book_id: delta for book_id, delta in changes.items() if delta}
+    if not changes:
+        return
+    levels = Book.objects.filter(pk__in=changes).values_list('pk', 'stock_quantity')
+    # A book went out of stock if it is now empty, and back in if it was
+    flipped = any(
+        stock == (0 if changes[book_id] < 0 else changes[book_id])
+        for book_id, stock in levels
+    )
+
+    def bump():
+        if flipped:
+            bump_namespace('books')
+        else:
+            for book_id in changes:
+                bump_namespace('books', scope=stock_scope(book_id))
+
+    transaction.on_commit(bump)
+
+
+def adjust_stock(changes: Dict) -> None:
+    """
+    Apply stock changes per book in primary key order.
+
+    Negative changes only succeed while enough stock remains; if any of
+    them fails the surrounding transaction is rolled back.
+
+    Args:
+        changes: Mapping of book ID to the change in stock
+
+    Raises:
+        InsufficientStockError: If a book does not have enough stock
+    """
+    with transaction.atomic():
+        for book_id in sorted(changes):
+            delta = changes[book_id]
+            if delta < 0:
+                updated = Book.objects.filter(
+                    pk=book_id, stock_quantity__gte=-delta
+                ).update(stock_quantity=F('stock_quantity') + delta)
+                if not updated:
+                    raise InsufficientStockError(book_id, -delta)
+            elif delta > 0:
+                Book.objects.filter(pk=book_id).update(
+                    stock_quantity=F('stock_quantity') + delta
+                )
+        _invalidate_stock(changes)
+
+
+def _lock(reservations) -> List[StockReservation]:
+    """Lock and return reservations, in a stable order."""
+    if connection.features.has_select_for_update:
+        reservations = reservations.select_for_update()
+    return list(reservations.order_by('pk'))
+
+
+def _lock_reservations(user) -> List[StockReservation]:
+    """
+    Lock and return a user's current checkout reservations.
+
+    Expired reservations are included until they are settled, because
+    their stock has not been handed back yet. Callers delete
+    exactly the rows returned here, so stock held by a concurrent
+    request is never dropped without being accounted for. Reservations
+    of the user's unpaid orders belong to those orders and are left out.
+    """
+    return _lock(StockReservation.objects.filter(user=user, order__isnull=True))
+
+
+def _lock_expired(book_ids, own: List[StockReservation]) -> List[StockReservation]:
+    """
+    Lock and return the other expired reservations of some books.
+
+    Settling them together with the caller's own reservations hands their
+    stock back before availability is checked, in the same primary key
+    ordered update. Rows locked by a concurrent checkout or the sweeper
+    are skipped; that checkout hands them back instead.
+
+    Args:
+        book_ids: Books whose expired reservations are wanted
+        own: Reservations the caller already locked, left out here
+    """
+    if not book_ids:
+        return []
+    expired = StockReservation.objects.filter(
+        book_id__in=book_ids, expires_at__lte=timezone.now()
+    ).exclude(pk__in=[reservation.pk for reservation in own]).order_by('pk')
+    if connection.features.has_select_for_update_skip_locked:
+        expired = expired.select_for_update(skip_locked=True)
+    return list(expired)
+
+
+def _settle(
+    reservations: List[StockReservation], wanted: Dict, taken: Dict = None
+) -> None:
+    """
+    Move stock from what the reservations hold to what is wanted.
+
+    The reservations are deleted; their stock, and any stock already
+    ``taken`` outright, is kept where still wanted, any shortfall is
+    taken and any surplus is handed back.
+    """
+    held = _quantities(reservations)
+    for book_id, quantity in (taken or {}).items():
+        held[book_id] += quantity
+    adjust_stock({
+        book_id: held.get(book_id, 0) - wanted.get(book_id, 0)
+        for book_id in set(held) | set(wanted)
+    })
+    if reservations:
+        StockReservation.objects.filter(
+            pk__in=[reservation.pk for reservation in reservations]
+        ).delete()
+
+
+def check_cart(user, items: List) -> None:
+    """
+    Check that a cart fits the stock, without taking any.
+
+    Stock the user already holds counts towards their cart. The answer
+    is only advisory; ``reserve_cart`` makes the binding check.
+
+    Args:
+        user: The customer checking out
+        items: Cart lines with ``book_id`` and ``quantity``
+
+    Raises:
+        InsufficientStockError: If a book does not have enough stock
+    """
+    wanted = _quantities(items)
+    available = _quantities(
+        StockReservation.objects.filter(user=user, book_id__in=wanted)
+    )
+    for book_id, stock in Book.objects.filter(
+        pk__in=wanted
+    ).values_list('pk', 'stock_quantity'):
+        available[book_id] += stock
+    for book_id in sorted(wanted):
+        if wanted[book_id] > available[book_id]:
+            raise InsufficientStockError(book_id, wanted[book_id])
+
+
+def reserve_cart(
+    user, items: List, ttl: int = None, order: Order = None
+) -> List[StockReservation]:
+    """
+    Hold stock for a user's cart for the length of checkout.
+
+    Any earlier checkout reservations of the user are settled against
+    the new cart, so calling this again (e.g. when a declined payment is
+    retried) only moves the difference and extends the expiry.
+
+    Args:
+        user: The customer checking out
+        items: Cart lines with ``book_id`` and ``quantity``
+        ttl: Seconds the reservation lasts (defaults to
+            STOCK_RESERVATION_TTL)
+        order: Unpaid order the reservations are bound to, so the stock
+            stays held for it rather than for the user's next checkout
+
+    Returns:
+        List of the user's new StockReservation objects
+
+    Raises:
+        InsufficientStockError: If a book does not have enough stock
+    """
+    if ttl is None:
+        ttl = getattr(settings, 'STOCK_RESERVATION_TTL', 900)
+    wanted = _quantities(items)
+    expires_at = timezone.now() + timedelta(seconds=ttl)
+
+    with transaction.atomic():
+        own = _lock_reservations(user)
+        _settle(own + _lock_expired(list(wanted), own), wanted)
+        reservations = StockReservation.objects.bulk_create([
+            StockReservation(
+                user=user, order=order, book_id=book_id, quantity=quantity,
+                expires_at=expires_at,
+            )
+            for book_id, quantity in sorted(wanted.items())
+        ])
+
+    return reservations
+
+
+def commit_cart(user, items: List) -> None:
+    """
+    Take stock for an order, using the user's reservations first.
+
+    Books the user holds enough of need no further check; any shortfall
+    (e.g. the reservation already expired and was swept) is taken with a
+    conditional update, after other users' expired reservations of the
+    same books are handed back, and any surplus is handed back. The user's
+    reservations are removed. Call this inside the transaction that
+    creates the order.
+
+    Args:
+        user: The customer placing the order
+        items: Cart lines with ``book_id`` and ``quantity``
+
+    Raises:
+        InsufficientStockError: If a book does not have enough stock
+    """
+    wanted = _quantities(items)
+
+    with transaction.atomic():
+        own = _lock_reservations(user)
+        _settle(own + _lock_expired(list(wanted), own), wanted)
+
+
+def release_reservations(user) -> None:
+    """
+    Hand back all stock a user is holding for checkout.
+
+    Args:
+        user: The customer whose reservations are released
+    """
+    with transaction.atomic():
+        _settle(_lock_reservations(user), {})
+
+
+def settle_order(order: Order) -> None:
+    """
+    Take or hand back an order's stock after its status changed.
+
+    A paid order that is not cancelled keeps its stock: its reservations
+    are settled against its items and any shortfall (e.g. the
+    reservation expired before the payment came in) is taken. A
+    cancelled order or a failed payment hands back the stock the order
+    took and releases its reservations. Pending orders keep their
+    reservations. Call this in the transaction that saves the status.
+
+    Args:
+        order: The order, with its new status set
+
+    Raises:
+        InsufficientStockError: If a paid order's books no longer have
+            enough stock
+    """
+    if order.payment_status == 'paid' and order.status != 'cancelled':
+        keep = True
+    elif order.status == 'cancelled' or order.payment_status == 'failed':
+        keep = False
+    else:
+        return
+
+    with transaction.atomic():
+        orders = Order.objects.filter(pk=order.pk)
+        if connection.features.has_select_for_update:
+            orders = orders.select_for_update()
+        order.stock_taken = orders.values_list('stock_taken', flat=True).get()
+        if keep and order.stock_taken:
+            return
+
+        items = _quantities(order.items.all())
+        wanted = items if keep else {}
+        own = _lock(StockReservation.objects.filter(order=order))
+        _settle(
+            own + _lock_expired(list(wanted), own), wanted,
+            taken=items if order.stock_taken else None,
+        )
+        if order.stock_taken != keep:
+            orders.update(stock_taken=keep)
+            order.stock_taken = keep
+
+
+def expire_reservations(batch_size: int = 500) -> int:
+    """
+    Hand back the stock of one batch of expired reservations.
+
+    Args:
+        batch_size: Maximum number of reservations to expire
+
+    Returns:
+        int: Number of reservations expired
+    """
+    with transaction.atomic():
+        expired = StockReservation.objects.filter(
+            expires_at__lte=timezone.now()
+        ).order_by('expires_at')
+        if connection.features.has_select_for_update_skip_locked:
+            expired = expired.select_for_update(skip_locked=True)
+        batch = list(expired[:batch_size])
+        if not batch:
+            return 0
+
+        _settle(batch, {})
+
+    logger.info(f"Expired {len(batch)} stock reservations")
+    return len(batch)
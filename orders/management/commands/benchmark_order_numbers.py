@@ -0,0 +1,163 @@
+"""
+Management command to compare the random and sequence order number schemes
+"""
+
+import math
+import random
+import string
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, IntegrityError, connection
+
+from orders.models import Order, OrderNumberCounter
+from orders.numbers import format_order_number, next_sequence
+
+# Orders are numbered for a day no real order has, so the benchmark
+# neither uses up today's numbers nor clashes with real orders
+BENCHMARK_DAY = date(2000, 1, 1)
+
+RANDOM_SPACE = 36 ** 5
+
+
+def random_order_number(day):
+    """The previous scheme: five random characters, no retry."""
+    suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
+    return f"TT-{day:%Y%m%d}-{suffix}"
+
+
+def sequence_order_number(day):
+    """The current scheme: the day's counter in base 36."""
+    return format_order_number(day, next_sequence(day))
+
+
+SCHEMES = {
+    'random': random_order_number,
+    'sequence': sequence_order_number,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Create orders concurrently with the previous random order numbers '
+        'and the per-day sequence, and report throughput and collisions. '
+        'Creates and removes its own user and orders.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Number of concurrent checkouts (default: 8)'
+        )
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=250,
+            help='Orders created per worker and scheme (default: 250)'
+        )
+        parser.add_argument(
+            '--draws',
+            type=int,
+            default=100000,
+            help='Random numbers drawn in memory to count collisions at '
+                 'volume (default: 100000)'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        per_worker = options['orders']
+        run_id = uuid.uuid4().hex[:8]
+        User = get_user_model()
+        user = User.objects.create_user(
+            username=f'order-number-benchmark-{run_id}',
+            email=f'order-number-benchmark-{run_id}@example.com',
+        )
+
+        self.stdout.write(
+            f'{workers} workers x {per_worker} orders per scheme '
+            f'({connection.vendor})'
+        )
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite allows one writer at a time; run against PostgreSQL '
+                'for real concurrency numbers.'
+            ))
+
+        try:
+            for name, generate in SCHEMES.items():
+                self._run(name, generate, user, workers, per_worker)
+        finally:
+            Order.objects.filter(user=user).delete()
+            OrderNumberCounter.objects.filter(date=BENCHMARK_DAY).delete()
+            user.delete()
+
+        draws = options['draws']
+        numbers = Counter(random_order_number(BENCHMARK_DAY) for _ in range(draws))
+        duplicates = draws - len(numbers)
+        self.stdout.write(
+            f'random: {duplicates} duplicate numbers in {draws} draws for one '
+            f'day; chance of at least one failed checkout on a day with '
+            f'{draws} orders: {self._collision_chance(draws):.1%}'
+        )
+        for orders_per_day in (1000, 10000):
+            self.stdout.write(
+                f'random: chance on a day with {orders_per_day} orders: '
+                f'{self._collision_chance(orders_per_day):.1%}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'sequence: collisions impossible; numbers sort in issue order.'
+        ))
+
+    def _run(self, name, generate, user, workers, per_worker):
+        """Create orders from several threads with one scheme."""
+        def worker(_):
+            results = Counter()
+            try:
+                for _ in range(per_worker):
+                    try:
+                        Order.objects.create(
+                            order_number=generate(BENCHMARK_DAY),
+                            user=user,
+                            total_amount=Decimal('0.00'),
+                            customer_email=user.email,
+                            customer_first_name='Order',
+                            customer_last_name='Benchmark',
+                        )
+                        results['created'] += 1
+                    except IntegrityError:
+                        results['collisions'] += 1
+                    except DatabaseError:
+                        results['errors'] += 1
+            finally:
+                connection.close()
+            return results
+
+        Order.objects.filter(user=user).delete()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            totals = sum(pool.map(worker, range(workers)), Counter())
+        elapsed = time.perf_counter() - started
+
+        numbers = list(
+            Order.objects.filter(user=user).order_by('created_at', 'pk')
+            .values_list('order_number', flat=True)
+        )
+        self.stdout.write(
+            f'{name}: {totals["created"]} created, {totals["collisions"]} '
+            f'collisions, {totals["errors"]} errors in {elapsed:.2f}s '
+            f'({totals["created"] / elapsed if elapsed else 0:.1f} orders/s); '
+            f'{len(set(numbers))} distinct numbers, e.g. {numbers[-1] if numbers else "-"}'
+        )
+
+    @staticmethod
+    def _collision_chance(orders: int) -> float:
+        """Chance that two of a day's random order numbers are equal."""
+        return 1 - math.exp(-orders * (orders - 1) / (2 * RANDOM_SPACE))
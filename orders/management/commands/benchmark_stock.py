@@ -0,0 +1,148 @@
+"""
+Management command to measure checkout throughput on contended stock
+"""
+
+import time
+import uuid
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Sum
+
+from books.models import Book
+from orders.inventory import InsufficientStockError, commit_cart, reserve_cart
+from orders.models import StockReservation
+
+Line = namedtuple('Line', ['book_id', 'quantity'])
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent reserve-and-commit checkouts against the same titles '
+        'and report throughput and overselling. Creates and removes its own '
+        'books and users.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Number of concurrent customers (default: 8)'
+        )
+        parser.add_argument(
+            '--checkouts',
+            type=int,
+            default=50,
+            help='Checkouts attempted per customer (default: 50)'
+        )
+        parser.add_argument(
+            '--stock',
+            type=int,
+            default=200,
+            help='Starting stock of each title (default: 200)'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        checkouts = options['checkouts']
+        run_id = uuid.uuid4().hex[:8]
+
+        books = [
+            Book.objects.create(
+                title=f'Stock benchmark {run_id} {label}',
+                price=Decimal('1.00'),
+                stock_quantity=options['stock'],
+                is_available=False,  # Keep them off the storefront
+            )
+            for label in ('a', 'b')
+        ]
+        User = get_user_model()
+        users = [
+            User.objects.create_user(
+                username=f'stock-benchmark-{run_id}-{i}',
+                email=f'stock-benchmark-{run_id}-{i}@example.com',
+            )
+            for i in range(workers)
+        ]
+
+        # Half the customers list the titles in the opposite order, so
+        # lock ordering is exercised as well as contention on one row
+        carts = [
+            [Line(books[0].pk, 1), Line(books[1].pk, 1)],
+            [Line(books[1].pk, 1), Line(books[0].pk, 1)],
+        ]
+
+        def customer(index):
+            results = Counter()
+            user = users[index]
+            lines = carts[index % 2]
+            try:
+                for _ in range(checkouts):
+                    try:
+                        reserve_cart(user, lines)
+                        with transaction.atomic():
+                            commit_cart(user, lines)
+                        results['sold'] += 1
+                    except InsufficientStockError:
+                        results['sold_out'] += 1
+                    except DatabaseError:
+                        results['errors'] += 1
+            finally:
+                connection.close()
+            return results
+
+        self.stdout.write(
+            f'{workers} customers x {checkouts} checkouts of 2 titles '
+            f'with {options["stock"]} in stock each ({connection.vendor})'
+        )
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite allows one writer at a time and fails lock upgrades '
+                'instead of waiting; run against PostgreSQL for real numbers.'
+            ))
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                totals = sum(pool.map(customer, range(workers)), Counter())
+            elapsed = time.perf_counter() - started
+
+            # Checkouts that failed between reserving and committing
+            # leave their stock held by a reservation, not lost
+            remaining = [
+                Book.objects.get(pk=book.pk).stock_quantity
+                + (
+                    StockReservation.objects.filter(book=book)
+                    .aggregate(held=Sum('quantity'))['held'] or 0
+                )
+                for book in books
+            ]
+            attempts = workers * checkouts
+            self.stdout.write(
+                f'Attempted: {attempts}, Sold: {totals["sold"]}, '
+                f'Sold out: {totals["sold_out"]}, Errors: {totals["errors"]}'
+            )
+            self.stdout.write(
+                f'Elapsed: {elapsed:.2f}s '
+                f'({attempts / elapsed if elapsed else 0:.1f} checkouts/s)'
+            )
+
+            expected = options['stock'] - totals['sold']
+            if all(stock == expected for stock in remaining):
+                self.stdout.write(self.style.SUCCESS(
+                    f'Stock consistent: {remaining} remaining or held, '
+                    f'no overselling.'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f'Stock inconsistent: expected {expected} remaining or '
+                    f'held of each title, found {remaining}.'
+                ))
+        finally:
+            Book.objects.filter(pk__in=[book.pk for book in books]).delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
@@ -0,0 +1,49 @@
+"""
+Management command to hand back the stock of expired checkout reservations
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from orders.inventory import expire_reservations
+
+
+class Command(BaseCommand):
+    help = 'Release the stock held by expired checkout reservations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Maximum number of reservations per batch (default: 500)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep sweeping instead of exiting when nothing has expired'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60.0,
+            help='Seconds to wait between sweeps (default: 60)'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            expired = expire_reservations(batch_size=options['batch_size'])
+            total += expired
+
+            # Drain full batches back-to-back, then wait or stop
+            if expired < options['batch_size']:
+                if not options['loop']:
+                    break
+                if total:
+                    self.stdout.write(f'Expired {total} reservations')
+                    total = 0
+                time.sleep(options['interval'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Expired {total} reservations.')
+        )
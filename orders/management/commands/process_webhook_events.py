@@ -0,0 +1,61 @@
+"""
+Management command to apply recorded Stripe webhook events to orders
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from orders.webhooks import process_webhook_events
+
+
+class Command(BaseCommand):
+    help = 'Apply pending events from the Stripe webhook ledger in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Maximum number of events per batch (default: 500)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling instead of exiting when no events are due'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls (default: 2)'
+        )
+
+    def _summary(self, totals):
+        """Describe the accumulated counts of processed batches."""
+        return (
+            f"Processed {totals.get('processed', 0)}, ignored "
+            f"{totals.get('ignored', 0)}, retried {totals.get('retried', 0)}, "
+            f"failed {totals.get('failed', 0)} events; updated "
+            f"{totals.get('orders', 0)} orders."
+        )
+
+    def handle(self, *args, **options):
+        totals = {}
+        while True:
+            result = process_webhook_events(batch_size=options['batch_size'])
+            for key, value in result.items():
+                totals[key] = totals.get(key, 0) + value
+            claimed = (
+                result['processed'] + result['ignored']
+                + result['retried'] + result['failed']
+            )
+
+            # Drain full batches back-to-back, then wait or stop
+            if claimed < options['batch_size']:
+                if not options['loop']:
+                    break
+                if any(totals.values()):
+                    self.stdout.write(self._summary(totals))
+                    totals = {}
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(self._summary(totals)))
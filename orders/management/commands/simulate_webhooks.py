@@ -0,0 +1,244 @@
+"""
+Management command to load-test the Stripe webhook ledger with a burst
+of signed stand-in events
+"""
+
+import hashlib
+import hmac
+import json
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from orders.models import Order, StripeWebhookEvent
+from orders.webhooks import process_webhook_events
+
+
+def sign(payload: str, secret: str) -> str:
+    """Build a Stripe-Signature header for a payload."""
+    timestamp = int(time.time())
+    digest = hmac.new(
+        secret.encode(), f'{timestamp}.{payload}'.encode(), hashlib.sha256
+    ).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Post a burst of signed, Stripe-like payment_intent events (with '
+        'retried duplicates) to the webhook, report acknowledgement latency, '
+        'then drain the ledger and check every order ended up in the right '
+        'state. Creates and removes its own orders.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=1000,
+            help='Pending orders to send payment events for (default: 1000)'
+        )
+        parser.add_argument(
+            '--failed',
+            type=float,
+            default=0.1,
+            help='Share of orders whose payment fails (default: 0.1)'
+        )
+        parser.add_argument(
+            '--duplicates',
+            type=float,
+            default=0.2,
+            help='Share of events delivered twice, as Stripe retries do (default: 0.2)'
+        )
+        parser.add_argument(
+            '--url',
+            help='Post to a running server at this webhook URL instead of in-process'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Concurrent senders when posting to --url (default: 8)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Events per processing batch (default: 500)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed (default: 42)'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        run_id = uuid.uuid4().hex[:8]
+        secret = settings.STRIPE_WEBHOOK_SECRET
+        if options['url'] and not secret:
+            raise CommandError(
+                'STRIPE_WEBHOOK_SECRET must be set to sign events for --url'
+            )
+        secret = secret or f'whsec_simulated_{run_id}'
+
+        User = get_user_model()
+        user = User.objects.create_user(
+            username=f'webhook-sim-{run_id}',
+            email=f'webhook-sim-{run_id}@example.com',
+        )
+        Order.objects.bulk_create([
+            Order(
+                order_number=f'SIM{run_id}{n:07d}'[:20],
+                user=user,
+                total_amount=Decimal('10.00'),
+                customer_email=user.email,
+                customer_first_name='Webhook',
+                customer_last_name='Simulation',
+                stripe_payment_intent_id=f'pi_sim_{run_id}_{n}',
+            )
+            for n in range(options['orders'])
+        ])
+
+        expected = {}
+        deliveries = []
+        for n in range(options['orders']):
+            intent_id = f'pi_sim_{run_id}_{n}'
+            succeeded = rng.random() >= options['failed']
+            event_type = (
+                'payment_intent.succeeded' if succeeded
+                else 'payment_intent.payment_failed'
+            )
+            expected[intent_id] = 'paid' if succeeded else 'failed'
+            payload = json.dumps({
+                'id': f'evt_sim_{run_id}_{n}',
+                'object': 'event',
+                'type': event_type,
+                'created': int(time.time()),
+                'data': {'object': {
+                    'id': intent_id,
+                    'object': 'payment_intent',
+                    'status': 'succeeded' if succeeded else 'requires_payment_method',
+                }},
+            })
+            deliveries.append(payload)
+            if rng.random() < options['duplicates']:
+                deliveries.append(payload)
+        rng.shuffle(deliveries)
+
+        self.stdout.write(
+            f"Sending {len(deliveries)} deliveries of {options['orders']} "
+            f"events to {options['url'] or 'the webhook view in-process'}"
+        )
+        try:
+            with override_settings(STRIPE_WEBHOOK_SECRET=secret):
+                started = time.perf_counter()
+                latencies, errors = self._send(deliveries, secret, options)
+                elapsed = time.perf_counter() - started
+            self._report_latency(latencies, errors, elapsed)
+
+            recorded = StripeWebhookEvent.objects.filter(
+                event_id__startswith=f'evt_sim_{run_id}_'
+            ).count()
+            self.stdout.write(
+                f'Ledger: {recorded} events recorded for '
+                f'{len(deliveries)} deliveries'
+            )
+
+            started = time.perf_counter()
+            totals = {'processed': 0, 'orders': 0}
+            while True:
+                result = process_webhook_events(batch_size=options['batch_size'])
+                totals['processed'] += result['processed']
+                totals['orders'] += result['orders']
+                if not any(result.values()):
+                    break
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Processed {totals['processed']} events and updated "
+                f"{totals['orders']} orders in {elapsed:.2f}s "
+                f"({totals['processed'] / elapsed if elapsed else 0:.0f} events/s)"
+            )
+
+            actual = dict(Order.objects.filter(user=user).values_list(
+                'stripe_payment_intent_id', 'payment_status'
+            ))
+            wrong = [intent for intent, status in expected.items()
+                     if actual.get(intent) != status]
+            if recorded == options['orders'] and not wrong:
+                self.stdout.write(self.style.SUCCESS(
+                    'Consistent: every event recorded once and every order '
+                    'in its expected state.'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f'Inconsistent: {recorded} of {options["orders"]} events '
+                    f'recorded, {len(wrong)} orders in the wrong state.'
+                ))
+        finally:
+            StripeWebhookEvent.objects.filter(
+                event_id__startswith=f'evt_sim_{run_id}_'
+            ).delete()
+            user.delete()
+
+    def _send(self, deliveries, secret, options):
+        """Post every delivery and return the latencies and error count."""
+        if options['url']:
+            local = threading.local()
+
+            def post(payload):
+                if not hasattr(local, 'session'):
+                    local.session = requests.Session()
+                session = local.session
+                started = time.perf_counter()
+                response = session.post(
+                    options['url'], data=payload, timeout=10,
+                    headers={'Content-Type': 'application/json',
+                             'Stripe-Signature': sign(payload, secret)},
+                )
+                return time.perf_counter() - started, response.status_code
+
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                results = list(pool.map(post, deliveries))
+        else:
+            # In-process deliveries are sequential; use --url against a
+            # running server to measure concurrent acknowledgement
+            client = Client(HTTP_HOST='localhost')
+            url = reverse('cart:stripe_webhook')
+            results = []
+            for payload in deliveries:
+                started = time.perf_counter()
+                response = client.post(
+                    url, data=payload, content_type='application/json',
+                    HTTP_STRIPE_SIGNATURE=sign(payload, secret),
+                )
+                results.append((time.perf_counter() - started, response.status_code))
+
+        latencies = [latency * 1000 for latency, _ in results]
+        errors = sum(1 for _, status in results if status != 200)
+        return latencies, errors
+
+    def _report_latency(self, latencies, errors, elapsed):
+        """Print acknowledgement latency percentiles."""
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive') \
+            if len(latencies) > 1 else latencies * 99
+        self.stdout.write(
+            f'Acknowledged {len(latencies) - errors}/{len(latencies)} in '
+            f'{elapsed:.2f}s ({len(latencies) / elapsed if elapsed else 0:.0f}/s): '
+            f'p50 {cuts[49]:.1f}ms, p95 {cuts[94]:.1f}ms, p99 {cuts[98]:.1f}ms'
+        )
+        if errors:
+            self.stdout.write(self.style.ERROR(f'{errors} deliveries were rejected'))
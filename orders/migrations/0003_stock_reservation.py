@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0007_listing_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("orders", "0002_alter_orderitem_book_authors_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockReservation",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("quantity", models.PositiveIntegerField()),
+                ("expires_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="books.book",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock_reservations",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Stock Reservation",
+                "verbose_name_plural": "Stock Reservations",
+                "ordering": ["expires_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["expires_at"], name="orders_stoc_expires_f55a9e_idx"
+                    ),
+                    models.Index(
+                        fields=["user", "book"], name="orders_stoc_user_id_75c53b_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
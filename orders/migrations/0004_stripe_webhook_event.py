@@ -0,0 +1,84 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0003_stock_reservation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StripeWebhookEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("event_id", models.CharField(max_length=255, unique=True)),
+                ("event_type", models.CharField(max_length=100)),
+                ("payment_intent_id", models.CharField(blank=True, max_length=255)),
+                ("payload", models.JSONField()),
+                (
+                    "event_created",
+                    models.DateTimeField(
+                        blank=True, help_text="When Stripe created the event", null=True
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processed", "Processed"),
+                            ("ignored", "Ignored"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("last_error", models.TextField(blank=True)),
+                ("received_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Stripe Webhook Event",
+                "verbose_name_plural": "Stripe Webhook Events",
+                "ordering": ["-received_at"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["stripe_payment_intent_id"],
+                name="orders_orde_stripe__d5f9a9_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stripewebhookevent",
+            index=models.Index(
+                fields=["status", "next_attempt_at"],
+                name="orders_stri_status_7c1b90_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stripewebhookevent",
+            index=models.Index(
+                fields=["payment_intent_id"], name="orders_stri_payment_73e4b8_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0004_stripe_webhook_event"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderNumberCounter",
+            fields=[
+                ("date", models.DateField(primary_key=True, serialize=False)),
+                ("value", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Order Number Counter",
+                "verbose_name_plural": "Order Number Counters",
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name="order",
+            name="orders_orde_order_n_f3ada5_idx",
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0005_order_number_counter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="stock_taken",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="stockreservation",
+            name="order",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="stock_reservations",
+                to="orders.order",
+            ),
+        ),
+    ]
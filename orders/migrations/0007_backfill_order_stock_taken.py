@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:19
+
+from django.db import migrations
+
+
+def backfill_stock_taken(apps, schema_editor):
+    """Mark the stock of paid, uncancelled orders as taken."""
+    Order = apps.get_model("orders", "Order")
+    Order.objects.filter(payment_status="paid").exclude(status="cancelled").update(
+        stock_taken=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0006_order_stock_taken"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_stock_taken, migrations.RunPython.noop),
+    ]
@@ -10,6 +10,7 @@ from decimal import Decimal
 from django.conf import settings
 from django.db import models
 from django.urls import reverse
+from django.utils import timezone
 
 from books.models import Book
 
@@ -65,6 +66,10 @@ class Order(models.Model):
     )
     payment_status = models.CharField(max_length=20, default='pending')
     
+    # Whether the order's books have been taken out of stock; pending
+    # orders hold StockReservations instead (see orders.inventory)
+    stock_taken = models.BooleanField(default=False)
+    
     # Customer details (snapshot at time of order)
     customer_email = models.EmailField()
     customer_first_name = models.CharField(max_length=100)
@@ -81,8 +86,8 @@ class Order(models.Model):
         verbose_name = "Order"
         verbose_name_plural = "Orders"
         indexes = [
-            models.Index(fields=['order_number']),
             models.Index(fields=['stripe_session_id']),
+            models.Index(fields=['stripe_payment_intent_id']),
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['status']),
         ]
@@ -107,23 +112,16 @@ class Order(models.Model):
         """
         Generate a unique order number.
         
-        Creates a unique order number in the format TT-YYYYMMDD-XXXXX
-        where TT stands for Tales & Tails, followed by the date and
-        a random alphanumeric string.
+        Creates an order number in the format TT-YYYYMMDD-XXXXXX where TT
+        stands for Tales & Tails, followed by the date and the day's
+        sequence number in base 36, taken from a per-day counter so that
+        concurrent checkouts never get the same number.
         
         Returns:
             str: The generated order number
         """
-        import random
-        import string
-        from django.utils import timezone
-        
-        # Format: TT-YYYYMMDD-XXXXX (TT = Tales & Tails)
-        date_str = timezone.now().strftime('%Y%m%d')
-        random_str = ''.join(
-            random.choices(string.ascii_uppercase + string.digits, k=5)
-        )
-        return f"TT-{date_str}-{random_str}"
+        from .numbers import next_order_number
+        return next_order_number()
     
     @property
     def customer_full_name(self):
@@ -279,4 +277,124 @@ class OrderStatusHistory(models.Model):
     def __str__(self):
         """Return a string representation of the status change."""
         return f"Order {self.order.order_number}: {self.from_status} → {self.to_status}"
-        
\ No newline at end of file
+        
+
+class StockReservation(models.Model):
+    """
+    Stock held for a customer while they complete checkout, or for an
+    order waiting to be paid.
+
+    Creating a reservation takes the quantity out of the book's
+    ``stock_quantity`` straight away; the stock is either kept when the
+    order is paid or handed back when the reservation is released or
+    expires. See ``orders.inventory``.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations'
+    )
+    book = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='reservations'
+    )
+    # Set for the stock of an unpaid order; a deleted order's reservation
+    # is left to expire, which hands its stock back
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stock_reservations'
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta options for the StockReservation model."""
+        ordering = ['expires_at']
+        verbose_name = "Stock Reservation"
+        verbose_name_plural = "Stock Reservations"
+        indexes = [
+            models.Index(fields=['expires_at']),
+            models.Index(fields=['user', 'book']),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the reservation."""
+        return f"{self.quantity}x book {self.book_id} for user {self.user_id}"
+
+
+class OrderNumberCounter(models.Model):
+    """
+    Per-day sequence behind order numbers.
+
+    ``orders.numbers.next_order_number`` increments a day's row with a
+    single UPDATE, which the database serialises, so every order of the
+    day gets its own number without retries.
+    """
+
+    date = models.DateField(primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        """Meta options for the OrderNumberCounter model."""
+        verbose_name = "Order Number Counter"
+        verbose_name_plural = "Order Number Counters"
+
+    def __str__(self):
+        """Return a string representation of the counter."""
+        return f"{self.date}: {self.value}"
+
+
+class StripeWebhookEvent(models.Model):
+    """
+    Ledger of Stripe webhook events.
+
+    The webhook view only verifies and records each event; the unique
+    ``event_id`` makes Stripe's retries of an event no-ops. Recorded
+    events are applied to orders in batches by the
+    ``process_webhook_events`` command. See ``orders.webhooks``.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payment_intent_id = models.CharField(max_length=255, blank=True)
+    payload = models.JSONField()
+    event_created = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When Stripe created the event"
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """Meta options for the StripeWebhookEvent model."""
+        ordering = ['-received_at']
+        verbose_name = "Stripe Webhook Event"
+        verbose_name_plural = "Stripe Webhook Events"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['payment_intent_id']),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the event."""
+        return f"{self.event_type} {self.event_id} ({self.status})"
@@ -0,0 +1,100 @@
+"""
+Order number allocation.
+
+Order numbers look like ``TT-20250101-00001A``: the UTC date and the
+day's sequence number in base 36, zero-padded to six characters (over
+two billion orders a day). The sequence comes from a per-day
+``OrderNumberCounter`` row that is incremented with a single
+``UPDATE ... SET value = value + 1``. The database serialises those
+updates, so concurrent checkouts in any number of workers always get
+distinct numbers and the ``unique`` insert of the order cannot fail.
+
+Numbers of a day sort in the order they were issued and are appended at
+the end of the order number index. Earlier orders carry a random
+five-character suffix, so they can never clash with sequence numbers.
+
+The counter row stays locked until the transaction that incremented it
+ends, so callers that create an order inside a larger transaction
+should allocate its number before opening it (see
+``create_order_from_cart``). Numbers taken by transactions that roll
+back are skipped, which leaves gaps but never duplicates.
+"""
+import string
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OrderNumberCounter
+
+PREFIX = 'TT'
+ALPHABET = string.digits + string.ascii_uppercase
+WIDTH = 6
+
+
+def to_base36(value: int, width: int = WIDTH) -> str:
+    """
+    Encode a non-negative integer in upper-case base 36.
+
+    Args:
+        value: Number to encode
+        width: Minimum length, reached by padding with zeros
+
+    Returns:
+        str: The encoded number
+    """
+    digits = []
+    while True:
+        value, remainder = divmod(value, 36)
+        digits.append(ALPHABET[remainder])
+        if not value:
+            break
+    return ''.join(reversed(digits)).rjust(width, '0')
+
+
+def format_order_number(day, sequence: int) -> str:
+    """
+    Build the order number of a day's n-th order.
+
+    Args:
+        day: Date the order was placed (UTC)
+        sequence: Position of the order in the day, starting at 1
+
+    Returns:
+        str: The order number, e.g. 'TT-20250101-00001A'
+    """
+    return f"{PREFIX}-{day:%Y%m%d}-{to_base36(sequence)}"
+
+
+def next_sequence(day) -> int:
+    """
+    Take the next sequence number of a day.
+
+    Args:
+        day: Date whose counter is incremented
+
+    Returns:
+        int: The new value of the counter
+    """
+    counters = OrderNumberCounter.objects.filter(date=day)
+    with transaction.atomic():
+        if not counters.update(value=F('value') + 1):
+            # First order of the day: create the row, racing other workers
+            OrderNumberCounter.objects.bulk_create(
+                [OrderNumberCounter(date=day)], ignore_conflicts=True
+            )
+            counters.update(value=F('value') + 1)
+        # The row is locked by the update above until this transaction
+        # ends, so the value read back is the one this call produced
+        return counters.values_list('value', flat=True).get()
+
+
+def next_order_number() -> str:
+    """
+    Allocate a new order number.
+
+    Returns:
+        str: A unique order number for an order placed now
+    """
+    day = timezone.now().date()
+    return format_order_number(day, next_sequence(day))
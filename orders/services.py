@@ -0,0 +1,166 @@
+"""
+Order creation services for the orders application.
+
+This module turns a user's cart into an order with a fixed number of
+queries regardless of cart size: cart lines are loaded with their books
+and authors in one go, order items are written with ``bulk_create``
+using pre-filled snapshots, stock is taken for paid orders or reserved
+for unpaid ones (see ``orders.inventory``) and the cart is cleared in
+the same transaction.
+"""
+import logging
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from django.db import transaction
+
+from cart.models import CartItem
+from .inventory import InsufficientStockError, commit_cart, reserve_cart
+from .models import Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+
+class EmptyCartError(Exception):
+    """Raised when an order is requested for an empty cart."""
+
+
+def stock_error_message(error: InsufficientStockError, items: List[CartItem]) -> str:
+    """
+    Build a customer-facing message for a stock shortfall.
+
+    Args:
+        error: The raised InsufficientStockError
+        items: The cart lines being checked out
+
+    Returns:
+        str: Message naming the affected book
+    """
+    title = next(
+        (item.book.title for item in items if item.book_id == error.book_id),
+        'A book in your cart',
+    )
+    return f'Sorry, "{title}" no longer has enough stock for your order.'
+
+
+def load_cart_items(user) -> List[CartItem]:
+    """
+    Load a user's cart lines with their books and authors.
+
+    Args:
+        user: The cart owner
+
+    Returns:
+        List of CartItem objects with ``book`` and ``book.authors`` loaded
+    """
+    return list(
+        CartItem.objects.filter(cart__user=user)
+        .select_related('book')
+        .prefetch_related('book__authors')
+        .order_by('added_at')
+    )
+
+
+def cart_totals(
+    items: List[CartItem], shipping: Decimal = Decimal('0.00')
+) -> Tuple[Decimal, Decimal]:
+    """
+    Calculate the subtotal and total of loaded cart lines.
+
+    Args:
+        items: Cart lines from ``load_cart_items``
+        shipping: Shipping cost added to the subtotal
+
+    Returns:
+        tuple: (subtotal, total)
+    """
+    subtotal = sum(
+        (item.book.price * item.quantity for item in items), Decimal('0.00')
+    )
+    return subtotal, subtotal + shipping
+
+
+def build_order_items(order: Order, items: List[CartItem]) -> List[OrderItem]:
+    """
+    Build unsaved order items with the book snapshot already filled in.
+
+    Args:
+        order: The order the items belong to
+        items: Cart lines from ``load_cart_items``
+
+    Returns:
+        List of unsaved OrderItem objects
+    """
+    return [
+        OrderItem(
+            order=order,
+            book=item.book,
+            quantity=item.quantity,
+            unit_price=item.book.price,
+            book_title=item.book.title,
+            book_authors=item.book.authors_list[:500],
+            book_isbn=item.book.isbn_13 or item.book.isbn_10 or '',
+        )
+        for item in items
+    ]
+
+
+def create_order_from_cart(
+    user, items: Optional[List[CartItem]] = None,
+    shipping: Decimal = Decimal('0.00'), **order_fields
+) -> Order:
+    """
+    Create an order from the user's cart and clear the cart.
+
+    The order, its items and the cart clearing happen inside a single
+    transaction; callers may nest further work (e.g. queueing emails)
+    in an outer ``transaction.atomic`` block. A paid order takes its
+    stock; any other order only reserves it until ``settle_order`` is
+    called on payment, and the reservation expires if it never is.
+
+    Args:
+        user: The customer placing the order
+        items: Pre-loaded cart lines; loaded here if not given
+        shipping: Shipping cost added to the order total
+        **order_fields: Extra Order fields, such as status, the Stripe
+            payment intent ID or an order number from
+            ``next_order_number``; callers running this inside their own
+            transaction should allocate the number before opening it
+
+    Returns:
+        Order: The created order
+
+    Raises:
+        EmptyCartError: If the cart has no items
+        InsufficientStockError: If a book no longer has enough stock
+    """
+    if items is None:
+        items = load_cart_items(user)
+    if not items:
+        raise EmptyCartError('Your cart is empty.')
+
+    _, total = cart_totals(items, shipping)
+    paid = order_fields.get('payment_status') == 'paid'
+
+    with transaction.atomic():
+        if paid:
+            commit_cart(user, items)
+        order = Order.objects.create(
+            user=user,
+            total_amount=total,
+            customer_email=user.email,
+            customer_first_name=user.first_name or '',
+            customer_last_name=user.last_name or '',
+            stock_taken=paid,
+            **order_fields,
+        )
+        OrderItem.objects.bulk_create(build_order_items(order, items))
+        if not paid:
+            reserve_cart(user, items, order=order)
+        CartItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+
+    logger.info(
+        f"Order {order.order_number} created with {len(items)} lines "
+        f"for user {user.id}"
+    )
+    return order
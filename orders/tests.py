@@ -1,3 +1,202 @@
+"""
+Tests for the orders application.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from books.models import Book
+from cart.models import Cart, CartItem
+
+from .inventory import (
+    InsufficientStockError, check_cart, commit_cart, expire_reservations,
+    release_reservations, reserve_cart, settle_order,
+)
+from .models import Order, StockReservation
+from .webhooks import process_webhook_events, record_event
+
+
+class StockTestCase(TestCase):
+    """A customer with two copies of a book in their cart."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='reader', email='reader@example.com', password='secret'
+        )
+        self.book = Book.objects.create(
+            title='Stock Book', price=Decimal('9.99'), stock_quantity=5
+        )
+        self.cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=self.cart, book=self.book, quantity=2)
+
+    def assertStock(self, quantity):
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.stock_quantity, quantity)
+
+
+class InventoryTests(StockTestCase):
+    """Reserving, committing, expiring and releasing checkout stock."""
+
+    def items(self, quantity=2):
+        return [CartItem(book=self.book, quantity=quantity)]
+
+    def expire(self):
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    def test_reserve_takes_stock(self):
+        reserve_cart(self.user, self.items())
+        self.assertStock(3)
+        self.assertEqual(StockReservation.objects.get().quantity, 2)
+
+    def test_reserving_again_only_moves_the_difference(self):
+        reserve_cart(self.user, self.items())
+        reserve_cart(self.user, self.items(4))
+        self.assertStock(1)
+        reserve_cart(self.user, self.items(1))
+        self.assertStock(4)
+        self.assertEqual(StockReservation.objects.get().quantity, 1)
+
+    def test_reserve_beyond_stock_takes_nothing(self):
+        with self.assertRaises(InsufficientStockError):
+            reserve_cart(self.user, self.items(6))
+        self.assertStock(5)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_commit_uses_the_reservation(self):
+        reserve_cart(self.user, self.items())
+        commit_cart(self.user, self.items())
+        self.assertStock(3)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_commit_without_reservation_takes_stock(self):
+        commit_cart(self.user, self.items())
+        self.assertStock(3)
+
+    def test_commit_after_expiry_fails_when_stock_is_gone(self):
+        reserve_cart(self.user, self.items())
+        self.expire()
+        expire_reservations()
+        Book.objects.filter(pk=self.book.pk).update(stock_quantity=1)
+        with self.assertRaises(InsufficientStockError):
+            commit_cart(self.user, self.items())
+        self.assertStock(1)
+
+    def test_expire_only_hands_back_expired_reservations(self):
+        reserve_cart(self.user, self.items())
+        self.assertEqual(expire_reservations(), 0)
+        self.assertStock(3)
+        self.expire()
+        self.assertEqual(expire_reservations(), 1)
+        self.assertStock(5)
+
+    def test_release_hands_back_stock(self):
+        reserve_cart(self.user, self.items())
+        release_reservations(self.user)
+        self.assertStock(5)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_reserve_reclaims_other_expired_reservations(self):
+        other = get_user_model().objects.create_user(
+            username='other', email='other@example.com'
+        )
+        reserve_cart(other, self.items(5))
+        with self.assertRaises(InsufficientStockError):
+            reserve_cart(self.user, self.items())
+        self.expire()
+        reserve_cart(self.user, self.items())
+        self.assertStock(3)
+        self.assertEqual(StockReservation.objects.get().user, self.user)
+
+    def test_check_counts_stock_the_user_holds(self):
+        reserve_cart(self.user, self.items(5))
+        check_cart(self.user, self.items(5))
+        with self.assertRaises(InsufficientStockError):
+            check_cart(self.user, self.items(6))
+
+
+class OrderStockTests(StockTestCase):
+    """Unpaid orders only reserve stock; cancelling hands it back."""
+
+    def place_pending_order(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('orders:create_order_from_cart'))
+        self.assertTrue(response.json()['success'])
+        return Order.objects.get(user=self.user)
+
+    def test_pending_order_reserves_stock(self):
+        order = self.place_pending_order()
+        self.assertFalse(order.stock_taken)
+        self.assertStock(3)
+        reservation = StockReservation.objects.get()
+        self.assertEqual((reservation.order, reservation.quantity), (order, 2))
+
+    def test_unpaid_order_gets_its_stock_back_when_reservation_expires(self):
+        self.place_pending_order()
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(expire_reservations(), 1)
+        self.assertStock(5)
+
+    def test_payment_keeps_reserved_stock(self):
+        order = self.place_pending_order()
+        order.payment_status, order.status = 'paid', 'confirmed'
+        settle_order(order)
+        self.assertTrue(order.stock_taken)
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertStock(3)
+
+    def test_payment_after_expiry_takes_stock_again(self):
+        order = self.place_pending_order()
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        expire_reservations()
+        order.payment_status, order.status = 'paid', 'confirmed'
+        settle_order(order)
+        self.assertTrue(order.stock_taken)
+        self.assertStock(3)
+
+    def test_cancelling_pending_order_releases_reservation(self):
+        order = self.place_pending_order()
+        order.status = 'cancelled'
+        settle_order(order)
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertStock(5)
+
+    def test_cancelling_paid_order_restocks_once(self):
+        order = self.place_pending_order()
+        order.payment_status, order.status = 'paid', 'confirmed'
+        settle_order(order)
+        order.status = 'cancelled'
+        settle_order(order)
+        settle_order(order)
+        self.assertFalse(order.stock_taken)
+        self.assertStock(5)
+
+    def webhook(self, order, event_type):
+        Order.objects.filter(pk=order.pk).update(stripe_payment_intent_id='pi_test')
+        record_event({
+            'id': f'evt_{event_type}',
+            'type': event_type,
+            'created': int(timezone.now().timestamp()),
+            'data': {'object': {'object': 'payment_intent', 'id': 'pi_test'}},
+        })
+        process_webhook_events()
+        order.refresh_from_db()
+
+    def test_succeeded_webhook_keeps_stock(self):
+        order = self.place_pending_order()
+        self.webhook(order, 'payment_intent.succeeded')
+        self.assertEqual((order.payment_status, order.stock_taken), ('paid', True))
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertStock(3)
 
-# Create your tests here.
+    def test_failed_webhook_hands_stock_back(self):
+        order = self.place_pending_order()
+        self.webhook(order, 'payment_intent.payment_failed')
+        self.assertEqual((order.status, order.stock_taken), ('cancelled', False))
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertStock(5)
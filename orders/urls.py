@@ -11,7 +11,8 @@ app_name = 'orders'
 
 urlpatterns = [
     path('', views.order_list, name='order_list'),
+    # Must precede the order number patterns, which would otherwise match it
+    path('create-from-cart/', views.create_order_from_cart, name='create_order_from_cart'),
     path('<str:order_number>/', views.order_detail, name='order_detail'),
     path('<str:order_number>/success/', views.order_success, name='order_success'),
-    path('create-from-cart/', views.create_order_from_cart, name='create_order_from_cart'),
 ]
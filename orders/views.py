@@ -8,12 +8,15 @@ import logging
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.shortcuts import render, get_object_or_404, redirect
+from django.db import transaction
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from decimal import Decimal
 
-from .models import Order, OrderItem
-from cart.models import Cart
+from .models import Order
+from . import services
+from .numbers import next_order_number
+from cart.summary import refresh_cart_summary
 from books.models import Book
 
 # Configure logging
@@ -135,48 +138,20 @@ def create_order_from_cart(request):
         JsonResponse: JSON response indicating success/failure with
                      order details or error messages.
     """
+    items = services.load_cart_items(request.user)
     try:
-        # Get user's cart
-        cart = get_object_or_404(Cart, user=request.user)
-        cart_items = cart.items.all()
-        
-        if not cart_items.exists():
-            return JsonResponse({
-                'success': False,
-                'error': 'Your cart is empty.'
-            })
-        
-        # Calculate total
-        total = sum(
-            item.book.price * item.quantity for item in cart_items
-        )
-        
-        # Add shipping
-        shipping = Decimal('5.00')
-        total_with_shipping = total + shipping
-        
-        # Create order
-        order = Order.objects.create(
-            user=request.user,
-            total_amount=total_with_shipping,
-            status='pending',
-            payment_status='pending',
-            customer_email=request.user.email,
-            customer_first_name=request.user.first_name or '',
-            customer_last_name=request.user.last_name or '',
-        )
-        
-        # Create order items
-        for cart_item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                book=cart_item.book,
-                quantity=cart_item.quantity,
-                unit_price=cart_item.book.price
+        # Taken first so the counter row is not locked for the whole transaction
+        order_number = next_order_number()
+        with transaction.atomic():
+            order = services.create_order_from_cart(
+                request.user,
+                items=items,
+                shipping=Decimal('5.00'),
+                order_number=order_number,
+                status='pending',
+                payment_status='pending',
             )
-        
-        # Clear cart
-        cart_items.delete()
+            refresh_cart_summary(request)
         
         logger.info(f"Order {order.order_number} created from cart for user {request.user.id}")
         
@@ -187,6 +162,16 @@ def create_order_from_cart(request):
             'redirect_url': order.get_absolute_url()
         })
         
+    except services.EmptyCartError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Your cart is empty.'
+        })
+    except services.InsufficientStockError as e:
+        return JsonResponse({
+            'success': False,
+            'error': services.stock_error_message(e, items)
+        })
     except Exception as e:
         logger.error(f"Error creating order from cart: {str(e)}")
         return JsonResponse({
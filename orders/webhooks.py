@@ -0,0 +1,224 @@
+"""
+Stripe webhook ledger.
+
+``record_event`` stores a verified webhook event in the
+``StripeWebhookEvent`` ledger with a single INSERT that does nothing when
+the event ID is already there, so the webhook view can acknowledge
+Stripe within milliseconds and Stripe's retries are harmless.
+
+``process_webhook_events`` applies recorded events to orders in batches:
+
+* events are claimed with a short lease, so several workers can run
+* events of one payment intent are applied in the order Stripe created
+  them, and only the latest one decides the order's state
+* a paid order is never moved back by a late ``payment_failed`` event
+* ``payment_intent.succeeded`` events whose order does not exist yet
+  (the webhook can arrive before checkout has committed the order) are
+  retried with exponential backoff
+* ``payment_failed`` events without an order are ignored: checkout only
+  creates an order once the payment succeeds, so a declined card never
+  has one
+* all orders of a batch are updated with one ``bulk_update`` and their
+  status changes recorded in ``OrderStatusHistory``
+* a paid order keeps its stock and a cancelled one hands it back (see
+  ``orders.inventory.settle_order``); a paid order whose books have run
+  out meanwhile stays paid, and is logged for staff to refund or restock
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .inventory import InsufficientStockError, settle_order
+from .models import Order, OrderStatusHistory, StripeWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+# Event type -> (payment_status, status) the order moves to
+TRANSITIONS = {
+    'payment_intent.succeeded': ('paid', 'confirmed'),
+    'payment_intent.payment_failed': ('failed', 'cancelled'),
+}
+
+# Event types retried while their order does not exist yet
+AWAIT_ORDER = {'payment_intent.succeeded'}
+
+
+def record_event(event: Dict) -> None:
+    """
+    Add a webhook event to the ledger unless it is already there.
+
+    Args:
+        event: The decoded, signature-verified Stripe event
+    """
+    data_object = event.get('data', {}).get('object', {}) or {}
+    payment_intent_id = ''
+    if data_object.get('object') == 'payment_intent':
+        payment_intent_id = data_object.get('id', '')
+    elif isinstance(data_object.get('payment_intent'), str):
+        payment_intent_id = data_object['payment_intent']
+
+    created = event.get('created')
+    StripeWebhookEvent.objects.bulk_create(
+        [StripeWebhookEvent(
+            event_id=event['id'],
+            event_type=event.get('type', ''),
+            payment_intent_id=payment_intent_id,
+            payload=event,
+            event_created=(
+                datetime.fromtimestamp(created, tz=dt_timezone.utc)
+                if isinstance(created, (int, float)) else None
+            ),
+        )],
+        ignore_conflicts=True,
+    )
+
+
+def _claim_batch(batch_size: int) -> List[StripeWebhookEvent]:
+    """
+    Lock a batch of due events by pushing back their next attempt.
+
+    The lease stops other workers from picking up the same events while
+    this batch is being applied.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, 'STRIPE_WEBHOOK_LEASE_SECONDS', 60))
+    with transaction.atomic():
+        due = StripeWebhookEvent.objects.filter(
+            status='pending', next_attempt_at__lte=now
+        ).order_by('next_attempt_at', 'pk')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        StripeWebhookEvent.objects.filter(
+            pk__in=[event.pk for event in batch]
+        ).update(next_attempt_at=now + lease)
+    return batch
+
+
+def _event_order(event: StripeWebhookEvent):
+    """Sort key putting events in the order Stripe created them."""
+    return (event.event_created or event.received_at, event.received_at, event.pk)
+
+
+def process_webhook_events(batch_size: int = 500, max_attempts: int = None) -> Dict:
+    """
+    Apply one batch of recorded webhook events to their orders.
+
+    Args:
+        batch_size: Maximum number of events to process
+        max_attempts: Attempts before a succeeded event whose order
+            cannot be found is marked failed
+
+    Returns:
+        dict: Counts of processed, ignored, retried and failed events
+            and of orders updated
+    """
+    if max_attempts is None:
+        max_attempts = getattr(settings, 'STRIPE_WEBHOOK_MAX_ATTEMPTS', 8)
+    backoff = getattr(settings, 'STRIPE_WEBHOOK_RETRY_BACKOFF', 30)
+    result = {'processed': 0, 'ignored': 0, 'retried': 0, 'failed': 0, 'orders': 0}
+
+    batch = _claim_batch(batch_size)
+    if not batch:
+        return result
+
+    ignored = []
+    by_intent = defaultdict(list)
+    for event in batch:
+        if event.event_type in TRANSITIONS and event.payment_intent_id:
+            by_intent[event.payment_intent_id].append(event)
+        else:
+            ignored.append(event.pk)
+
+    now = timezone.now()
+    with transaction.atomic():
+        orders = {
+            order.stripe_payment_intent_id: order
+            for order in Order.objects.select_for_update().filter(
+                stripe_payment_intent_id__in=list(by_intent)
+            )
+        }
+
+        processed, missing, changed, history = [], [], [], []
+        for intent_id, events in by_intent.items():
+            order = orders.get(intent_id)
+            if order is None:
+                for event in events:
+                    if event.event_type in AWAIT_ORDER:
+                        missing.append(event)
+                    else:
+                        ignored.append(event.pk)
+                continue
+            processed.extend(event.pk for event in events)
+
+            latest = max(events, key=_event_order)
+            payment_status, status = TRANSITIONS[latest.event_type]
+            if order.payment_status == 'paid' or order.payment_status == payment_status:
+                continue
+            history.append(OrderStatusHistory(
+                order=order,
+                from_status=order.status,
+                to_status=status,
+                notes=f"Stripe {latest.event_type} ({latest.event_id})",
+            ))
+            order.payment_status = payment_status
+            order.status = status
+            order.updated_at = now
+            if payment_status == 'paid' and order.confirmed_at is None:
+                order.confirmed_at = now
+            changed.append(order)
+
+        if changed:
+            Order.objects.bulk_update(
+                changed, ['payment_status', 'status', 'updated_at', 'confirmed_at']
+            )
+            OrderStatusHistory.objects.bulk_create(history)
+            for order in changed:
+                try:
+                    settle_order(order)
+                except InsufficientStockError as e:
+                    logger.error(
+                        f"Order {order.order_number} is {order.payment_status} "
+                        f"but its stock is gone: {e}"
+                    )
+
+        StripeWebhookEvent.objects.filter(pk__in=processed).update(
+            status='processed', processed_at=now, last_error=''
+        )
+        StripeWebhookEvent.objects.filter(pk__in=ignored).update(
+            status='ignored', processed_at=now
+        )
+
+        for event in missing:
+            event.attempts += 1
+            event.last_error = f"No order for payment intent {event.payment_intent_id}"
+            if event.attempts >= max_attempts:
+                event.status = 'failed'
+                result['failed'] += 1
+                logger.error(
+                    f"Giving up on Stripe event {event.event_id}: {event.last_error}"
+                )
+            else:
+                event.next_attempt_at = now + timedelta(
+                    seconds=backoff * 2 ** (event.attempts - 1)
+                )
+                result['retried'] += 1
+        StripeWebhookEvent.objects.bulk_update(
+            missing, ['attempts', 'last_error', 'status', 'next_attempt_at']
+        )
+
+    result['processed'] = len(processed)
+    result['ignored'] = len(ignored)
+    result['orders'] = len(changed)
+    logger.info(
+        f"Stripe events: {result['processed']} processed, {result['ignored']} "
+        f"ignored, {result['retried']} retried, {result['failed']} failed; "
+        f"{result['orders']} orders updated"
+    )
+    return result
@@ -0,0 +1,42 @@
+"""
+Admin configuration for the outbox application.
+
+This module defines the Django admin interface for inspecting queued,
+sent and failed emails, with an action to retry failed deliveries.
+"""
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the OutboundEmail model.
+    
+    Lists queued emails with their delivery state and allows staff to
+    requeue messages that exhausted their retries.
+    """
+    list_display = [
+        'subject', 'category', 'status', 'attempts',
+        'next_attempt_at', 'created_at', 'sent_at'
+    ]
+    list_filter = ['status', 'category', 'created_at']
+    search_fields = ['subject', 'to']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    actions = ['retry_emails']
+    
+    @admin.action(description='Retry selected emails')
+    def retry_emails(self, request, queryset):
+        """
+        Requeue the selected emails for immediate delivery.
+        
+        Args:
+            request: The HTTP request object
+            queryset: The selected emails
+        """
+        updated = queryset.exclude(status='sent').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} emails requeued.')
@@ -0,0 +1,18 @@
+"""
+Django app configuration for the email outbox application.
+
+This module defines the application configuration for the outbox app,
+specifying the auto field type and application name.
+"""
+from django.apps import AppConfig
+
+
+class OutboxConfig(AppConfig):
+    """
+    Application configuration class for the outbox app.
+    
+    The outbox app queues transactional emails in the database so that
+    requests never wait on SMTP; a worker command delivers them.
+    """
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "outbox"
@@ -0,0 +1,49 @@
+"""
+Management command to deliver queued outbox emails
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from outbox.services import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Maximum number of emails per batch (default: 50)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the outbox instead of exiting when it is empty'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls of an empty outbox (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            result = send_queued_emails(batch_size=options['batch_size'])
+            processed = sum(result.values())
+
+            if processed:
+                self.stdout.write(
+                    f"Sent: {result['sent']}, Retrying: {result['retried']}, "
+                    f"Failed: {result['failed']}"
+                )
+            
+            # Drain full batches back-to-back, then wait or stop
+            if processed < options['batch_size']:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Outbox drained.'))
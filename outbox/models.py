@@ -0,0 +1,51 @@
+"""
+Email outbox models for the Tales & Tails application.
+
+This module defines the queue of outbound emails. Messages are written
+in the same database transaction as the change that triggers them and
+delivered later by the ``send_queued_emails`` worker command.
+"""
+from django.db import models
+from django.utils import timezone
+
+
+class OutboundEmail(models.Model):
+    """
+    A queued email awaiting delivery.
+
+    Failed deliveries are retried with exponential backoff until the
+    maximum number of attempts is reached.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    category = models.CharField(max_length=50, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """Meta options for the OutboundEmail model."""
+        ordering = ['-created_at']
+        verbose_name = "Outbound Email"
+        verbose_name_plural = "Outbound Emails"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        """Return string representation of the email."""
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
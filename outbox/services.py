@@ -0,0 +1,142 @@
+"""
+Email outbox services.
+
+``enqueue_email`` adds a message to the outbox inside the caller's
+transaction. ``send_queued_emails`` claims a batch of due messages,
+delivers them over a single SMTP connection and schedules retries with
+exponential backoff for failures.
+"""
+import logging
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(
+    subject: str, body: str, to: List[str], html_body: Optional[str] = None,
+    from_email: Optional[str] = None, category: str = ''
+) -> OutboundEmail:
+    """
+    Queue an email for delivery by the outbox worker.
+
+    The row is written in a savepoint, so a failure here can be caught
+    without breaking the caller's surrounding transaction.
+
+    Args:
+        subject: Email subject
+        body: Plain text body
+        to: List of recipient addresses
+        html_body: Optional HTML alternative
+        from_email: Sender address (defaults to DEFAULT_FROM_EMAIL)
+        category: Short label for filtering, e.g. 'order_confirmation'
+
+    Returns:
+        OutboundEmail: The queued message
+    """
+    with transaction.atomic():
+        return OutboundEmail.objects.create(
+            subject=subject[:255],
+            body=body,
+            html_body=html_body or '',
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(to),
+            category=category,
+        )
+
+
+def _claim_batch(batch_size: int) -> List[OutboundEmail]:
+    """
+    Lock a batch of due messages by pushing back their next attempt.
+
+    The lease stops other workers from picking up the same messages
+    while this batch is being sent.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, 'OUTBOX_LEASE_SECONDS', 300))
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(
+            status='pending', next_attempt_at__lte=now
+        ).order_by('next_attempt_at')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        OutboundEmail.objects.filter(
+            pk__in=[email.pk for email in batch]
+        ).update(next_attempt_at=now + lease)
+    return batch
+
+
+def send_queued_emails(batch_size: int = 50, max_attempts: int = None) -> Dict:
+    """
+    Deliver one batch of due messages over a single connection.
+
+    Args:
+        batch_size: Maximum number of messages to send
+        max_attempts: Attempts before a message is marked failed
+
+    Returns:
+        dict: Counts of sent, retried and failed messages
+    """
+    if max_attempts is None:
+        max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+    backoff = getattr(settings, 'OUTBOX_RETRY_BACKOFF', 60)
+    result = {'sent': 0, 'retried': 0, 'failed': 0}
+
+    batch = _claim_batch(batch_size)
+    if not batch:
+        return result
+
+    smtp = get_connection()
+    try:
+        smtp.open()
+    except Exception as e:
+        logger.error(f"Could not open email connection: {e}")
+
+    try:
+        for email in batch:
+            message = EmailMultiAlternatives(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=email.to,
+                connection=smtp,
+            )
+            if email.html_body:
+                message.attach_alternative(email.html_body, 'text/html')
+
+            email.attempts += 1
+            try:
+                message.send()
+            except Exception as e:
+                email.last_error = str(e)[:2000]
+                if email.attempts >= max_attempts:
+                    email.status = 'failed'
+                    result['failed'] += 1
+                    logger.error(f"Giving up on email {email.pk}: {e}")
+                else:
+                    delay = backoff * 2 ** (email.attempts - 1)
+                    email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+                    result['retried'] += 1
+                    logger.warning(f"Email {email.pk} failed, retrying in {delay}s: {e}")
+                email.save(update_fields=[
+                    'attempts', 'status', 'next_attempt_at', 'last_error'
+                ])
+                continue
+
+            email.status = 'sent'
+            email.sent_at = timezone.now()
+            email.last_error = ''
+            email.save(update_fields=['attempts', 'status', 'sent_at', 'last_error'])
+            result['sent'] += 1
+    finally:
+        smtp.close()
+
+    return result